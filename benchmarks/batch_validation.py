@@ -0,0 +1,50 @@
+"""
+Validating the items of 20,000 element `ListField`s of integers, floats,
+decimals, UUIDs and dates, one item at a time with DRF and with the batch
+converters, with and without NumPy (only used for integers).
+"""
+import datetime
+import uuid
+
+from benchmarks.utils import measure, report, setup
+
+setup()
+
+from rest_framework.fields import ListField as RestListField  # noqa: E402
+
+from djfilters import compat, filters  # noqa: E402
+
+SIZE = 20000
+
+
+class BatchFilter(filters.Filter):
+    integers = filters.ListField(child=filters.IntegerField(min_value=0))
+    floats = filters.ListField(child=filters.FloatField(min_value=0))
+    decimals = filters.ListField(child=filters.DecimalField(max_digits=10, decimal_places=2))
+    uuids = filters.ListField(child=filters.UUIDField())
+    days = filters.ListField(child=filters.DateField())
+
+
+DATA = {
+    'integers': [str(index) for index in range(SIZE)],
+    'floats': [str(index / 7) for index in range(SIZE)],
+    'decimals': ['%d.%02d' % (index, index % 100) for index in range(SIZE)],
+    'uuids': [str(uuid.UUID(int=index)) for index in range(SIZE)],
+    'days': [(datetime.date(2000, 1, 1) + datetime.timedelta(days=index)).isoformat() for index in range(SIZE)],
+}
+
+
+if __name__ == '__main__':
+    fields = BatchFilter().fields
+    numpy = compat.numpy
+    for name, data in DATA.items():
+        field = fields[name]
+        rows = [
+            ('one by one', measure(lambda: RestListField.run_child_validation(field, data), number=5, repeat=5)),
+            ('batch', measure(lambda: field.run_child_validation(data), number=5, repeat=5)),
+        ]
+        if name == 'integers' and numpy is not None:
+            compat.numpy = None
+            rows.append(('batch without NumPy', measure(lambda: field.run_child_validation(data), number=5, repeat=5)))
+            compat.numpy = numpy
+        report('{name}, {size} items'.format(name=name, size=SIZE), rows)
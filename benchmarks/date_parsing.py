@@ -0,0 +1,59 @@
+"""
+Parsing ISO 8601 dates, times and datetimes, and validating a date range
+filter, with DRF's parsing, with the filter fields, which only use their
+`fromisoformat()` path on the versions of Django and Python it is faster
+on, and with that path forced. Runs with `USE_TZ` on, in `Europe/Paris`.
+"""
+from unittest import mock
+
+from benchmarks.utils import measure, report, setup
+
+setup()
+
+from django.http import QueryDict  # noqa: E402
+from django.test import override_settings  # noqa: E402
+from rest_framework import fields  # noqa: E402
+
+from djfilters import filters  # noqa: E402
+from djfilters.filters import fields as filter_fields  # noqa: E402
+
+NUMBER = 20000
+
+VALUES = (
+    ('date', fields.DateField, filters.DateField, '2024-01-31'),
+    ('time', fields.TimeField, filters.TimeField, '10:30:00.250'),
+    ('datetime', fields.DateTimeField, filters.DateTimeField, '2024-01-31T10:30:00+05:30'),
+    ('datetime in UTC', fields.DateTimeField, filters.DateTimeField, '2024-01-31T10:30:00Z'),
+)
+
+
+class RangeFilter(filters.Filter):
+    after = filters.DateTimeField(source='created', lookup_expr='gte')
+    before = filters.DateTimeField(source='created', lookup_expr='lt')
+    days = filters.RangeField(source='created__date', child=filters.DateField())
+
+
+QUERY = QueryDict('after=2024-01-01T00:00:00Z&before=2024-02-01T00:00:00Z&days=2024-01-01,2024-01-31')
+
+
+def validate():
+    filter_ = RangeFilter(data=QUERY)
+    assert filter_.is_valid(), filter_.errors
+
+
+if __name__ == '__main__':
+    with override_settings(USE_TZ=True, TIME_ZONE='Europe/Paris'):
+        for name, rest_class, filter_class, value in VALUES:
+            rest_field, filter_field = rest_class(), filter_class()
+            assert rest_field.to_internal_value(value) == filter_field.to_internal_value(value)
+            rows = [
+                ('DRF', measure(lambda: rest_field.to_internal_value(value), number=NUMBER)),
+                ('filter field', measure(lambda: filter_field.to_internal_value(value), number=NUMBER)),
+            ]
+            with mock.patch.object(filter_class, 'to_internal_value', filters.IsoInputMixin.to_internal_value):
+                rows.append(('fromisoformat', measure(lambda: filter_field.to_internal_value(value), number=NUMBER)))
+            report('{name} {value!r}'.format(name=name, value=value), rows)
+        with mock.patch.object(filter_fields, 'reads_iso', return_value=False):
+            rows = [('DRF', measure(validate, number=NUMBER // 10))]
+        rows.append(('filter fields', measure(validate, number=NUMBER // 10)))
+        report('date range filter', rows)
@@ -0,0 +1,35 @@
+"""
+Validating 5,000 ids given as a comma separated query parameter and as a
+JSON array, as read from the body of a `filter_body_actions` request.
+"""
+import json
+
+from benchmarks.utils import measure, report, setup
+
+setup()
+
+from django.http import QueryDict  # noqa: E402
+
+from djfilters import filters  # noqa: E402
+
+IDS = list(range(1, 5001))
+
+
+class IdsFilter(filters.Filter):
+    fast_validation = True
+    ids = filters.ListField(child=filters.IntegerField())
+
+
+def validate(data):
+    filter_ = IdsFilter(data=data, queryset=[])
+    assert filter_.is_valid(), filter_.errors
+    return filter_.validated_data
+
+
+if __name__ == '__main__':
+    query = 'ids=' + ','.join(map(str, IDS))
+    body = json.dumps({'ids': IDS})
+    report('5,000 ids', [
+        ('query string', measure(lambda: validate(QueryDict(query)), number=20, repeat=3)),
+        ('JSON body', measure(lambda: validate(json.loads(body)), number=20, repeat=3)),
+    ])
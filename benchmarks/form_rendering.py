@@ -0,0 +1,60 @@
+"""
+Rendering the browsable API form of a filter with 10 plain fields and a
+`PrimaryKeyRelatedField` on a 20,000 row table: DRF's `HTMLFormRenderer`
+rendering the related field as a `<select>` of up to `HTML_SELECT_CUTOFF`
+(1000) objects and every field on each request vs `FilterFormRenderer`,
+suggesting `HTML_CUTOFF` (50) objects or none.
+"""
+from benchmarks.utils import measure, report, setup
+
+setup()
+
+from django.db import connection  # noqa: E402
+from rest_framework.renderers import HTMLFormRenderer  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from djfilters import filters  # noqa: E402
+from djfilters.backend import DjFilterBackend  # noqa: E402
+from tests.models import RelatedIntIdModel  # noqa: E402
+
+
+class DRFFormBackend(DjFilterBackend):
+    def to_html(self, request, queryset, view):
+        filterset = self.get_filterset(request, queryset, view)
+        filterset.is_valid()
+        form_renderer = HTMLFormRenderer()
+        form_renderer.default_style.mapping[filters.BooleanField] = {'base_template': 'checkbox.html'}
+        form_renderer.default_style.mapping[filters.ListField] = {'base_template': 'textarea.html'}
+        return form_renderer.render(filterset.data, {}, {'style': {'template_pack': 'djfilters/vertical'}})
+
+
+def make_filter(**kwargs):
+    attrs = {'customer': filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all(), **kwargs)}
+    for index in range(5):
+        attrs['char_%d' % index] = filters.CharField(help_text='Text to search')
+        attrs['flag_%d' % index] = filters.BooleanField(allow_null=True)
+    return type('FormFilter', (filters.Filter,), attrs)
+
+
+request = APIRequestFactory().get('/', data={'char_1': 'lorem'})
+request.query_params = request.GET
+
+
+def timed(backend, **kwargs):
+    view = type('View', (object,), {'filter_class': make_filter(**kwargs)})()
+
+    def run():
+        return backend.to_html(request, [], view)
+    return run
+
+
+if __name__ == '__main__':
+    connection.settings_dict['NAME'] = ':memory:'
+    with connection.schema_editor() as editor:
+        editor.create_model(RelatedIntIdModel)
+    RelatedIntIdModel.objects.bulk_create(RelatedIntIdModel(text='customer %d' % index) for index in range(20000))
+    report('to_html(), 11 fields, 20,000 related rows', [
+        ('HTMLFormRenderer, <select> of 1000', measure(timed(DRFFormBackend(), html_cutoff=1000), number=20)),
+        ('FilterFormRenderer, 50 suggestions', measure(timed(DjFilterBackend()), number=20)),
+        ('FilterFormRenderer, trust_ids', measure(timed(DjFilterBackend(), trust_ids=True), number=20)),
+    ])
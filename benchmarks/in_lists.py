@@ -0,0 +1,63 @@
+"""
+Filtering a 100,000 row table with a `ListField` of 10, 1,000 and 50,000
+ids, with every strategy of the `IN_LIST_STRATEGY` setting supported by the
+database. Runs on an in-memory SQLite database by default; point
+`DJANGO_SETTINGS_MODULE` to settings using PostgreSQL to compare `any`.
+"""
+import random
+
+from benchmarks.utils import measure, report, setup
+
+setup()
+
+from django.db import DatabaseError, connection  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+from djfilters import filters  # noqa: E402
+from djfilters.filters import lookups  # noqa: E402
+from tests.models import RelatedIntIdModel  # noqa: E402
+
+ROWS = 100000
+STRATEGIES = ('in', 'chunked', 'values', 'json', 'any')
+
+
+class IdsFilter(filters.Filter):
+    ids = filters.ListField(source='id', child=filters.IntegerField())
+
+
+def timed(ids):
+    validated_data = {'id': ids}
+
+    def run():
+        return IdsFilter(queryset=RelatedIntIdModel.objects.all()).filter(validated_data).count()
+    return run
+
+
+def supported(strategy):
+    return strategy == 'in' or lookups._strategies[strategy](connection, 'id', [], [1]) is not None
+
+
+if __name__ == '__main__':
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['NAME'] = ':memory:'
+    with connection.schema_editor() as editor:
+        editor.create_model(RelatedIntIdModel)
+    RelatedIntIdModel.objects.bulk_create(RelatedIntIdModel(text=str(index)) for index in range(ROWS))
+    random.seed(0)
+    for size in (10, 1000, 50000):
+        ids = random.sample(range(1, ROWS * 2), size)
+        rows = []
+        for strategy in STRATEGIES:
+            if not supported(strategy):
+                continue
+            with override_settings(DJFILTERS={'IN_LIST_STRATEGY': strategy}):
+                run = timed(ids)
+                try:
+                    run()
+                except DatabaseError as exc:
+                    print('  {strategy}: {exc}'.format(strategy=strategy, exc=exc))
+                    continue
+                rows.append((strategy, measure(run, number=3 if size > 1000 else 20, repeat=3)))
+        report('{vendor}, {size} ids'.format(vendor=connection.vendor, size=size), rows)
+    if connection.vendor == 'sqlite':
+        connection.close()
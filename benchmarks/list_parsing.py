@@ -0,0 +1,49 @@
+"""
+Reading 1,000,000 element `ListField` query values, separated and as a JSON
+array, with `str.split()` / `json.loads()` of the whole value as the
+baseline, and with the field's parser without a limit, with duplicates
+removed and with `max_length=1000`.
+"""
+import json
+
+from benchmarks.utils import measure, report, setup
+
+setup()
+
+from django.http import QueryDict  # noqa: E402
+
+from djfilters import filters  # noqa: E402
+
+SIZE = 1000000
+
+
+def field(**kwargs):
+    class ListFilter(filters.Filter):
+        ids = filters.ListField(child=filters.IntegerField(), **kwargs)
+    return ListFilter().fields['ids']
+
+
+FIELDS = (
+    ('all items', field()),
+    ('unique', field(unique=True)),
+    ('max_length=1000', field(max_length=1000)),
+    ('unique, max_length=1000', field(max_length=1000, unique=True)),
+)
+
+
+if __name__ == '__main__':
+    values = {
+        'separated': ','.join(str(index % (SIZE // 2)) for index in range(SIZE)),
+        'JSON': json.dumps([index % (SIZE // 2) for index in range(SIZE)]),
+    }
+    for name, raw in values.items():
+        data = QueryDict(mutable=True)
+        data['ids'] = raw
+        if name == 'JSON':
+            baseline = lambda: json.loads(raw.strip())  # noqa: E731
+        else:
+            baseline = lambda: raw.strip().split(',')  # noqa: E731
+        rows = [('strip() and split() / json.loads()', measure(baseline, number=1, repeat=3))]
+        for label, list_field in FIELDS:
+            rows.append((label, measure(lambda: list_field.get_value(data), number=1, repeat=3)))
+        report('{name}, {size} items ({length} characters)'.format(name=name, size=SIZE, length=len(raw)), rows)
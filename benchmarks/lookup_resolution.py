@@ -0,0 +1,74 @@
+"""
+Resolution of the ORM lookups of fields filtering through deep relations
+(up to 3 foreign keys): resolving and validating the lookups of a filter
+on every use vs once per filter class and model, and the cost of `filter()`
+with the resolved lookup as keyword arguments vs as a lookup expression.
+"""
+from benchmarks.utils import measure, report, setup
+
+setup()
+
+from django.db import models  # noqa: E402
+from django.db.models import ExpressionWrapper, F  # noqa: E402
+
+from djfilters.filters import plan  # noqa: E402
+
+
+def make_model(name, parent=None):
+    attrs = {
+        '__module__': 'tests.models',
+        'Meta': type('Meta', (), {'app_label': 'tests', 'managed': False}),
+        'name': models.CharField(max_length=100),
+    }
+    if parent is not None:
+        attrs['parent'] = models.ForeignKey(parent, on_delete=models.CASCADE)
+    return type(name, (models.Model,), attrs)
+
+
+Country = make_model('DeepCountry')
+City = make_model('DeepCity', Country)
+Street = make_model('DeepStreet', City)
+House = make_model('DeepHouse', Street)
+
+LOOKUPS = [
+    'name__icontains',
+    'parent__name__iexact',
+    'parent__parent__name__startswith',
+    'parent__parent__parent__name__icontains',
+]
+DEEP_LOOKUP = LOOKUPS[-1]
+queryset = House.objects.all()
+
+
+def resolve_every_time():
+    for lookup in LOOKUPS:
+        plan._resolve_lookup(House, lookup)
+
+
+def resolve_once():
+    for lookup in LOOKUPS:
+        plan.resolve_lookup(House, lookup)
+
+
+resolved = plan.resolve_lookup(House, DEEP_LOOKUP)
+lookup_class = resolved.field.get_lookup(resolved.lookups[-1])
+column = '__'.join(resolved.path)
+
+
+def filter_kwargs():
+    return queryset.filter(**{DEEP_LOOKUP: 'a'})
+
+
+def filter_expression():
+    return queryset.filter(lookup_class(ExpressionWrapper(F(column), output_field=resolved.field), 'a'))
+
+
+if __name__ == '__main__':
+    report('resolve the lookups of 4 fields, up to 3 relations deep', [
+        ('resolved on every use', measure(resolve_every_time, number=500)),
+        ('resolved once per class and model', measure(resolve_once, number=500)),
+    ])
+    report('filter() on a 3 relation path', [
+        ('keyword arguments', measure(filter_kwargs, number=500)),
+        ('lookup expression', measure(filter_expression, number=500)),
+    ])
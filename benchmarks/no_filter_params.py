@@ -0,0 +1,47 @@
+"""
+Per-request cost of `DjFilterBackend.filter_queryset` for a request without
+any filter parameter (only pagination), with and without the passthrough.
+"""
+from benchmarks.utils import measure, report, setup
+
+setup()
+
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from djfilters import filters  # noqa: E402
+from djfilters.backend import DjFilterBackend  # noqa: E402
+from tests.models import TextModel  # noqa: E402
+
+
+class TextModelFilter(filters.ModelFilter):
+    class Meta:
+        model = TextModel
+        fields = '__all__'
+
+
+class View(object):
+    filter_class = TextModelFilter
+
+
+class FullBackend(DjFilterBackend):
+    # Overriding `get_filterset_kwargs` disables the passthrough.
+    def get_filterset_kwargs(self, request, queryset, view):
+        return super(FullBackend, self).get_filterset_kwargs(request, queryset, view)
+
+
+request = Request(APIRequestFactory().get('/', {'page': 2}))
+queryset = TextModel.objects.all()
+
+
+def timed(backend):
+    def run():
+        return backend.filter_queryset(request, queryset, View)
+    return run
+
+
+if __name__ == '__main__':
+    report('filter_queryset without filter parameters', [
+        ('full validation and filtering', measure(timed(FullBackend()), number=500)),
+        ('passthrough', measure(timed(DjFilterBackend()), number=500)),
+    ])
@@ -0,0 +1,55 @@
+"""
+Time to generate the OpenAPI parameters of 200 views, each with its own
+`ModelFilter` on a 20 field model: instantiating every filter class and
+describing its fields on every schema generation vs the parameters memoized
+per filter class.
+"""
+from benchmarks.utils import make_wide_model, measure, report, setup
+
+setup()
+
+from rest_framework.views import APIView  # noqa: E402
+
+from djfilters import filters  # noqa: E402
+from djfilters.backend import DjFilterBackend  # noqa: E402
+
+WideModel = make_wide_model('SchemaWideModel', 20)
+
+
+class UncachedBackend(DjFilterBackend):
+    def get_schema_operation_parameters(self, view):
+        filterset_class = self.get_filterset_class(view)
+        if filterset_class is None:
+            return []
+        parameters = []
+        for field_name, field in filterset_class().get_fields().items():
+            parameters.append({
+                'name': field_name,
+                'required': bool(field.required),
+                'in': 'query',
+                'description': self._field_description(field, field_name),
+                'schema': self._openapi_schema_for(field),
+            })
+        return parameters
+
+
+def make_view(index):
+    meta = type('Meta', (), {'model': WideModel, 'fields': '__all__'})
+    filter_class = type('WideFilter%d' % index, (filters.ModelFilter,), {'Meta': meta})
+    return type('View%d' % index, (APIView,), {'filter_class': filter_class})()
+
+
+views = [make_view(index) for index in range(200)]
+
+
+def timed(backend):
+    def run():
+        return [backend.get_schema_operation_parameters(view) for view in views]
+    return run
+
+
+if __name__ == '__main__':
+    report('OpenAPI parameters of 200 views, 20 fields each', [
+        ('instantiated per generation', measure(timed(UncachedBackend()), number=5)),
+        ('memoized per filter class', measure(timed(DjFilterBackend()), number=5)),
+    ])
@@ -0,0 +1,88 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Benchmarks are run from the repository root, e.g.::
+
+    python -m benchmarks.model_filter_fields
+"""
+import os
+import timeit
+
+import django
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.test_settings')
+    django.setup()
+
+
+def make_wide_model(name='WideModel', count=60, fields=None):
+    """
+    Create an unmanaged model with `count` char fields, plus the model
+    fields of the `fields` dict, used to simulate filters on large models
+    without touching the database.
+    """
+    from django.db import models
+
+    attrs = {
+        '__module__': 'tests.models',
+        'Meta': type('Meta', (), {'app_label': 'tests', 'managed': False}),
+    }
+    for index in range(count):
+        attrs['field_%d' % index] = models.CharField(max_length=100)
+    attrs.update(fields or {})
+    return type(name, (models.Model,), attrs)
+
+
+def wide_text_fields():
+    """
+    Return the model fields filtered by the non-generic fields of the wide
+    filters of the plan benchmarks: `char`, `int_fk` and `slug_fk`.
+    """
+    from django.db import models
+
+    from tests.models import RelatedIntIdModel, RelatedSlugIdModel
+
+    return {
+        'char': models.CharField(max_length=100),
+        'int_fk': models.ForeignKey(RelatedIntIdModel, null=True, on_delete=models.SET_NULL, related_name='+'),
+        'slug_fk': models.ForeignKey(RelatedSlugIdModel, null=True, on_delete=models.SET_NULL, related_name='+'),
+    }
+
+
+class NullQuerySet(object):
+    """
+    Queryset stand-in whose methods do nothing, used to measure the work of
+    the filters without the cost of the ORM.
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+    def all(self):
+        return self
+
+    def filter(self, *args, **kwargs):
+        return self
+
+    exclude = distinct = filter
+
+
+def measure(func, number=1000, repeat=5):
+    """
+    Return the best per-call time of `func` in microseconds.
+    """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def report(title, rows):
+    """
+    Print `(label, microseconds)` rows along with the speed-up of every row
+    relative to the first one.
+    """
+    print(title)
+    baseline = rows[0][1]
+    for label, value in rows:
+        print('  {label:<40} {value:>10.1f} us  x{ratio:.2f}'.format(
+            label=label, value=value, ratio=baseline / value if value else 0
+        ))
@@ -2,7 +2,22 @@
 from __future__ import unicode_literals
 
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 
 class DjfiltersConfig(AppConfig):
     name = 'djfilters'
+
+    def ready(self):
+        from . import checks  # noqa: F401
+        from .cache import connect_signals
+        from .registry import registry
+        from .settings import filter_settings
+
+        if filter_settings.RELATED_CACHE or filter_settings.VALIDATION_CACHE:
+            connect_signals()
+        if filter_settings.PRECOMPILE:
+            # Filter classes are usually declared in the `filters` module of
+            # their app, which may not be imported until the first request.
+            autodiscover_modules('filters')
+            registry.precompile()
@@ -1,9 +1,16 @@
 from __future__ import absolute_import
 
+import json
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from django.core.exceptions import ImproperlyConfigured
 from rest_framework import serializers
-from rest_framework.renderers import HTMLFormRenderer
 
 from . import compat, filters
+from .registry import registry
+from .renderers import FilterFormRenderer
+from .settings import filter_settings
 
 _OPENAPI_TYPE_MAP = {
     filters.IntegerField: ('integer', None),
@@ -16,13 +23,50 @@ _OPENAPI_TYPE_MAP = {
     filters.DurationField: ('string', 'duration'),
     filters.EmailField: ('string', 'email'),
     filters.URLField: ('string', 'uri'),
+    filters.UUIDField: ('string', 'uuid'),
     filters.PrimaryKeyRelatedField: ('integer', None),
 }
 
+# Renderers of filter forms, by class.
+_form_renderers = {}
+
+# Components of the schema files of the `SCHEMA_FILE` setting, by path.
+_static_schemas = {}
+
+
+def _openapi_type_for(field_class):
+    """
+    Return the `(type, format)` of the closest class of `field_class` in
+    `_OPENAPI_TYPE_MAP`, following its MRO.
+    """
+    for cls in field_class.__mro__:
+        mapped = _OPENAPI_TYPE_MAP.get(cls)
+        if mapped is not None:
+            return mapped
+    return 'string', None
+
+
+def _copy_schema(value):
+    """
+    Copy the dicts and lists of an OpenAPI schema, which is faster than
+    `copy.deepcopy()` for such plain values.
+    """
+    if isinstance(value, dict):
+        return {key: _copy_schema(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_schema(item) for item in value]
+    return value
+
 
 class DjFilterBackend(object):
+    form_renderer_class = FilterFormRenderer
 
     def filter_queryset(self, request, queryset, view):
+        passthrough = self.get_passthrough(request, view)
+        if passthrough is not None:
+            request.cleaned_args = OrderedDict(passthrough)
+            return queryset
+
         filterset = self.get_filterset(request, queryset, view)
         if filterset is None:
             return queryset
@@ -34,19 +78,66 @@ class DjFilterBackend(object):
             return queryset
         return filterset.filter(filterset.validated_data)
 
+    def get_passthrough(self, request, view):
+        """
+        Return the validated data of the request if it doesn't supply any
+        input of the filter class and filtering without input is a no-op, in
+        which case the queryset is returned untouched without instantiating
+        the filter. Return `None` otherwise.
+        """
+        backend = type(self)
+        if (backend.get_filterset is not DjFilterBackend.get_filterset or
+                backend.get_filterset_kwargs is not DjFilterBackend.get_filterset_kwargs):
+            return None
+        filterset_class = self.get_filterset_class(view)
+        if filterset_class is None:
+            return None
+        passthrough = filterset_class.get_passthrough()
+        if passthrough is None:
+            return None
+        names, validated_data = passthrough
+        data = self.get_filter_data(request, view)
+        if not isinstance(data, Mapping):
+            return None
+        for key in data:
+            # `ids[0]=...` style list keys are supported by list fields.
+            if key in names or key.split('[', 1)[0] in names:
+                return None
+        return validated_data
+
     def get_filterset_class(self, view):
         """
         Return the `FilterSet` class used to filter the queryset.
         """
         return getattr(view, 'filter_class', None)
 
+    def reads_body(self, view, method):
+        """
+        Whether the filter input of `view` for requests with `method` is the
+        request body: the action of the view, or the lowercase method for
+        views without actions, is one of the view's `filter_body_actions`.
+        """
+        actions = getattr(view, 'filter_body_actions', None)
+        if not actions:
+            return False
+        return (getattr(view, 'action', None) or method.lower()) in actions
+
+    def get_filter_data(self, request, view):
+        """
+        Return the input of the filter for `request`: the parsed body, e.g.
+        a JSON object, when `reads_body()`, the query parameters otherwise.
+        """
+        if self.reads_body(view, request.method):
+            return request.data
+        return request.query_params
+
     def get_filterset_kwargs(self, request, queryset, view):
         context = {'request': request}
         filter_context = getattr(view, 'get_filter_context', None)
         if filter_context:
             context.update(filter_context())
         return {
-            'data': request.query_params,
+            'data': self.get_filter_data(request, view),
             'queryset': queryset,
             'context': context,
         }
@@ -60,20 +151,25 @@ class DjFilterBackend(object):
         )
 
     def to_html(self, request, queryset, view):
-        filter_class = self.get_filterset(request, queryset, view)
-        filter_class.is_valid()
-        form_renderer = HTMLFormRenderer()
-        form_renderer.default_style.mapping[filters.BooleanField] = {
-            'base_template': 'checkbox.html'
-        }
-        form_renderer.default_style.mapping[filters.ListField] = {
-            'base_template': 'textarea.html'
-        }
-        return form_renderer.render(
-            filter_class.data, {},
+        filterset = self.get_filterset(request, queryset, view)
+        if filterset is None:
+            return None
+        filterset.is_valid()
+        return self.get_form_renderer().render(
+            filterset.data, {},
             {'style': {'template_pack': 'djfilters/vertical'}}
         )
 
+    def get_form_renderer(self):
+        """
+        Return the renderer of filter forms, created once per renderer
+        class.
+        """
+        renderer = _form_renderers.get(self.form_renderer_class)
+        if renderer is None:
+            renderer = _form_renderers[self.form_renderer_class] = self.form_renderer_class()
+        return renderer
+
     def get_coreschema_field(self, field):
         help_text = str(field.extra.get('help_text', ''))
         extra_kwargs = {}
@@ -116,6 +212,9 @@ class DjFilterBackend(object):
         if filterset_class is None:
             return []
 
+        return list(self.get_cached_schema(filterset_class, 'coreapi', self.build_schema_fields))
+
+    def build_schema_fields(self, filterset_class):
         return [
             compat.coreapi.Field(
                 name=field_name,
@@ -123,16 +222,80 @@ class DjFilterBackend(object):
                 description=field.help_text,
                 location='query',
                 schema=self.get_coreschema_field(field)
-            ) for field_name, field in filterset_class().get_fields().items()
+            ) for field_name, field in filterset_class.get_unbound_fields().items()
         ]
 
     def get_schema_operation_parameters(self, view):
         filterset_class = self.get_filterset_class(view)
         if filterset_class is None:
             return []
+        parameters = self.get_static_schema(filterset_class)
+        if parameters is None:
+            parameters = self.get_cached_schema(filterset_class, 'openapi', self.build_schema_operation_parameters)
+        return _copy_schema(parameters)
+
+    def get_schema_component_name(self, filterset_class):
+        """
+        Return the name of the OpenAPI parameters of `filterset_class` in
+        the files written by the `export_filter_schemas` command, its import
+        path, or `None` if the class can't be imported by its path and so
+        can't be told apart from other classes with the same path.
+        """
+        return filterset_class.get_import_path()
+
+    def get_static_schema(self, filterset_class):
+        """
+        Return the OpenAPI parameters of `filterset_class` exported to the
+        file of the `SCHEMA_FILE` setting, or `None` when the setting isn't
+        set or the file doesn't describe the class.
+        """
+        path = filter_settings.SCHEMA_FILE
+        if path is None:
+            return None
+        components = _static_schemas.get(path)
+        if components is None:
+            try:
+                with open(path) as schema_file:
+                    components = json.load(schema_file)['components']
+            except (OSError, ValueError, KeyError) as exc:
+                raise ImproperlyConfigured(
+                    "Can't load the filter schemas of the 'SCHEMA_FILE' setting from '{path}': {exc}. "
+                    "Export them with `manage.py export_filter_schemas`.".format(path=path, exc=exc)
+                )
+            _static_schemas[path] = components
+        name = self.get_schema_component_name(filterset_class)
+        return components.get(name) if name is not None else None
+
+    def get_cached_schema(self, filterset_class, kind, build):
+        """
+        Return the `kind` schema of `filterset_class` built by
+        `build(filterset_class)`, memoized per filter class and backend
+        class. See `clear_schema_cache()`.
+        """
+        cache = filterset_class.get_compiled().setdefault('schema', {})
+        key = (type(self), kind)
+        if key not in cache:
+            cache[key] = build(filterset_class)
+        return cache[key]
+
+    @classmethod
+    def clear_schema_cache(cls):
+        """
+        Drop the schemas memoized for every filter class, e.g. in tests that
+        patch the fields of a filter or the schema methods of a backend. The
+        schemas of a class are also dropped along with the rest of its
+        compiled state by `invalidate_compiled()`. Schema files of the
+        `SCHEMA_FILE` setting are read again on their next use.
+        """
+        _static_schemas.clear()
+        for filter_class in registry:
+            compiled = filter_class.__dict__.get('_compiled')
+            if compiled is not None:
+                compiled.pop('schema', None)
 
+    def build_schema_operation_parameters(self, filterset_class):
         parameters = []
-        for field_name, field in filterset_class().get_fields().items():
+        for field_name, field in filterset_class.get_unbound_fields().items():
             parameter = {
                 'name': field_name,
                 'required': bool(field.required),
@@ -160,11 +323,7 @@ class DjFilterBackend(object):
                 schema['maxItems'] = 2
             return schema
 
-        otype, fmt = 'string', None
-        for cls, (mapped_type, mapped_fmt) in _OPENAPI_TYPE_MAP.items():
-            if isinstance(field, cls):
-                otype, fmt = mapped_type, mapped_fmt
-                break
+        otype, fmt = _openapi_type_for(type(field))
 
         schema = {'type': otype}
         if fmt:
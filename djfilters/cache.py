@@ -0,0 +1,413 @@
+"""
+Caches used by dj-rest-filters to avoid repeating validation work.
+
+The cache of related objects validated by the related filter fields is
+enabled with the `RELATED_CACHE` setting and the cache of validation results
+of filters with the `VALIDATION_CACHE` setting:
+
+DJFILTERS = {
+    'RELATED_CACHE': {'MAXSIZE': 1024, 'TTL': 300},
+    'VALIDATION_CACHE': {'MAXSIZE': 512},
+}
+
+Filter plans specialized per set of active fields are kept in a process-local
+LRU configured by the `PLAN_CACHE` setting, enabled by default.
+
+`BACKEND` selects the cache implementation, `LocalCache` (the default) keeps
+entries in the memory of the process and `DjangoCache` stores them in one of
+the caches configured in Django's `CACHES` setting, shared by every process:
+
+DJFILTERS = {
+    'RELATED_CACHE': {
+        'BACKEND': 'djfilters.cache.DjangoCache',
+        'ALIAS': 'default',
+        'TTL': 300,
+    },
+}
+
+The other keys are passed, lower-cased, to the backend's constructor.
+
+Entries are kept per namespace, e.g. per related model or filter class, and
+a namespace is dropped at once with `invalidate()`. Related objects, and the
+validation results of filters having related fields, are invalidated
+whenever an instance of the related model is saved or deleted. Changes that
+don't send signals (`update()`, `bulk_create()`, raw SQL) are picked up once
+the TTL expires.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import import_string
+
+from .settings import filter_settings
+
+
+class BaseCache(object):
+    """
+    Interface of the cache backends. Keys are hashable values, typically
+    tuples, and are only unique within a namespace.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def get_many(self, namespace, keys):
+        """
+        Return a dict of the values found in `namespace` for `keys`.
+        """
+        raise NotImplementedError
+
+    def set_many(self, namespace, values):
+        """
+        Store the `{key: value}` dict `values` in `namespace`.
+        """
+        raise NotImplementedError
+
+    def invalidate(self, namespace):
+        """
+        Drop every entry of `namespace`.
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def get(self, namespace, key):
+        return self.get_many(namespace, [key]).get(key)
+
+    def set(self, namespace, key, value):
+        self.set_many(namespace, {key: value})
+
+    def count(self, namespace, hits, misses):
+        with self.lock:
+            counters = self.counters.setdefault(namespace, {'hits': 0, 'misses': 0})
+            counters['hits'] += hits
+            counters['misses'] += misses
+
+    def stats(self):
+        """
+        Return the hit/miss counters of this process, per namespace and in
+        total.
+        """
+        with self.lock:
+            namespaces = {
+                namespace: dict(counters)
+                for namespace, counters in self.counters.items()
+            }
+        return {'namespaces': namespaces, 'total': self._total(namespaces)}
+
+    def _total(self, namespaces):
+        total = {}
+        for counters in namespaces.values():
+            for counter, value in counters.items():
+                if counter != 'maxsize':
+                    total[counter] = total.get(counter, 0) + value
+        return total
+
+
+class LocalLRU(object):
+    """
+    Bounded LRU of `key -> value` for one namespace.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key, now):
+        entry = self.entries.get(key)
+        if entry is None or (entry[1] is not None and entry[1] < now):
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key, value, now):
+        self.entries[key] = (value, now + self.ttl if self.ttl else None)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+
+class LocalCache(BaseCache):
+    """
+    Process-local cache, a bounded LRU per namespace.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None):
+        super(LocalCache, self).__init__()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.namespaces = {}
+
+    def get_many(self, namespace, keys):
+        now = time.monotonic()
+        found = {}
+        with self.lock:
+            lru = self._get_lru(namespace)
+            for key in keys:
+                value = lru.get(key, now)
+                if value is not None:
+                    found[key] = value
+        self.count(namespace, len(found), len(keys) - len(found))
+        return found
+
+    def get(self, namespace, key):
+        now = time.monotonic()
+        with self.lock:
+            value = self._get_lru(namespace).get(key, now)
+        hit = value is not None
+        self.count(namespace, int(hit), int(not hit))
+        return value
+
+    def set_many(self, namespace, values):
+        now = time.monotonic()
+        with self.lock:
+            lru = self._get_lru(namespace)
+            for key, value in values.items():
+                lru.set(key, value, now)
+
+    def invalidate(self, namespace):
+        with self.lock:
+            for name in (namespace,) + tuple(_dependents.get(namespace, ())):
+                lru = self.namespaces.get(name)
+                if lru is not None:
+                    lru.entries.clear()
+
+    def clear(self):
+        with self.lock:
+            self.namespaces.clear()
+            self.counters.clear()
+
+    def stats(self):
+        stats = super(LocalCache, self).stats()
+        with self.lock:
+            for namespace, lru in self.namespaces.items():
+                counters = stats['namespaces'].setdefault(namespace, {'hits': 0, 'misses': 0})
+                counters.update(evictions=lru.evictions, size=len(lru.entries), maxsize=lru.maxsize)
+        stats['total'] = self._total(stats['namespaces'])
+        return stats
+
+    def _get_lru(self, namespace):
+        lru = self.namespaces.get(namespace)
+        if lru is None:
+            lru = self.namespaces[namespace] = LocalLRU(self.maxsize, self.ttl)
+        return lru
+
+
+class DjangoCache(BaseCache):
+    """
+    Cache stored in one of the caches of Django's `CACHES` setting, shared
+    by every process using that cache. Reads and writes of several keys are
+    batched with `get_many()`/`set_many()`.
+
+    Every namespace has a version token stored along with its entries,
+    invalidating a namespace replaces the token so that entries written
+    with the previous one are ignored. Entries of a namespace depending on
+    others, see `register_dependent()`, are stored with their tokens too,
+    so that invalidating one of them from any process is enough.
+    """
+
+    def __init__(self, alias=DEFAULT_CACHE_ALIAS, ttl=None, key_prefix='djfilters'):
+        super(DjangoCache, self).__init__()
+        self.alias = alias
+        self.ttl = DEFAULT_TIMEOUT if ttl is None else ttl
+        self.key_prefix = key_prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, namespace, key):
+        digest = hashlib.sha256(repr(key).encode('utf-8')).hexdigest()
+        return '{prefix}:{namespace}:{digest}'.format(prefix=self.key_prefix, namespace=namespace, digest=digest)
+
+    def version_key(self, namespace):
+        return '{prefix}:{namespace}:version'.format(prefix=self.key_prefix, namespace=namespace)
+
+    def version_keys(self, namespace):
+        return [self.version_key(name) for name in (namespace,) + _dependencies.get(namespace, ())]
+
+    def get_many(self, namespace, keys):
+        cache_keys = {self.make_key(namespace, key): key for key in keys}
+        version_keys = self.version_keys(namespace)
+        values = self.cache.get_many(version_keys + list(cache_keys))
+        version = tuple(values.pop(version_key, None) for version_key in version_keys)
+        found = {}
+        if None not in version:
+            for cache_key, (entry_version, value) in values.items():
+                if entry_version == version:
+                    found[cache_keys[cache_key]] = value
+        self.count(namespace, len(found), len(keys) - len(found))
+        return found
+
+    def set_many(self, namespace, values):
+        version = self.get_version(namespace)
+        self.cache.set_many({
+            self.make_key(namespace, key): (version, value)
+            for key, value in values.items()
+        }, timeout=self.ttl)
+
+    def get_version(self, namespace):
+        """
+        Return the version tokens of `namespace` and of the namespaces it
+        depends on, creating the missing ones.
+        """
+        versions = []
+        for version_key in self.version_keys(namespace):
+            version = self.cache.get(version_key)
+            if version is None:
+                self.cache.add(version_key, uuid.uuid4().hex, timeout=None)
+                version = self.cache.get(version_key)
+            versions.append(version)
+        return tuple(versions)
+
+    def invalidate(self, namespace):
+        self.cache.set(self.version_key(namespace), uuid.uuid4().hex, timeout=None)
+
+    def clear(self):
+        """
+        Drop the entries of every namespace used by this process.
+        """
+        with self.lock:
+            namespaces = list(self.counters)
+            self.counters.clear()
+        for namespace in namespaces:
+            self.invalidate(namespace)
+
+
+def build_cache(config, backend=None):
+    """
+    Instantiate the cache backend described by a cache setting dict, or
+    `backend` if given.
+    """
+    config = dict(config)
+    path = config.pop('BACKEND', 'djfilters.cache.LocalCache')
+    if backend is None:
+        backend = import_string(path)
+    return backend(**{key.lower(): value for key, value in config.items()})
+
+
+_caches = {}
+
+
+def get_cache(setting, backend=None):
+    """
+    Return the process-wide cache configured by the `setting` dj-rest-filters
+    setting, or `None` if it is not set. `backend` forces the cache class.
+    """
+    config = getattr(filter_settings, setting)
+    if not config:
+        return None
+    cache, cache_config = _caches.get(setting, (None, None))
+    if cache is None or config != cache_config:
+        cache = build_cache(config, backend)
+        _caches[setting] = (cache, dict(config))
+    return cache
+
+
+def get_related_cache():
+    """
+    Return the cache of related objects, or `None` if the `RELATED_CACHE`
+    setting is not set.
+    """
+    return get_cache('RELATED_CACHE')
+
+
+def get_validation_cache():
+    """
+    Return the cache of validation results, or `None` if the
+    `VALIDATION_CACHE` setting is not set.
+    """
+    return get_cache('VALIDATION_CACHE')
+
+
+def get_plan_cache():
+    """
+    Return the cache of filter plans specialized per signature, or `None`
+    if the `PLAN_CACHE` setting is disabled. Plans hold functions and are
+    only meaningful in the current process, so it is always a `LocalCache`.
+    """
+    return get_cache('PLAN_CACHE', LocalCache)
+
+
+def cacheable(queryset):
+    """
+    Whether objects found through `queryset` can be cached per model, i.e.
+    the queryset is not restricted to a subset of the model's rows.
+    """
+    query = queryset.query
+    return not (query.where or query.combinator or query.is_sliced or query.distinct_fields)
+
+
+def model_namespace(model):
+    """
+    Return the namespace invalidated when an instance of `model` is saved or
+    deleted. Proxy models share the rows, and so the namespace, of their
+    concrete model.
+    """
+    return model._meta.concrete_model._meta.label
+
+
+def related_namespace(model):
+    """
+    Return the cache namespace of the objects of `model`, making sure it is
+    invalidated when an instance of the model is saved or deleted.
+    """
+    connect_signals()
+    return model_namespace(model)
+
+
+def register_dependent(model, namespace):
+    """
+    Invalidate the validation cache `namespace` whenever an instance of
+    `model` is saved or deleted, in this process or, with a shared cache,
+    in any other.
+    """
+    connect_signals()
+    label = model_namespace(model)
+    _dependents.setdefault(label, set()).add(namespace)
+    dependencies = _dependencies.get(namespace, ())
+    if label not in dependencies:
+        _dependencies[namespace] = dependencies + (label,)
+
+
+def _invalidate(sender, **kwargs):
+    # Every model is invalidated, as other processes may have cached its
+    # objects without this one knowing.
+    namespace = model_namespace(sender)
+    for cache in (get_related_cache(), get_validation_cache()):
+        if cache is not None:
+            cache.invalidate(namespace)
+
+
+# Namespaces of the validation cache by model namespace, and the other way
+# around.
+_dependents = {}
+_dependencies = {}
+_connected = False
+
+
+def connect_signals():
+    """
+    Connect the receivers invalidating the caches on saves and deletes.
+    Done when Django starts if a cache setting is set, so that processes
+    that never use a filter, e.g. task workers, invalidate shared caches.
+    """
+    global _connected
+    if _connected:
+        return
+    # Connected for every sender, as saving or deleting through a proxy model
+    # (or the concrete model of a proxy) sends signals for that model only.
+    post_save.connect(_invalidate, weak=False, dispatch_uid='djfilters-cache')
+    post_delete.connect(_invalidate, weak=False, dispatch_uid='djfilters-cache')
+    _connected = True
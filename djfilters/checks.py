@@ -0,0 +1,81 @@
+from django.apps import apps
+from django.core import checks
+from django.core.exceptions import FieldError
+
+from .filters.plan import build_entry
+from .registry import registry
+from .settings import filter_settings
+
+
+@checks.register('djfilters')
+def check_filters(app_configs=None, **kwargs):
+    """
+    Warn about the ORM lookups of the fields of every registered filter
+    class that don't apply to its `Meta.model`, and, with the `PRECOMPILE`
+    setting, check that the class can be compiled.
+    """
+    errors = []
+    for filter_class in registry:
+        if app_configs is not None:
+            app_config = apps.get_containing_app_config(filter_class.__module__)
+            if app_config not in app_configs:
+                continue
+        errors.extend(check_filter(filter_class))
+    return errors
+
+
+def check_filter(filter_class):
+    label = '{module}.{name}'.format(module=filter_class.__module__, name=filter_class.__qualname__)
+    model = filter_class.get_model()
+    try:
+        instance = filter_class(queryset=model._default_manager.all() if model is not None else [])
+    except Exception as exc:
+        # A warning, as the filter may need the context of a request, e.g.
+        # `self.context['request']`, to be instantiated.
+        return [instance_warning(label, filter_class, exc)]
+    try:
+        fields = instance.fields
+    except Exception as exc:
+        if filter_settings.PRECOMPILE:
+            return [compile_error(label, filter_class, exc)]
+        return [instance_warning(label, filter_class, exc)]
+    errors = []
+    if model is not None:
+        for name, field in fields.items():
+            try:
+                build_entry(filter_class, name, field, model, strict=True)
+            except FieldError as exc:
+                key = field.source if field.source == name else field.source.split('.')[0]
+                # A warning, as the field may filter an annotation of the
+                # querysets the filter is used with.
+                errors.append(checks.Warning(
+                    str(exc),
+                    hint="Fix the 'source' or 'lookup_expr' of the field, or define a 'filter_{key}()' method.".format(
+                        key=key
+                    ),
+                    obj=filter_class,
+                    id='djfilters.W001',
+                ))
+    if filter_settings.PRECOMPILE:
+        try:
+            filter_class.precompile()
+        except Exception as exc:
+            errors.append(compile_error(label, filter_class, exc))
+    return errors
+
+
+def compile_error(label, filter_class, exc):
+    return checks.Error(
+        '{label} could not be compiled: {exc}'.format(label=label, exc=exc),
+        obj=filter_class,
+        id='djfilters.E001',
+    )
+
+
+def instance_warning(label, filter_class, exc):
+    return checks.Warning(
+        '{label} could not be instantiated to be checked: {exc!r}'.format(label=label, exc=exc),
+        hint='Its fields are checked when it is first used.',
+        obj=filter_class,
+        id='djfilters.W002',
+    )
@@ -10,3 +10,22 @@ try:
     import coreschema
 except ImportError:
     coreschema = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from rest_framework.fields import set_value
+except ImportError:
+    # DRF 3.15+ only has `Serializer.set_value()`.
+    def set_value(dictionary, keys, value):
+        if not keys:
+            dictionary.update(value)
+            return
+        for key in keys[:-1]:
+            if key not in dictionary:
+                dictionary[key] = {}
+            dictionary = dictionary[key]
+        dictionary[keys[-1]] = value
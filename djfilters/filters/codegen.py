@@ -0,0 +1,205 @@
+"""
+Generation of the functions used by filters declared with `codegen`.
+
+The validation and filtering of such a filter class are done by plain
+functions generated from the source of the class' exact field list and
+filter plan, the way `dataclasses` generates `__init__`: every field has its
+own unrolled block, converters, hooks, lookups and filter methods are
+resolved at generation time, so no loop over the fields nor dispatch on
+their kind is left for each request.
+
+The generated source is registered with `linecache` so that tracebacks and
+`inspect.getsource()` show it, e.g.
+
+    print(inspect.getsource(ProductFilter.get_generated_validation()))
+"""
+import inspect
+import keyword
+import linecache
+from collections import OrderedDict
+from itertools import count
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import EMPTY_VALUES
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import SkipField, empty, get_error_detail
+
+from ..compat import set_value
+from .fields import get_nested_value
+from .plan import combine
+from .validation import FALLBACK_ERRORS, convert_generic
+
+_counter = count()
+
+
+class Generator(object):
+    """
+    Source of one generated function, along with the objects it refers to.
+    """
+
+    def __init__(self, name, signature):
+        self.name = name
+        self.lines = ['def {name}({signature}):'.format(name=name, signature=signature)]
+        self.namespace = {
+            'OrderedDict': OrderedDict,
+            'ValidationError': ValidationError,
+            'DjangoValidationError': DjangoValidationError,
+            'SkipField': SkipField,
+            'EMPTY_VALUES': EMPTY_VALUES,
+            'FALLBACK_ERRORS': FALLBACK_ERRORS,
+            'empty': empty,
+            'get_error_detail': get_error_detail,
+            'set_value': set_value,
+            'get_nested_value': get_nested_value,
+            'combine': combine,
+        }
+
+    def add(self, line, indent=1):
+        self.lines.append('    ' * indent + line)
+
+    def ref(self, prefix, obj):
+        """
+        Return the name under which the generated code refers to `obj`.
+        """
+        name = '{prefix}_{index}'.format(prefix=prefix, index=len(self.namespace))
+        self.namespace[name] = obj
+        return name
+
+    @property
+    def source(self):
+        return '\n'.join(self.lines) + '\n'
+
+    def build(self, filter_class):
+        filename = '<djfilters generated {module}.{name} {index}>'.format(
+            module=filter_class.__module__, name=filter_class.__qualname__, index=next(_counter)
+        )
+        source = self.source
+        exec(compile(source, filename, 'exec'), self.namespace)
+        linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+        function = self.namespace[self.name]
+        function.__qualname__ = '{name}.{function}'.format(name=filter_class.__qualname__, function=self.name)
+        return function
+
+
+def kwargs_source(lookup, value):
+    if lookup.isidentifier() and not keyword.iskeyword(lookup):
+        return '{lookup}={value}'.format(lookup=lookup, value=value)
+    return '**{{{lookup!r}: {value}}}'.format(lookup=lookup, value=value)
+
+
+def generate_validation(filter_class, specs):
+    """
+    Return the function `to_internal_value(filter, data)` validating the
+    mapping `data` for the `FieldSpec`s of `filter_class`, like
+    `Filter.to_internal_value()` with `fast_validation`.
+    """
+    gen = Generator('to_internal_value', 'self, data')
+    gen.add("keys = {key.split('[', 1)[0] for key in data}")
+    gen.add('ret = OrderedDict()')
+    gen.add('errors = OrderedDict()')
+    for spec in specs:
+        field = spec.field
+        gen.add('# {name}: {cls}'.format(name=spec.name, cls=type(field).__name__))
+        indent = 1
+        if spec.optional:
+            gen.add('if {name!r} in keys:'.format(name=spec.name))
+            indent = 2
+        if spec.shared:
+            field_ref = gen.ref('field', field)
+        else:
+            field_ref = 'field'
+            gen.add('field = self.fields[{name!r}]'.format(name=spec.name), indent)
+        gen.add('primitive = {field}.get_value(data)'.format(field=field_ref), indent)
+        gen.add('try:', indent)
+        body = indent + 1
+        if spec.converter is None:
+            gen.add('value = {field}.run_validation(primitive)'.format(field=field_ref), body)
+        else:
+            convert_ref = gen.ref('convert', spec.converter)
+            gen.add('if primitive is empty or primitive is None:', body)
+            gen.add('value = {field}.run_validation(primitive)'.format(field=field_ref), body + 1)
+            gen.add('else:', body)
+            if spec.converter is convert_generic:
+                gen.add('value = {convert}({field}, primitive)'.format(convert=convert_ref, field=field_ref), body + 1)
+                validators = body + 1
+            else:
+                gen.add('try:', body + 1)
+                gen.add('value = {convert}({field}, primitive)'.format(convert=convert_ref, field=field_ref), body + 2)
+                gen.add('except FALLBACK_ERRORS:', body + 1)
+                gen.add('value = {field}.run_validation(primitive)'.format(field=field_ref), body + 2)
+                validators = body + 2
+                if not spec.shared or field.validators:
+                    gen.add('else:', body + 1)
+            # Values validated by `run_validation()` already went through
+            # the validators.
+            if not spec.shared:
+                gen.add('if {field}.validators:'.format(field=field_ref), validators)
+                gen.add('{field}.run_validators(value)'.format(field=field_ref), validators + 1)
+            elif field.validators:
+                gen.add('{field}.run_validators(value)'.format(field=field_ref), validators)
+        if hasattr(filter_class, 'validate_' + spec.name):
+            gen.add('value = self.validate_{name}(value)'.format(name=spec.name), body)
+        gen.add('except ValidationError as exc:', indent)
+        gen.add('errors[{name!r}] = exc.detail'.format(name=spec.name), body)
+        gen.add('except DjangoValidationError as exc:', indent)
+        gen.add('errors[{name!r}] = get_error_detail(exc)'.format(name=spec.name), body)
+        gen.add('except SkipField:', indent)
+        gen.add('pass', body)
+        gen.add('else:', indent)
+        if len(spec.source_attrs) == 1:
+            gen.add('ret[{key!r}] = value'.format(key=spec.source_attrs[0]), body)
+        else:
+            gen.add('set_value(ret, {attrs!r}, value)'.format(attrs=list(spec.source_attrs)), body)
+    gen.add('if errors:')
+    gen.add('raise ValidationError(errors)', 2)
+    gen.add('return ret')
+    return gen.build(filter_class)
+
+
+def generate_filter(filter_class, plan, combine_lookups=False):
+    """
+    Return the function `filter(filter, qs, validated_data)` applying the
+    entries of `plan` to `qs`, like `Filter.filter()`.
+    """
+    gen = Generator('filter', 'self, qs, validated_data')
+    chained = []
+    if combine_lookups:
+        gen.add('active = []')
+        for entry in plan:
+            if entry.lookup is None or entry.multivalued:
+                chained.append(entry)
+                continue
+            gen.add('# {name}'.format(name=entry.name))
+            gen.add('value = validated_data.get({key!r})'.format(key=entry.key))
+            gen.add('if value not in EMPTY_VALUES:')
+            gen.add('active.append(({entry}, value))'.format(entry=gen.ref('entry', entry)), 2)
+        gen.add('qs = combine(qs, active)')
+    else:
+        chained = plan
+    for entry in chained:
+        gen.add('# {name}'.format(name=entry.name))
+        gen.add('value = validated_data.get({key!r})'.format(key=entry.key))
+        if entry.method is None and entry.lookup is None:
+            # The field filters the queryset itself, even without a value.
+            gen.add('qs = self.fields[{name!r}].filter(qs, value)'.format(name=entry.name))
+            continue
+        gen.add('if value not in EMPTY_VALUES:')
+        if entry.method is not None:
+            method = gen.ref('method', entry.method)
+            if inspect.isfunction(entry.method):
+                gen.add('qs = {method}(self, qs, value)'.format(method=method), 2)
+            else:
+                gen.add('qs = {method}.__get__(self, type(self))(qs, value)'.format(method=method), 2)
+            continue
+        if entry.distinct:
+            gen.add('qs = qs.distinct()', 2)
+        if entry.parts is not None:
+            gen.add('value = get_nested_value({parts!r}, value)'.format(parts=entry.parts), 2)
+        method = 'exclude' if entry.exclude else 'filter'
+        if isinstance(entry.lookup, tuple):
+            kwargs = '**dict(zip({lookup!r}, value))'.format(lookup=entry.lookup)
+        else:
+            kwargs = kwargs_source(entry.lookup, 'value')
+        gen.add('qs = qs.{method}({kwargs})'.format(method=method, kwargs=kwargs), 2)
+    gen.add('return qs')
+    return gen.build(filter_class)
@@ -1,6 +1,11 @@
 from __future__ import unicode_literals
 
+import re
+
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.validators import EMPTY_VALUES
+from django.db.models import Model
+from rest_framework.exceptions import ValidationError
 from rest_framework.fields import CharField as RestCharField
 from rest_framework.fields import ChoiceField as RestChoiceField
 from rest_framework.fields import DateField as RestDateField
@@ -15,11 +20,20 @@ from rest_framework.fields import ListField as RestListField
 from rest_framework.fields import SlugField as RestSlugField
 from rest_framework.fields import TimeField as RestTimeField
 from rest_framework.fields import URLField as RestURLField
-from rest_framework.fields import empty
+from rest_framework.fields import UUIDField as RestUUIDField
+from rest_framework.fields import empty, get_error_detail
 from rest_framework.relations import \
     PrimaryKeyRelatedField as RestPrimaryKeyRelatedField
+from rest_framework.relations import RelatedField as RestRelatedField
 from rest_framework.relations import SlugRelatedField as RestSlugRelatedField
-from rest_framework.utils import json
+from rest_framework.settings import api_settings
+from rest_framework.utils import html, json
+
+from ..cache import cacheable, get_related_cache, related_namespace
+from ..settings import filter_settings
+from .dateparse import (FAST_DATES, FAST_DATETIMES, FAST_TIMES, parse_iso_date,
+                        parse_iso_datetime, parse_iso_time, reads_iso)
+from .parsing import collect, iter_json_array, iter_separated, strip_bounds
 
 try:
     from rest_framework.fields import NullBooleanField as RestNullBooleanField
@@ -27,6 +41,35 @@ except ImportError:
     # For Django Rest >= 3.14
     from rest_framework.fields import BooleanField as RestNullBooleanField
 
+# `<first>-<last>` run of consecutive integers in a list.
+RUN_RE = re.compile(r'^\s*(-?\d+)\s*-\s*(-?\d+)\s*$')
+
+
+def get_nested_value(parts, value):
+    """
+    Get nested value from a dictionary
+    """
+    field_ptr = 1
+    while isinstance(value, dict) and field_ptr < len(parts):
+        value = value.get(parts[field_ptr])
+        field_ptr += 1
+    return value
+
+
+def validates_in_bulk(field):
+    """
+    Whether the items of a list of `field` values can be checked for
+    existence with a single query, i.e. `field` is a primary key related
+    field that doesn't customize how a single value is validated.
+    """
+    cls = type(field)
+    return (
+        isinstance(field, RestPrimaryKeyRelatedField) and
+        not getattr(field, 'trusts_ids', False) and
+        cls.to_internal_value in (RestPrimaryKeyRelatedField.to_internal_value, PrimaryKeyRelatedField.to_internal_value) and
+        cls.run_validation is RestRelatedField.run_validation
+    )
+
 
 class FilterField(object):
 
@@ -47,31 +90,33 @@ class FilterField(object):
         return qs
 
     def make_query(self, qs, value):
-        field_name = self.field_name
-        if field_name != self.source:
-            field_name = self.source
-            if '.' in field_name:
-                parts = field_name.split('.')
-                value = self.get_nested_value(parts, value)
-                if parts[-1] == 'id':
-                    field_name = '{}_{}'.format('__'.join(parts[:-1]), 'id')
-                else:
-                    field_name = '__'.join(parts)
+        path, parts = self.get_query_path()
+        if parts is not None:
+            value = self.get_nested_value(parts, value)
         qs = self.get_method(qs)(**{'%s__%s' % (
-            field_name,
+            path,
             self.lookup_expr
         ): value})
         return qs
 
+    def get_query_path(self):
+        """
+        Return the ORM path this field filters on, along with the parts of a
+        dotted `source` used to pick the nested value (`None` if not nested).
+        """
+        source = self.source
+        if self.field_name == source or '.' not in source:
+            return source, None
+        parts = source.split('.')
+        if parts[-1] == 'id':
+            return '{}_{}'.format('__'.join(parts[:-1]), 'id'), parts
+        return '__'.join(parts), parts
+
     def get_nested_value(self, parts, value):
         """
         Get nested value from a dictionary
         """
-        field_ptr = 1
-        while isinstance(value, dict) and field_ptr < len(parts):
-            value = value.get(parts[field_ptr])
-            field_ptr += 1
-        return value
+        return get_nested_value(parts, value)
 
     def get_method(self, qs):
         """Return filter method based on whether we're excluding
@@ -144,12 +189,127 @@ class FilterField(object):
             self.source_attrs = self.source.split('.')
 
 
-class PrimaryKeyRelatedField(FilterField, RestPrimaryKeyRelatedField):
-    pass
+class RelatedFieldMixin(object):
+    """
+    Validation shortcuts for related fields.
+
+    * With `trust_ids=True` (or the `TRUST_RELATED_IDS` setting) only the
+      format of the value is validated and the value itself, instead of the
+      related object, ends up in the validated data and in the ORM lookup.
+      An id that doesn't exist simply filters out every row.
+    * Otherwise, when the `RELATED_CACHE` setting is enabled, related objects
+      are looked up in the related object cache before hitting the database.
+      Pass `use_cache=False` to always query the database.
+    * The browsable API suggests at most `html_cutoff` related objects (the
+      `HTML_CUTOFF` setting by default).
+    """
+    # Name of the lookup identifying the related object in cache keys.
+    lookup_name = None
+
+    def __init__(self, trust_ids=None, use_cache=True, **kwargs):
+        if trust_ids is None:
+            trust_ids = filter_settings.TRUST_RELATED_IDS
+        self.trusts_ids = trust_ids
+        self.use_cache = use_cache
+        kwargs.setdefault('html_cutoff', filter_settings.HTML_CUTOFF)
+        super(RelatedFieldMixin, self).__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if self.trusts_ids:
+            try:
+                return self.to_lookup_value(data)
+            except (TypeError, ValueError, DjangoValidationError):
+                self.fail_lookup_value(data)
+
+        queryset = self.get_queryset()
+        cache = self.get_related_cache(queryset)
+        if cache is None:
+            return super(RelatedFieldMixin, self).to_internal_value(data)
+        try:
+            key = (self.lookup_name, self.to_lookup_value(data))
+            obj = cache.get(related_namespace(queryset.model), key)
+        except (TypeError, ValueError, DjangoValidationError):
+            # Let the field report the error.
+            key = obj = None
+        if obj is None:
+            obj = super(RelatedFieldMixin, self).to_internal_value(data)
+            if key is not None:
+                cache.set(related_namespace(queryset.model), key, obj)
+        return obj
+
+    def to_representation(self, value):
+        # With `trust_ids`, validated data holds the value itself.
+        if self.trusts_ids and not isinstance(value, Model):
+            return value
+        return super(RelatedFieldMixin, self).to_representation(value)
+
+    def to_lookup_value(self, data):
+        """
+        Convert `data` to the value of the model field identifying the
+        related object, raising `TypeError`/`ValueError` or Django's
+        `ValidationError` when it has the wrong format.
+        """
+        if isinstance(data, bool):
+            raise TypeError
+        return self.get_lookup_field().to_python(data)
 
+    def get_lookup_field(self):
+        """
+        Return the model field identifying the related object.
+        """
+        raise NotImplementedError
 
-class SlugRelatedField(FilterField, RestSlugRelatedField):
-    pass
+    def fail_lookup_value(self, data):
+        raise NotImplementedError
+
+    def get_related_cache(self, queryset):
+        """
+        Return the cache of related objects to use with `queryset`, if any.
+        """
+        if not self.use_cache:
+            return None
+        cache = get_related_cache()
+        if cache is None or not cacheable(queryset):
+            return None
+        return cache
+
+
+class PrimaryKeyRelatedField(RelatedFieldMixin, FilterField, RestPrimaryKeyRelatedField):
+    lookup_name = 'pk'
+
+    def to_lookup_value(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        return super(PrimaryKeyRelatedField, self).to_lookup_value(data)
+
+    def get_lookup_field(self):
+        return self.get_queryset().model._meta.pk
+
+    def fail_lookup_value(self, data):
+        self.fail('incorrect_type', data_type=type(data).__name__)
+
+
+class SlugRelatedField(RelatedFieldMixin, FilterField, RestSlugRelatedField):
+
+    @property
+    def lookup_name(self):
+        return self.slug_field
+
+    def get_query_path(self):
+        path, parts = super(SlugRelatedField, self).get_query_path()
+        if self.trusts_ids:
+            path = '%s__%s' % (path, self.slug_field)
+        return path, parts
+
+    def get_lookup_field(self):
+        opts = self.get_queryset().model._meta
+        *relations, slug_field = self.slug_field.split('__')
+        for relation in relations:
+            opts = opts.get_field(relation).related_model._meta
+        return opts.get_field(slug_field)
+
+    def fail_lookup_value(self, data):
+        self.fail('invalid')
 
 
 class BooleanField(FilterField, RestNullBooleanField):
@@ -188,19 +348,76 @@ class DecimalField(FilterField, RestDecimalField):
     pass
 
 
-class DateTimeField(FilterField, RestDateTimeField):
-    pass
+class IsoInputMixin(object):
+    """
+    Parse ISO 8601 strings with `fromisoformat()` when ISO 8601 is the first
+    input format, leaving other values to the DRF field. Fields keep DRF's
+    `to_internal_value()` on the versions of Django and Python where it
+    isn't slower.
+    """
+    # Name of the DRF setting of the default input formats.
+    input_formats_setting = None
+
+    def to_internal_value(self, value):
+        if type(value) is str and reads_iso(self.get_input_formats()):
+            parsed = self.parse_iso(value)
+            if parsed is not None:
+                return parsed
+        return super(IsoInputMixin, self).to_internal_value(value)
+
+    def get_input_formats(self):
+        input_formats = getattr(self, 'input_formats', None)
+        if input_formats is None:
+            input_formats = getattr(api_settings, self.input_formats_setting)
+        return input_formats
+
+    def parse_iso(self, value):
+        """
+        Return the internal value of the ISO 8601 string `value`, or `None`
+        to let the DRF field parse it.
+        """
+        raise NotImplementedError
+
+
+class DateTimeField(IsoInputMixin, FilterField, RestDateTimeField):
+    input_formats_setting = 'DATETIME_INPUT_FORMATS'
+    if not FAST_DATETIMES:
+        to_internal_value = RestDateTimeField.to_internal_value
+
+    def parse_iso(self, value):
+        parsed = parse_iso_datetime(value)
+        if parsed is None:
+            return None
+        try:
+            return self.enforce_timezone(parsed)
+        except (ValueError, TypeError, ValidationError):
+            # Reported by DRF, or skipped for the next input format.
+            return None
 
 
 class DurationField(FilterField, RestDurationField):
     pass
 
 
-class DateField(FilterField, RestDateField):
-    pass
+class DateField(IsoInputMixin, FilterField, RestDateField):
+    input_formats_setting = 'DATE_INPUT_FORMATS'
+    if not FAST_DATES:
+        to_internal_value = RestDateField.to_internal_value
+
+    def parse_iso(self, value):
+        return parse_iso_date(value)
+
+
+class TimeField(IsoInputMixin, FilterField, RestTimeField):
+    input_formats_setting = 'TIME_INPUT_FORMATS'
+    if not FAST_TIMES:
+        to_internal_value = RestTimeField.to_internal_value
+
+    def parse_iso(self, value):
+        return parse_iso_time(value)
 
 
-class TimeField(FilterField, RestTimeField):
+class UUIDField(FilterField, RestUUIDField):
     pass
 
 
@@ -209,29 +426,183 @@ class ChoiceField(FilterField, RestChoiceField):
 
 
 class ListField(FilterField, RestListField):
+    # Maximum number of values the runs of a list without `max_length` can
+    # expand to.
+    MAX_RUN_LENGTH = 100000
 
-    def __init__(self, separator=',', lookup_expr='in', *args, **kwargs):
+    def __init__(self, separator=',', lookup_expr='in', compress_runs=False, unique=False, *args, **kwargs):
         self.separator = separator
+        self.compress_runs = compress_runs
+        self.unique = unique
         super(ListField, self).__init__(lookup_expr=lookup_expr, *args, **kwargs)
+        assert not compress_runs or isinstance(self.child, (RestIntegerField, RestPrimaryKeyRelatedField)), (
+            '`compress_runs` requires an `IntegerField` or `PrimaryKeyRelatedField` child.'
+        )
+
+    def get_query_path(self):
+        path, parts = super(ListField, self).get_query_path()
+        # Trusted slugs are compared with the slug field of the related model.
+        if isinstance(self.child, SlugRelatedField) and self.child.trusts_ids:
+            path = '%s__%s' % (path, self.child.slug_field)
+        return path, parts
 
     def get_value(self, dictionary):
         value = super(ListField, self).get_value(dictionary)
-        if isinstance(value, list) and len(value) == 1 and isinstance(value[0], str):
-            parsed = self._parse_string(value[0])
-            if parsed is not None:
-                value = parsed
+        if html.is_html_input(dictionary):
+            if isinstance(value, list) and len(value) == 1 and isinstance(value[0], str):
+                parsed = self._parse_string(value[0])
+                if parsed is not None:
+                    return parsed
+        elif isinstance(value, str):
+            # Lists of other inputs, e.g. a JSON body, are used as they are,
+            # strings are split as in query strings.
+            parsed = self._parse_string(value)
+            return parsed if parsed is not None else [value]
+        if isinstance(value, list) and (self.unique or self.max_length is not None):
+            value = collect(value, self.get_parse_limit(), self.unique)
         return value
 
+    def get_parse_limit(self):
+        """
+        Return the number of items after which parsing a value stops, enough
+        for `max_length` to reject the value, or `None` for no limit.
+        """
+        return self.max_length + 1 if self.max_length is not None else None
+
     def _parse_string(self, raw):
-        stripped = raw.strip()
-        if stripped.startswith('[') and stripped.endswith(']'):
+        """
+        Return the items of the string value `raw`, a JSON array or a list
+        of values joined with the separator, or `None` if it is neither.
+        """
+        start, end = strip_bounds(raw)
+        limit = self.get_parse_limit()
+        if raw.startswith('[', start) and raw.endswith(']', start, end):
             try:
-                return json.loads(stripped)
+                if limit is None:
+                    items = json.loads(raw[start:end])
+                else:
+                    items = iter_json_array(raw, start, end)
+                return collect(items, limit, self.unique)
             except ValueError:
                 return None
-        if self.separator in stripped:
-            return stripped.split(self.separator)
-        return None
+        if raw.find(self.separator, start, end) < 0:
+            return None
+        if limit is None:
+            items = raw[start:end].split(self.separator)
+            return list(dict.fromkeys(items)) if self.unique else items
+        return collect(iter_separated(raw, self.separator, start, end), limit, self.unique)
+
+    def to_internal_value(self, data):
+        if self.compress_runs and isinstance(data, list):
+            data = self.expand_runs(data)
+        return super(ListField, self).to_internal_value(data)
+
+    def expand_runs(self, data):
+        """
+        Replace the `<first>-<last>` runs of `data` with the integers from
+        `first` to `last`, failing if the list would grow beyond `max_length`
+        (or `MAX_RUN_LENGTH`) values.
+        """
+        runs = {}
+        length = len(data)
+        for idx, item in enumerate(data):
+            match = RUN_RE.match(item) if isinstance(item, str) else None
+            if match is not None:
+                first, last = int(match.group(1)), int(match.group(2))
+                if first <= last:
+                    runs[idx] = (first, last)
+                    length += last - first
+        if not runs:
+            return data
+        max_length = self.max_length if self.max_length is not None else self.MAX_RUN_LENGTH
+        if length > max_length:
+            self.fail('max_length', max_length=max_length)
+        result = []
+        for idx, item in enumerate(data):
+            if idx in runs:
+                first, last = runs[idx]
+                result.extend(range(first, last + 1))
+            else:
+                result.append(item)
+        return result
+
+    def run_child_validation(self, data):
+        if validates_in_bulk(self.child):
+            return self.run_related_child_validation(data)
+        # The validation engine depends on the fields.
+        from .validation import FALLBACK_ERRORS, validate_batch
+        try:
+            return validate_batch(self.child, data)
+        except FALLBACK_ERRORS:
+            return super(ListField, self).run_child_validation(data)
+
+    def run_related_child_validation(self, data):
+        """
+        Validate a list of primary keys with one `pk__in` query instead of
+        one query per item. Errors are reported per index, the same way
+        `run_child_validation` does.
+        """
+        child = self.child
+        queryset = child.get_queryset()
+        model_pk = queryset.model._meta.pk
+        result = [None] * len(data)
+        errors = {}
+        pending = {}
+
+        for idx, item in enumerate(data):
+            try:
+                # Relational fields treat empty strings as `None`.
+                is_empty_value, item = child.validate_empty_values(None if item == '' else item)
+                if is_empty_value:
+                    result[idx] = item
+                    continue
+                if child.pk_field is not None:
+                    item = child.pk_field.to_internal_value(item)
+                try:
+                    if isinstance(item, bool):
+                        raise TypeError
+                    pending[idx] = (item, model_pk.get_prep_value(item))
+                except (TypeError, ValueError):
+                    child.fail('incorrect_type', data_type=type(item).__name__)
+            except ValidationError as e:
+                errors[idx] = e.detail
+            except DjangoValidationError as e:
+                errors[idx] = get_error_detail(e)
+
+        if pending:
+            objects = self.get_related_objects(queryset, {pk for item, pk in pending.values()})
+            for idx, (item, pk) in pending.items():
+                try:
+                    if pk not in objects:
+                        child.fail('does_not_exist', pk_value=item)
+                    result[idx] = objects[pk]
+                    child.run_validators(result[idx])
+                except ValidationError as e:
+                    errors[idx] = e.detail
+                except DjangoValidationError as e:
+                    errors[idx] = get_error_detail(e)
+
+        if not errors:
+            return result
+        raise ValidationError(dict(sorted(errors.items())))
+
+    def get_related_objects(self, queryset, pks):
+        """
+        Return a `{pk: object}` dict of the objects of `queryset` among `pks`,
+        using the child's related cache when there is one.
+        """
+        get_cache = getattr(self.child, 'get_related_cache', None)
+        cache = get_cache(queryset) if get_cache is not None else None
+        if cache is None:
+            return queryset.in_bulk(pks)
+        namespace = related_namespace(queryset.model)
+        objects = {key[1]: obj for key, obj in cache.get_many(namespace, [('pk', pk) for pk in pks]).items()}
+        missing = pks.difference(objects)
+        if missing:
+            found = queryset.in_bulk(missing)
+            cache.set_many(namespace, {('pk', pk): obj for pk, obj in found.items()})
+            objects.update(found)
+        return objects
 
 
 class RangeField(ListField):
@@ -244,11 +615,9 @@ class RangeField(ListField):
         if isinstance(self.lookup_expr, str):
             return super(RangeField, self).make_query(qs, value)
         else:
+            path, _ = self.get_query_path()
             filters = {}
             for lookup, val in zip(self.lookup_expr, value):
-                filters['%s__%s' % (
-                    self.field_name if self.field_name == self.source else self.source,
-                    lookup
-                )] = val
+                filters['%s__%s' % (path, lookup)] = val
             qs = self.get_method(qs)(**filters)
             return qs
@@ -1,24 +1,115 @@
 import copy
+import itertools
+import sys
 from collections import OrderedDict
+from collections.abc import Mapping
 
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.validators import EMPTY_VALUES
 from django.db import models
 from django.db.models import DurationField as ModelDurationField
+from django.http import QueryDict
 from django.utils.functional import cached_property
+from rest_framework.fields import SkipField, get_error_detail
 from rest_framework.serializers import ValidationError  # noqa: F401
 from rest_framework.serializers import (ALL_FIELDS, ModelSerializer,
                                         Serializer, SerializerMetaclass, empty)
 from rest_framework.settings import api_settings
-from rest_framework.utils import model_meta
+from rest_framework.utils import html, model_meta
 
+from ..cache import get_plan_cache, get_validation_cache, register_dependent
+from ..compat import set_value
+from ..registry import registry
+from ..settings import filter_settings
+from .codegen import generate_filter, generate_validation
 from .fields import (BooleanField, CharField, ChoiceField, DateField,
                      DateTimeField, DecimalField, DurationField, EmailField,
                      FloatField, IntegerField, IPAddressField, ListField,
-                     PrimaryKeyRelatedField, SlugField, SlugRelatedField,
-                     TimeField, URLField)
+                     PrimaryKeyRelatedField, RelatedFieldMixin, SlugField,
+                     SlugRelatedField, TimeField, URLField)
+from .plan import build_plan, build_signature_plan, combine, plan_signature
+from .validation import FieldSpec, get_converter, is_optional, validate_value
+
+# Methods whose overrides may make a filter do something without any input.
+_INPUT_DRIVEN_METHODS = (
+    '__init__', 'get_fields', 'is_valid', 'run_validation', 'to_internal_value', 'validate',
+    'filter', 'filter_combined', 'apply_entry',
+)
+
+# `Meta` options whose values affect the fields a filter class compiles to.
+_META_OPTIONS = ('model', 'fields', 'exclude', 'depth', 'extra_kwargs', 'read_only_fields')
+
+# Numbers telling apart the cache namespaces of classes with the same path.
+_class_numbers = itertools.count(1)
+
+
+def _meta_fingerprint(meta):
+    """
+    Snapshot the `Meta` options of a filter class so that in-place changes
+    (e.g. `Meta.fields = [...]` or editing `Meta.extra_kwargs`) can be detected.
+    """
+    if meta is None:
+        return None
+    snapshot = [meta]
+    for option in _META_OPTIONS:
+        value = getattr(meta, option, None)
+        if isinstance(value, dict):
+            value = {
+                key: dict(val) if isinstance(val, dict) else val
+                for key, val in value.items()
+            }
+        elif isinstance(value, list):
+            value = tuple(value)
+        snapshot.append(value)
+    return tuple(snapshot)
+
+
+def _freeze(value):
+    """
+    Turn a filter input value into a hashable value usable in cache keys.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(val)) for key, val in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(val) for val in value)
+    return value
+
+
+def _copy_containers(value):
+    """
+    Copy the dicts and lists of cached validated data, so that changing the
+    validated data of one request doesn't change the cached entry. Other
+    values, e.g. related model instances, are shared.
+    """
+    if isinstance(value, dict):
+        return type(value)((key, _copy_containers(val)) for key, val in value.items())
+    if isinstance(value, list):
+        return [_copy_containers(val) for val in value]
+    return value
 
 
 class Filter(Serializer, metaclass=SerializerMetaclass):
+    # Apply the lookups of all active fields with one `filter()` call instead
+    # of chaining a `filter()` per field.
+    combine_lookups = False
+    # Reuse the validation results of identical inputs when the
+    # `VALIDATION_CACHE` setting is enabled. Set to `False` on filters whose
+    # validation depends on the context, the request or the current time.
+    cache_validation = True
+    # Only bind the fields whose input is supplied, plus the required and
+    # defaulted ones, instead of every field of the class.
+    sparse_fields = False
+    # Validate with converters compiled once per class instead of going
+    # through DRF's `run_validation()` for every field.
+    fast_validation = False
+    # Validate and filter with functions generated from the source of the
+    # exact fields of the class, see `djfilters.filters.codegen`.
+    codegen = False
+
+    def __init_subclass__(cls, **kwargs):
+        super(Filter, cls).__init_subclass__(**kwargs)
+        registry.register(cls)
+
     def __init__(self, instance=None, data=empty, queryset=None, **kwargs):
         if queryset is None and hasattr(self, 'Meta'):
             queryset = getattr(self, 'Meta').model._default_manager.all()
@@ -26,6 +117,187 @@ class Filter(Serializer, metaclass=SerializerMetaclass):
         self.request = kwargs.pop('request', None)
         super(Filter, self).__init__(instance, data, **kwargs)
 
+    @classmethod
+    def get_compiled(cls):
+        """
+        Return the per-class dict of compiled filter state. It is shared by
+        every instance of the class and rebuilt whenever the declared fields,
+        the `Meta` options of the class or the `DJFILTERS` settings change.
+        """
+        fingerprint = (
+            cls._declared_fields,
+            _meta_fingerprint(getattr(cls, 'Meta', None)),
+            filter_settings.user_settings
+        )
+        compiled = cls.__dict__.get('_compiled')
+        if compiled is None or compiled['fingerprint'] != fingerprint:
+            compiled = {'fingerprint': fingerprint}
+            cls._compiled = compiled
+        return compiled
+
+    @classmethod
+    def get_cache_namespace(cls):
+        """
+        Return the namespace of the entries of this filter class in the
+        validation and plan caches: its import path, or, for classes that
+        can't be imported by that path, e.g. classes made by a factory
+        function, the path followed by a number unique to the class.
+        """
+        compiled = cls.get_compiled()
+        namespace = compiled.get('namespace')
+        if namespace is None:
+            namespace = cls.get_import_path()
+            if namespace is None:
+                namespace = '{module}.{name}#{number}'.format(
+                    module=cls.__module__, name=cls.__qualname__, number=next(_class_numbers)
+                )
+            compiled['namespace'] = namespace
+        return namespace
+
+    @classmethod
+    def get_import_path(cls):
+        """
+        Return the import path of this filter class, or `None` if the class
+        can't be imported by it, e.g. a class made by a factory function,
+        which shares its path with the other classes of the factory.
+        """
+        path = '{module}.{name}'.format(module=cls.__module__, name=cls.__qualname__)
+        obj = sys.modules.get(cls.__module__)
+        for name in cls.__qualname__.split('.'):
+            obj = getattr(obj, name, None)
+        return path if obj is cls else None
+
+    @classmethod
+    def invalidate_compiled(cls):
+        """
+        Drop the compiled state of this filter class, forcing it to be
+        rebuilt on next use.
+        """
+        if '_compiled' in cls.__dict__:
+            del cls._compiled
+
+    @classmethod
+    def get_model(cls):
+        """
+        Return the `Meta.model` of this filter class, or `None`.
+        """
+        return getattr(getattr(cls, 'Meta', None), 'model', None)
+
+    @classmethod
+    def precompile(cls):
+        """
+        Build the compiled state of this filter class ahead of its first use:
+        its fields, field specs and generated functions, and the filter plan
+        for `Meta.model`. Return the instance used to compile it.
+        """
+        model = cls.get_model()
+        instance = cls(queryset=model._default_manager.all() if model is not None else [])
+        # Binding the fields builds the fields of a `ModelFilter` from its model.
+        instance.fields
+        cls.get_passthrough()
+        if cls.fast_validation or cls.codegen:
+            cls.get_field_specs()
+            instance.get_converters()
+        if cls.codegen:
+            cls.get_generated_validation()
+        if model is not None:
+            instance.get_filter_plan()
+            if cls.codegen:
+                instance.get_generated_filter()
+        return instance
+
+    @classmethod
+    def get_unbound_fields(cls):
+        """
+        Return the unbound fields of this filter class, as returned by
+        `get_fields()`, built once per class. They are shared and must not be
+        modified, e.g. they describe the class in API schemas.
+        """
+        compiled = cls.get_compiled()
+        if 'unbound_fields' not in compiled:
+            compiled['unbound_fields'] = cls(queryset=[]).get_fields()
+        return compiled['unbound_fields']
+
+    @classmethod
+    def get_passthrough(cls):
+        """
+        Return `(input_names, validated_data)` if validating and filtering a
+        query string that supplies none of the inputs of this filter class is
+        a no-op, `validated_data` being the result of validating it. Return
+        `None` if the filter may act without input: a field is required or
+        has a default, or the filter or its fields customize validation or
+        filtering.
+        """
+        compiled = cls.get_compiled()
+        if 'passthrough' not in compiled:
+            compiled['passthrough'] = cls.build_passthrough()
+        return compiled['passthrough']
+
+    @classmethod
+    def build_passthrough(cls):
+        for name in _INPUT_DRIVEN_METHODS:
+            if getattr(cls, name) not in (getattr(Filter, name), getattr(ModelFilter, name)):
+                return None
+        # The fields don't depend on the queryset, passing one keeps a missing
+        # `Meta.model` from failing here instead of in `get_fields()`.
+        fields = cls(queryset=[]).fields
+        for name, field in fields.items():
+            if field.required or field.default is not empty:
+                return None
+            # Fields like `BooleanField` have a value for missing form keys.
+            if field.default_empty_html is not empty and hasattr(cls, 'validate_{name}'.format(name=name)):
+                return None
+        for entry in build_plan(cls, fields):
+            if entry.method is None and entry.lookup is None:
+                return None
+        prototype = cls(queryset=[], data=QueryDict())
+        if not prototype.is_valid():
+            return None
+        validated_data = prototype.validated_data
+        if any(value not in EMPTY_VALUES for value in validated_data.values()):
+            return None
+        return frozenset(fields), validated_data
+
+    def get_fields(self):
+        return self.copy_fields(self._declared_fields)
+
+    def copy_fields(self, fields):
+        """
+        Return a copy of the unbound `fields` for this instance. With
+        `sparse_fields`, only the fields returned by `get_active_field_names()`
+        are copied.
+        """
+        data = getattr(self, 'initial_data', empty)
+        if not self.sparse_fields or not isinstance(data, Mapping):
+            return copy.deepcopy(fields)
+        names = self.get_active_field_names(fields, data)
+        memo = {}
+        return OrderedDict(
+            (name, copy.deepcopy(field, memo))
+            for name, field in fields.items() if name in names
+        )
+
+    def get_active_field_names(self, fields, data):
+        """
+        Return the names of the `fields` that can have a value for `data`:
+        fields whose name, or the root of whose `source`, is a key of `data`,
+        required and defaulted fields, and for form data the fields having a
+        value for missing keys (e.g. `BooleanField`). Fields sharing the
+        `source` root of one of them share its validated value, and so are
+        included as well.
+        """
+        keys = {key.split('[', 1)[0] for key in data}
+        html_input = html.is_html_input(data)
+        roots = {name: (field.source or name).split('.', 1)[0] for name, field in fields.items()}
+        active = {
+            name for name, field in fields.items()
+            if name in keys or roots[name] in keys or
+            field.required or field.default is not empty or
+            (html_input and field.default_empty_html is not empty)
+        }
+        active_roots = {roots[name] for name in active}
+        return {name for name in fields if roots[name] in active_roots}
+
     @cached_property
     def _writable_fields(self):
         return self._all_fields
@@ -40,28 +312,297 @@ class Filter(Serializer, metaclass=SerializerMetaclass):
             field for field in self.fields.values()
         ]
 
+    def get_filter_plan(self):
+        """
+        Return the tuple of `PlanEntry` used by `filter()`. The plan is built
+        once per filter class and reused as long as the filter has the same
+        fields, with the same lookups, and filters the same model.
+        """
+        compiled = self.get_compiled()
+        model = getattr(self.queryset, 'model', None)
+        fields = self.__dict__.get('fields')
+        specs = None
+        if fields is None:
+            specs = self.get_field_specs() if self.fast_validation or self.codegen else None
+            fields = specs[0].fields if specs is not None else self.fields
+        if specs is not None:
+            # The fields of the class don't change, their signature is only
+            # computed once.
+            signature = compiled.get('plan_signature')
+            if signature is None:
+                signature = compiled['plan_signature'] = plan_signature(fields)
+        else:
+            signature = plan_signature(fields)
+        key = (signature, model)
+        plan = compiled.get('plan')
+        if plan is None or plan[0] != key:
+            # Entries are kept per field so that filters binding different
+            # fields, e.g. with `sparse_fields` or fields changed in
+            # `__init__()`, only build the new ones.
+            entries = compiled.get('entries')
+            if entries is None or entries[0] != model:
+                entries = compiled['entries'] = (model, {})
+            plan = compiled['plan'] = (key, build_plan(type(self), fields, model, entries[1]))
+        return plan[1]
+
+    def get_signature_plan(self, plan, validated_data):
+        """
+        Return the `SignaturePlan` of `plan` for the fields having a value in
+        `validated_data`, from the `PLAN_CACHE`. Return `None` if the cache is
+        disabled or the filter class customizes how entries are applied.
+        """
+        cache = get_plan_cache()
+        if cache is None:
+            return None
+        cls = type(self)
+        if cls.apply_entry is not Filter.apply_entry or cls.filter_combined is not Filter.filter_combined:
+            return None
+        signature = frozenset(key for key, value in validated_data.items() if value not in EMPTY_VALUES)
+        # The plan itself is part of the key so that plans rebuilt after a
+        # change of the class never get stale entries.
+        key = (plan, signature, self.combine_lookups)
+        namespace = cls.get_cache_namespace()
+        signature_plan = cache.get(namespace, key)
+        if signature_plan is None:
+            signature_plan = build_signature_plan(plan, signature, self.combine_lookups)
+            cache.set(namespace, key, signature_plan)
+        return signature_plan
+
     def filter(self, validated_data):
 
         qs = self.queryset.all()
-        for name, filter_ in self.fields.items():
-            if filter_.source != name:
-                if '.' in filter_.source:
-                    name = filter_.source.split('.')[0]
-                else:
-                    name = filter_.source
-            value = validated_data.get(name)
-            filter_field = getattr(self, 'filter_{field}'.format(field=name), None)
-            if filter_field:
-                if value not in EMPTY_VALUES:
-                    qs = filter_field(qs, value)
-            else:
-                qs = filter_.filter(qs, value)
+        if self.codegen:
+            generated = self.get_generated_filter()
+            if generated is not None:
+                return generated(self, qs, validated_data)
+        plan = self.get_filter_plan()
+        signature_plan = self.get_signature_plan(plan, validated_data)
+        if signature_plan is not None:
+            return signature_plan.apply(self, qs, validated_data)
+        if self.combine_lookups:
+            return self.filter_combined(qs, plan, validated_data)
+        for entry in plan:
+            qs = self.apply_entry(qs, entry, validated_data.get(entry.key))
+        return qs
+
+    def filter_combined(self, qs, plan, validated_data):
+        """
+        Apply the lookups of all active fields with a single `filter()` and a
+        single `exclude()` call. Custom filter methods, fields with their own
+        filtering and lookups spanning multi-valued relations are chained
+        afterwards, as they are in the default mode.
+        """
+        combined = []
+        chained = []
+        for entry in plan:
+            value = validated_data.get(entry.key)
+            if entry.lookup is None or entry.multivalued:
+                chained.append((entry, value))
+            elif value not in EMPTY_VALUES:
+                combined.append((entry, value))
+        qs = combine(qs, combined)
+        for entry, value in chained:
+            qs = self.apply_entry(qs, entry, value)
         return qs
 
+    def apply_entry(self, qs, entry, value):
+        if entry.method is not None:
+            if value not in EMPTY_VALUES:
+                qs = entry.method.__get__(self, type(self))(qs, value)
+        elif entry.lookup is not None:
+            qs = entry.apply(qs, value)
+        else:
+            qs = self.fields[entry.name].filter(qs, value)
+        return qs
+
+    def run_validation(self, data=empty):
+        cache = get_validation_cache() if self.cache_validation else None
+        if cache is None or data is empty:
+            return super(Filter, self).run_validation(data)
+        namespace = self.get_validation_namespace()
+        key = self.get_validation_key(data)
+        cached = cache.get(namespace, key)
+        if cached is None:
+            try:
+                cached = (True, super(Filter, self).run_validation(data))
+            except ValidationError as exc:
+                cached = (False, exc.detail)
+            cache.set(namespace, key, cached)
+        valid, result = cached
+        if not valid:
+            raise ValidationError(result)
+        return _copy_containers(result)
+
+    def to_internal_value(self, data):
+        if self.codegen and isinstance(data, Mapping) and 'fields' not in self.__dict__ and not self.partial:
+            generated = self.get_generated_validation()
+            if generated is not None:
+                return generated(self, data)
+        if not (self.fast_validation or self.codegen) or not isinstance(data, Mapping):
+            return super(Filter, self).to_internal_value(data)
+
+        # Optional fields without a value for missing keys are skipped
+        # without calling them when their key is missing.
+        keys = {key.split('[', 1)[0] for key in data}
+        ret = OrderedDict()
+        errors = OrderedDict()
+        specs = self.get_field_specs() if 'fields' not in self.__dict__ and not self.partial else None
+        if specs is not None:
+            # Shared fields validate values without binding the fields of
+            # this instance.
+            for spec in specs[1]:
+                if spec.optional and spec.name not in keys:
+                    continue
+                field = spec.field if spec.shared else self.fields[spec.name]
+                self.validate_field(field, data, spec.converter, ret, errors)
+        else:
+            converters = self.get_converters()
+            for field in self._writable_fields:
+                converter, optional = converters[field.field_name]
+                if optional and field.field_name not in keys:
+                    continue
+                self.validate_field(field, data, converter, ret, errors)
+
+        if errors:
+            raise ValidationError(errors)
+        return ret
+
+    def validate_field(self, field, data, converter, ret, errors):
+        """
+        Validate the value of `field` in `data` with `converter`, adding it to
+        `ret` or its errors to `errors`.
+        """
+        validate_method = getattr(self, 'validate_' + field.field_name, None)
+        primitive_value = field.get_value(data)
+        try:
+            validated_value = validate_value(field, primitive_value, converter)
+            if validate_method is not None:
+                validated_value = validate_method(validated_value)
+        except ValidationError as exc:
+            errors[field.field_name] = exc.detail
+        except DjangoValidationError as exc:
+            errors[field.field_name] = get_error_detail(exc)
+        except SkipField:
+            pass
+        else:
+            set_value(ret, field.source_attrs, validated_value)
+
+    def get_converters(self):
+        """
+        Return the `{field_name: (converter, optional)}` dict used by
+        `fast_validation`, built once per filter class. `optional` fields are
+        skipped when their key is missing. See `djfilters.filters.validation`.
+        """
+        compiled = self.get_compiled()
+        converters = compiled.setdefault('converters', {})
+        for name, field in self.fields.items():
+            if name not in converters:
+                converters[name] = (get_converter(field), is_optional(field))
+        return converters
+
+    @classmethod
+    def get_field_specs(cls):
+        """
+        Return `(prototype, specs)`, the `FieldSpec` of every field of this
+        filter class along with the prototype instance their fields are bound
+        to, or `None` if the fields of the class may differ between
+        instances.
+        """
+        compiled = cls.get_compiled()
+        if 'specs' not in compiled:
+            compiled['specs'] = cls.build_field_specs()
+        return compiled['specs']
+
+    @classmethod
+    def build_field_specs(cls):
+        for name in ('__init__', 'get_fields'):
+            if getattr(cls, name) not in (getattr(Filter, name), getattr(ModelFilter, name)):
+                return None
+        prototype = cls(queryset=[])
+        return prototype, tuple(FieldSpec(field) for field in prototype.fields.values())
+
+    @classmethod
+    def get_generated_validation(cls):
+        """
+        Return the function generated to validate the input of this filter
+        class with `codegen`, or `None` if the fields of the class may differ
+        between instances or the class customizes how fields are validated.
+        """
+        compiled = cls.get_compiled()
+        if 'generated_validation' not in compiled:
+            specs = cls.get_field_specs()
+            generated = None
+            if specs is not None and not cls.sparse_fields and cls.validate_field is Filter.validate_field:
+                generated = generate_validation(cls, specs[1])
+            compiled['generated_validation'] = generated
+        return compiled['generated_validation']
+
+    def get_generated_filter(self):
+        """
+        Return the function generated to filter the queryset of this filter
+        with `codegen`, or `None` if the filter has other fields than its
+        class or the class customizes how plan entries are applied.
+        """
+        specs = self.get_field_specs()
+        if specs is None or self.sparse_fields:
+            return None
+        fields = self.__dict__.get('fields')
+        if fields is not None and fields.keys() != specs[0].fields.keys():
+            return None
+        cls = type(self)
+        if cls.apply_entry is not Filter.apply_entry or cls.filter_combined is not Filter.filter_combined:
+            return None
+        compiled = self.get_compiled()
+        generated = compiled.setdefault('generated_filters', {})
+        plan = self.get_filter_plan()
+        # Plans are built per model and lookups of the fields.
+        key = (plan, self.combine_lookups)
+        if key not in generated:
+            generated[key] = generate_filter(cls, plan, self.combine_lookups)
+        return generated[key]
+
+    def get_validation_key(self, data):
+        """
+        Return the canonical form of `data` for the fields of this filter:
+        the sorted `(field_name, value)` pairs of the supplied fields, with
+        values parsed as the fields read them (e.g. `?ids=1,2` and
+        `?ids=1&ids=2` are the same input of a `ListField`).
+        """
+        key = []
+        for field_name, field in self.fields.items():
+            value = field.get_value(data)
+            if value is not empty:
+                key.append((field_name, _freeze(value)))
+        return tuple(sorted(key))
+
+    def get_validation_namespace(self):
+        """
+        Return the validation cache namespace of this filter class,
+        registering it to be invalidated when the model of one of its related
+        fields changes.
+        """
+        compiled = self.get_compiled()
+        namespace = compiled.get('validation_namespace')
+        if namespace is None:
+            namespace = self.get_cache_namespace()
+            for field in self.fields.values():
+                for related in (field, getattr(field, 'child', None)):
+                    if (isinstance(related, RelatedFieldMixin) and not related.trusts_ids and
+                            related.queryset is not None):
+                        register_dependent(related.queryset.model, namespace)
+            compiled['validation_namespace'] = namespace
+        return namespace
+
     def run_validators(self, value):
         """
         Add read_only fields with defaults to value before running validators.
         """
+        if 'fields' not in self.__dict__ and (self.fast_validation or self.codegen):
+            # Don't bind the fields of this instance to find out that there
+            # are no validators to run.
+            specs = self.get_field_specs()
+            if specs is not None and not specs[0].validators:
+                return
         if isinstance(value, dict):
             to_validate = self._read_only_defaults()
             to_validate.update(value)
@@ -127,6 +668,20 @@ class ModelFilter(Filter, ModelSerializer):
         """
         Return the dict of field names -> field instances that should be
         used for `self.fields` when instantiating the serializer.
+
+        Building the fields from the model is done once per class, every
+        instance gets a copy of that compiled template.
+        """
+        compiled = self.get_compiled()
+        template = compiled.get('fields')
+        if template is None:
+            template = compiled['fields'] = self.build_fields()
+        return self.copy_fields(template)
+
+    def build_fields(self):
+        """
+        Build the dict of field names -> field instances from the declared
+        fields and the model fields selected in `Meta`.
         """
         if self.url_field_name is None:
             self.url_field_name = api_settings.URL_FIELD_NAME
@@ -0,0 +1,255 @@
+"""
+The `djfilters_in` lookup, used by list fields filtering with
+`lookup_expr='in'` (the default).
+
+It renders like Django's `in` lookup for short lists and switches to a
+strategy suited to the database for long ones, as picked by the
+`IN_LIST_STRATEGY` setting:
+
+* `in` - Django's `col IN (%s, %s, ...)`, one parameter per value.
+* `chunked` - `(col IN (...) OR col IN (...))` with at most
+  `CHUNK_SIZE` values per `IN`.
+* `any` - `col = ANY(%s)` on PostgreSQL, with the values in a single array
+  parameter, so the query text doesn't depend on the number of values.
+* `values` - `col IN (VALUES (%s), (%s), ...)`, a semi-join against a
+  `VALUES` table (PostgreSQL and SQLite).
+* `json` - `col IN (SELECT value FROM json_each(%s))` on SQLite with the
+  JSON1 extension, with the values in a single JSON parameter, so lists
+  aren't limited by `SQLITE_MAX_VARIABLE_NUMBER`.
+
+With `'auto'`, the default, lists of at most `IN_LIST_THRESHOLD` values use
+`in`, longer ones `any` on PostgreSQL, `json` on SQLite and `in` on other
+databases. Other strategies can be plugged in with `register_strategy()`.
+
+List fields declared with `compress_runs=True` use the `djfilters_runs`
+lookup instead, which matches runs of consecutive integers with `BETWEEN`
+and renders the remaining values with the strategy.
+"""
+import json
+
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Field, ForeignObject, IntegerField
+from django.db.models.fields.related_lookups import RelatedIn
+from django.db.models.lookups import In
+
+from ..settings import filter_settings
+
+LOOKUP_NAME = 'djfilters_in'
+RUNS_LOOKUP_NAME = 'djfilters_runs'
+
+# Maximum number of values of one `IN` of the `chunked` strategy.
+CHUNK_SIZE = 1000
+
+# Minimum number of consecutive integers matched with `BETWEEN`, which takes
+# two parameters.
+MIN_RUN_LENGTH = 3
+
+_strategies = {}
+
+
+def register_strategy(name, strategy):
+    """
+    Register `strategy` under `name`, for the `IN_LIST_STRATEGY` setting.
+
+    `strategy(connection, lhs, lhs_params, params)` returns the
+    `(sql, params)` of the condition matching the column `lhs` (SQL and
+    parameters) against the database values `params`, unique and not
+    `None`. It returns `None` to leave the list to Django's `IN`, e.g. on
+    databases it doesn't support.
+    """
+    _strategies[name] = strategy
+
+
+def in_strategy(connection, lhs, lhs_params, params):
+    max_size = connection.ops.max_in_list_size()
+    if max_size and len(params) > max_size:
+        return chunked_strategy(connection, lhs, lhs_params, params, max_size)
+    return '%s IN (%s)' % (lhs, ', '.join(['%s'] * len(params))), lhs_params + params
+
+
+def chunked_strategy(connection, lhs, lhs_params, params, size=None):
+    size = size or CHUNK_SIZE
+    sql = []
+    sql_params = []
+    for offset in range(0, len(params), size):
+        chunk = params[offset:offset + size]
+        sql.append('%s IN (%s)' % (lhs, ', '.join(['%s'] * len(chunk))))
+        sql_params.extend(lhs_params)
+        sql_params.extend(chunk)
+    return '(%s)' % ' OR '.join(sql), sql_params
+
+
+def any_strategy(connection, lhs, lhs_params, params):
+    if connection.vendor != 'postgresql':
+        return None
+    return '%s = ANY(%%s)' % lhs, lhs_params + [params]
+
+
+def values_strategy(connection, lhs, lhs_params, params):
+    if connection.vendor not in ('postgresql', 'sqlite'):
+        return None
+    return '%s IN (VALUES %s)' % (lhs, ', '.join(['(%s)'] * len(params))), lhs_params + params
+
+
+def json_strategy(connection, lhs, lhs_params, params):
+    # `json_each()` comes with the JSON1 extension, which SQLite may be built
+    # without.
+    if connection.vendor != 'sqlite' or not connection.features.supports_json_field:
+        return None
+    for param in params:
+        # Values `json_each()` gives back with the same type.
+        if isinstance(param, bool) or not isinstance(param, (int, float, str)):
+            return None
+    return '%s IN (SELECT value FROM json_each(%%s))' % lhs, lhs_params + [json.dumps(params)]
+
+
+register_strategy('in', in_strategy)
+register_strategy('chunked', chunked_strategy)
+register_strategy('any', any_strategy)
+register_strategy('values', values_strategy)
+register_strategy('json', json_strategy)
+
+
+def choose_strategy(connection, count):
+    """
+    Return the name of the strategy rendering a list of `count` values on
+    `connection`.
+    """
+    name = filter_settings.IN_LIST_STRATEGY
+    if name != 'auto':
+        return name
+    if count <= filter_settings.IN_LIST_THRESHOLD:
+        return 'in'
+    if connection.vendor == 'postgresql':
+        return 'any'
+    if connection.vendor == 'sqlite':
+        return 'json'
+    return 'in'
+
+
+def split_runs(values):
+    """
+    Split the integers `values`, unique, into the `(first, last)` runs of at
+    least `MIN_RUN_LENGTH` consecutive integers and the sorted values left.
+    Return no runs if one of `values` isn't an integer.
+    """
+    for value in values:
+        if type(value) is not int:
+            return [], values
+    runs = []
+    rest = []
+    values = sorted(values)
+    start = 0
+    for end in range(1, len(values) + 1):
+        if end < len(values) and values[end] == values[end - 1] + 1:
+            continue
+        if end - start >= MIN_RUN_LENGTH:
+            runs.append((values[start], values[end - 1]))
+        else:
+            rest.extend(values[start:end])
+        start = end
+    return runs, rest
+
+
+def is_integer_column(field):
+    # Relations are compared on the column of their target field.
+    while getattr(field, 'target_field', None) is not None and field.target_field is not field:
+        field = field.target_field
+    return isinstance(field, IntegerField)
+
+
+class InListMixin(object):
+    lookup_name = LOOKUP_NAME
+
+    def as_sql(self, compiler, connection):
+        # Subqueries, expressions and multi-column relations are left to
+        # Django.
+        if not self.rhs_is_direct_value() or len(getattr(self.lhs, 'targets', ())) > 1:
+            return super(InListMixin, self).as_sql(compiler, connection)
+        try:
+            values = list(dict.fromkeys(self.rhs))
+        except TypeError:
+            values = list(self.rhs)
+        values = [value for value in values if value is not None]
+        if not values:
+            raise EmptyResultSet
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        sqls, params = self.batch_process_rhs(compiler, connection, values)
+        if any(sql != '%s' for sql in sqls):
+            # Fields with their own placeholders are left to Django.
+            return super(InListMixin, self).as_sql(compiler, connection)
+        return self.render_list(connection, lhs, list(lhs_params), list(params))
+
+    def render_list(self, connection, lhs, lhs_params, params):
+        """
+        Return the `(sql, params)` matching `lhs` against the database values
+        `params` with the strategy of the `IN_LIST_STRATEGY` setting.
+        """
+        strategy = _strategies.get(choose_strategy(connection, len(params)))
+        if strategy is not None:
+            result = strategy(connection, lhs, lhs_params, params)
+            if result is not None:
+                return result
+        return in_strategy(connection, lhs, lhs_params, params)
+
+
+class RunListMixin(InListMixin):
+    lookup_name = RUNS_LOOKUP_NAME
+
+    def render_list(self, connection, lhs, lhs_params, params):
+        runs = []
+        if is_integer_column(self.lhs.output_field):
+            runs, params = split_runs(params)
+        if not runs:
+            return super(RunListMixin, self).render_list(connection, lhs, lhs_params, params)
+        sql = []
+        sql_params = []
+        for first, last in runs:
+            sql.append('%s BETWEEN %%s AND %%s' % lhs)
+            sql_params.extend(lhs_params)
+            sql_params.extend((first, last))
+        if params:
+            rest_sql, rest_params = super(RunListMixin, self).render_list(connection, lhs, lhs_params, params)
+            sql.append(rest_sql)
+            sql_params.extend(rest_params)
+        return '(%s)' % ' OR '.join(sql), sql_params
+
+
+class InList(InListMixin, In):
+    pass
+
+
+class RelatedInList(InListMixin, RelatedIn):
+    pass
+
+
+class RunList(RunListMixin, In):
+    pass
+
+
+class RelatedRunList(RunListMixin, RelatedIn):
+    pass
+
+
+Field.register_lookup(InList)
+Field.register_lookup(RunList)
+ForeignObject.register_lookup(RelatedInList)
+ForeignObject.register_lookup(RelatedRunList)
+
+
+def get_list_lookup(resolved, compress_runs=False):
+    """
+    Return the name of the lookup replacing the resolved `in` lookup of a
+    list field, or `None` to keep it: it isn't Django's own `in` lookup of
+    the field or `IN_LIST_STRATEGY` is `None` and runs aren't compressed.
+    """
+    if resolved.lookups != ('in',):
+        return None
+    lookup = resolved.field.get_lookup('in')
+    if lookup is not In and lookup is not RelatedIn:
+        return None
+    if compress_runs:
+        return RUNS_LOOKUP_NAME
+    if filter_settings.IN_LIST_STRATEGY is None:
+        return None
+    return LOOKUP_NAME
@@ -0,0 +1,104 @@
+"""
+Lazy tokenizers of the string values of list fields, e.g. `?ids=1,2,3` or
+`?ids=[1,2,3]`, and `collect()`, which reads the items they yield up to a
+limit, so that an overlong value is only parsed up to the limit.
+"""
+import json
+import re
+from itertools import islice
+
+from rest_framework.utils.json import strict_constant
+
+# Characters of a separated value split at once.
+WINDOW_SIZE = 1 << 16
+# Items deduplicated at once.
+BATCH_SIZE = 4096
+
+# Types of items deduplicated on their value alone.
+_plain_types = frozenset((str, int))
+
+_whitespace = re.compile(r'\s*')
+_decoder = json.JSONDecoder(parse_constant=strict_constant)
+
+
+def strip_bounds(raw):
+    """
+    Return the `(start, end)` bounds of `raw` without its surrounding
+    whitespace, without copying it as `raw.strip()` does.
+    """
+    start = _whitespace.match(raw).end()
+    end = len(raw)
+    while end > start and raw[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def iter_separated(raw, separator, start=0, end=None):
+    """
+    Yield the items of `raw[start:end]` split on `separator`, like
+    `str.split()`, splitting windows of `WINDOW_SIZE` characters at a time.
+    """
+    if end is None:
+        end = len(raw)
+    pos = start
+    while end - pos > WINDOW_SIZE:
+        cut = raw.rfind(separator, pos, pos + WINDOW_SIZE)
+        if cut < 0:
+            # An item longer than the window.
+            cut = raw.find(separator, pos + WINDOW_SIZE, end)
+            if cut < 0:
+                break
+        yield from raw[pos:cut].split(separator)
+        pos = cut + len(separator)
+    yield from raw[pos:end].split(separator)
+
+
+def iter_json_array(raw, start=0, end=None):
+    """
+    Yield the items of the JSON array `raw[start:end]` one at a time,
+    raising `ValueError` when reaching invalid JSON.
+    """
+    if end is None:
+        end = len(raw)
+    if raw[start:start + 1] != '[' or raw[end - 1:end] != ']':
+        raise ValueError('Not a JSON array.')
+    last = end - 1
+    pos = _whitespace.match(raw, start + 1).end()
+    if pos == last:
+        return
+    while True:
+        value, pos = _decoder.raw_decode(raw, pos)
+        yield value
+        pos = _whitespace.match(raw, pos).end()
+        if pos == last:
+            return
+        if pos > last or raw[pos] != ',':
+            raise ValueError('Invalid JSON array.')
+        pos = _whitespace.match(raw, pos + 1).end()
+
+
+def collect(items, limit=None, unique=False):
+    """
+    Return the list of `items`, without duplicates if `unique`, stopping at
+    `limit` items.
+    """
+    items = iter(items)
+    if not unique:
+        return list(islice(items, limit))
+    seen = {}
+    size = BATCH_SIZE if limit is None else min(BATCH_SIZE, limit)
+    while limit is None or len(seen) < limit:
+        batch = list(islice(items, size))
+        if not batch:
+            break
+        if _plain_types.issuperset(map(type, batch)):
+            seen.update(zip(batch, batch))
+        else:
+            # `1`, `1.0` and `True` are different inputs.
+            for item in batch:
+                try:
+                    seen.setdefault((item.__class__, item), item)
+                except TypeError:
+                    seen[object()] = item
+    result = list(seen.values())
+    return result if limit is None else result[:limit]
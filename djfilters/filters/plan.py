@@ -0,0 +1,402 @@
+import inspect
+import operator
+from functools import reduce
+
+from django.core.exceptions import FieldError
+from django.core.validators import EMPTY_VALUES
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.sql.query import Query
+
+from .fields import FilterField, ListField, RangeField, get_nested_value
+from .lookups import get_list_lookup
+
+# `make_query` implementations whose behaviour is fully described by a plan entry.
+_PLANNED_MAKE_QUERY = (FilterField.make_query, RangeField.make_query)
+
+
+class PlanEntry(object):
+    """
+    Everything `Filter.filter` needs to know about one field, resolved once
+    per filter class.
+
+    * `name` - name of the field on the filter.
+    * `key` - key of the field's value in the validated data.
+    * `method` - custom `filter_<key>` method of the filter class, if any.
+    * `lookup` - ORM lookup key, or a tuple of keys zipped with the value
+      for range fields declared with several lookups. `None` when the field
+      filters the queryset itself.
+    * `parts` - parts of a dotted `source` used to pick a nested value.
+    * `multivalued` - whether the lookup spans a multi-valued relation, in
+      which case it is never combined with other lookups.
+    * `resolved` - the `ResolvedLookup`s of `lookup` when the plan is built
+      for a model.
+    """
+    __slots__ = ('name', 'key', 'method', 'lookup', 'parts', 'exclude', 'distinct', 'multivalued', 'resolved')
+
+    def __init__(self, name, key, method=None, lookup=None, parts=None, exclude=False, distinct=False,
+                 multivalued=False, resolved=None):
+        self.name = name
+        self.key = key
+        self.method = method
+        self.lookup = lookup
+        self.parts = parts
+        self.exclude = exclude
+        self.distinct = distinct
+        self.multivalued = multivalued
+        self.resolved = resolved
+
+    def __repr__(self):
+        return '<PlanEntry {name}: {lookup}>'.format(
+            name=self.name,
+            lookup='filter_{key}()'.format(key=self.key) if self.method else self.lookup
+        )
+
+    def get_kwargs(self, value):
+        """
+        Return the keyword arguments passed to `filter()`/`exclude()` for `value`.
+        """
+        if self.parts is not None:
+            value = get_nested_value(self.parts, value)
+        if isinstance(self.lookup, tuple):
+            return dict(zip(self.lookup, value))
+        return {self.lookup: value}
+
+    def apply(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        if self.distinct:
+            qs = qs.distinct()
+        if self.exclude:
+            return qs.exclude(**self.get_kwargs(value))
+        return qs.filter(**self.get_kwargs(value))
+
+
+def is_planned(field):
+    """
+    Whether filtering on `field` can be done from its plan entry, i.e. its
+    class does not customize how the query is made.
+    """
+    return _is_planned_class(type(field))
+
+
+def _is_planned_class(cls):
+    return (
+        issubclass(cls, FilterField) and
+        cls.filter is FilterField.filter and
+        cls.make_query in _PLANNED_MAKE_QUERY and
+        cls.get_method is FilterField.get_method and
+        cls.get_nested_value is FilterField.get_nested_value
+    )
+
+
+class ResolvedLookup(object):
+    """
+    An ORM lookup resolved against a model, see `resolve_lookup()`.
+
+    * `lookup` - the lookup, e.g. `author__name__icontains`.
+    * `path` - names of the fields of the path, e.g. `('author', 'name')`.
+    * `field` - model field (or relation) the path ends at.
+    * `lookups` - names of the transforms and lookup applied to `field`.
+    * `multivalued` - whether the path goes through a many-to-many or
+      reverse foreign key relation.
+    """
+    __slots__ = ('lookup', 'path', 'field', 'lookups', 'multivalued')
+
+    def __init__(self, lookup, path, field, lookups, multivalued):
+        self.lookup = lookup
+        self.path = path
+        self.field = field
+        self.lookups = lookups
+        self.multivalued = multivalued
+
+    def __repr__(self):
+        return '<ResolvedLookup {lookup}>'.format(lookup=self.lookup)
+
+
+_resolved_lookups = {}
+
+
+def resolve_lookup(model, lookup):
+    """
+    Resolve the ORM `lookup` against `model` the way Django does when
+    filtering. Raise `FieldError` if a part of its path is not a field, or if
+    its lookups and transforms don't apply to the field. Results are cached
+    per model and lookup.
+    """
+    key = (model, lookup)
+    resolved = _resolved_lookups.get(key)
+    if resolved is None:
+        resolved = _resolved_lookups[key] = _resolve_lookup(model, lookup)
+    return resolved
+
+
+def _resolve_lookup(model, lookup):
+    query = Query(model)
+    lookups, parts, _ = query.solve_lookup_type(lookup)
+    path, field, _, _ = query.names_to_path(parts, model._meta)
+    lhs = field.get_col(model._meta.db_table) if hasattr(field, 'get_col') else field
+    for index, name in enumerate(lookups):
+        if index == len(lookups) - 1 and lhs.get_lookup(name) is not None:
+            break
+        transform = lhs.get_transform(name)
+        if transform is None:
+            raise FieldError("Unsupported lookup '{lookup}' for {field} of {model}.".format(
+                lookup=LOOKUP_SEP.join(lookups[index:]), field=type(field).__name__, model=model.__name__
+            ))
+        lhs = transform(lhs)
+    return ResolvedLookup(
+        lookup, tuple(parts), field, tuple(lookups),
+        multivalued=any(path_info.m2m for path_info in path)
+    )
+
+
+def resolve_entry_lookups(filter_class, name, model, lookup):
+    """
+    Resolve the lookups of the field `name` of `filter_class` against
+    `model`, failing with a `FieldError` naming the field if one of them
+    can't filter `model`.
+    """
+    resolved = []
+    for expr in (lookup if isinstance(lookup, tuple) else (lookup,)):
+        try:
+            resolved.append(resolve_lookup(model, expr))
+        except FieldError as exc:
+            raise FieldError("Field '{name}' of {filter_class} can't filter {model} on '{lookup}': {exc}".format(
+                name=name, filter_class=filter_class.__name__, model=model._meta.label, lookup=expr, exc=exc
+            ))
+    return tuple(resolved)
+
+
+def build_entry(filter_class, name, field, model=None, strict=False):
+    """
+    Return the plan entry of the bound `field` of `filter_class`, with its
+    lookups resolved against `model` if given. Lookups that can't be
+    resolved against the model, e.g. on annotations of the queryset, are
+    left to Django unless `strict`, in which case a `FieldError` is raised.
+    """
+    key = field.source
+    if key != name:
+        key = key.split('.')[0]
+    # Keep the raw attribute (function, staticmethod, ...) so that it can be
+    # bound to each filter instance with `__get__`.
+    method = inspect.getattr_static(filter_class, 'filter_{field}'.format(field=key), None)
+    if method is not None:
+        return PlanEntry(name, key, method=method)
+    if not is_planned(field):
+        return PlanEntry(name, key)
+
+    path, parts = field.get_query_path()
+    if isinstance(field.lookup_expr, str):
+        lookup = '%s__%s' % (path, field.lookup_expr)
+    else:
+        lookup = tuple('%s__%s' % (path, lookup_expr) for lookup_expr in field.lookup_expr)
+    resolved = None
+    multivalued = False
+    if model is not None:
+        try:
+            resolved = resolve_entry_lookups(filter_class, name, model, lookup)
+        except FieldError:
+            if strict:
+                raise
+            # Never combined with other lookups, as its path is unknown.
+            return PlanEntry(
+                name, key, lookup=lookup, parts=parts,
+                exclude=field.exclude, distinct=field.distinct, multivalued=True
+            )
+        list_lookup = None
+        if isinstance(field, ListField) and not isinstance(field, RangeField):
+            list_lookup = get_list_lookup(resolved[0], field.compress_runs)
+        if list_lookup is not None:
+            # Long lists are rendered with the `IN_LIST_STRATEGY` setting.
+            lookup = '%s__%s' % (path, list_lookup)
+            resolved = resolve_entry_lookups(filter_class, name, model, lookup)
+        multivalued = any(resolved_lookup.multivalued for resolved_lookup in resolved)
+    return PlanEntry(
+        name, key, lookup=lookup, parts=parts,
+        exclude=field.exclude, distinct=field.distinct,
+        multivalued=multivalued, resolved=resolved
+    )
+
+
+_PLANNED_ATTRS = operator.attrgetter('source', 'lookup_expr', 'exclude', 'distinct')
+_signature_getters = {}
+# Classes whose ORM path depends on other attributes than `_PLANNED_ATTRS`.
+_path_classes = set()
+
+
+def field_signature(field):
+    """
+    Return what the plan entry of the bound `field` depends on besides its
+    name, so that fields changed on a filter instance, e.g. their
+    `lookup_expr` in `__init__()`, get their own entry. Signatures are only
+    compared for equality, they may not be hashable.
+    """
+    cls = type(field)
+    getter = _signature_getters.get(cls)
+    if getter is None:
+        getter = _signature_getters[cls] = _signature_getter(cls)
+    return cls, getter(field)
+
+
+def _signature_getter(cls):
+    if not _is_planned_class(cls):
+        return operator.attrgetter('source')
+    if cls.get_query_path is FilterField.get_query_path:
+        return _PLANNED_ATTRS
+    _path_classes.add(cls)
+    extra = operator.attrgetter('compress_runs') if issubclass(cls, ListField) else lambda field: None
+    # The path depends on other attributes, e.g. the `slug_field` of a child.
+    return lambda field: (_PLANNED_ATTRS(field), field.get_query_path()[0], extra(field))
+
+
+def plan_signature(fields):
+    """
+    Return what the plan for the bound `fields` depends on besides the
+    filter class and model: equal signatures get the same plan. Computed
+    for every request with bound fields, so it avoids Python calls per
+    field where it can.
+    """
+    # `BindingDict` goes through `__getitem__()` for every value.
+    fields = getattr(fields, 'fields', fields)
+    values = fields.values()
+    types = list(map(type, values))
+    try:
+        attrs = list(map(_PLANNED_ATTRS, values))
+    except AttributeError:
+        # Fields that aren't `FilterField`s.
+        return list(fields), list(map(field_signature, values))
+    for cls in set(types).difference(_signature_getters):
+        _signature_getters[cls] = _signature_getter(cls)
+    extras = None
+    if not _path_classes.isdisjoint(types):
+        extras = [field_signature(field) for field in values if type(field) in _path_classes]
+    return list(fields), types, attrs, extras
+
+
+def build_plan(filter_class, fields, model=None, entries=None):
+    """
+    Return the tuple of plan entries for the bound `fields` of a filter
+    filtering querysets of `model`. `entries` is an optional dict of entries
+    already built for the same filter class and model, as lists of
+    `(field_signature, entry)` pairs by field name, which are reused and to
+    which new entries are added.
+    """
+    if entries is None:
+        entries = {}
+    plan = []
+    for name, field in fields.items():
+        signature = field_signature(field)
+        built = entries.setdefault(name, [])
+        for built_signature, entry in built:
+            if built_signature == signature:
+                break
+        else:
+            entry = build_entry(filter_class, name, field, model)
+            built.append((signature, entry))
+        plan.append(entry)
+    return tuple(plan)
+
+
+def _apply_method(filter_, qs, entry, value):
+    return entry.method.__get__(filter_, type(filter_))(qs, value)
+
+
+def _apply_filter(filter_, qs, entry, value):
+    return qs.filter(**entry.get_kwargs(value))
+
+
+def _apply_exclude(filter_, qs, entry, value):
+    return qs.exclude(**entry.get_kwargs(value))
+
+
+def _apply_field(filter_, qs, entry, value):
+    return filter_.fields[entry.name].filter(qs, value)
+
+
+class SignaturePlan(object):
+    """
+    The steps of a filter plan for one signature, the set of keys having a
+    value in the validated data. Inactive entries are left out and the way
+    each active entry is applied is decided up front.
+
+    * `distinct` - whether `distinct()` is applied before the steps.
+    * `combined` - entries applied with a single `filter()`/`exclude()` call
+      when the filter combines its lookups.
+    * `steps` - `(entry, apply)` pairs chained in order, `apply` being called
+      as `apply(filter, qs, entry, value)`.
+    """
+    __slots__ = ('distinct', 'combined', 'steps')
+
+    def __init__(self, distinct, combined, steps):
+        self.distinct = distinct
+        self.combined = combined
+        self.steps = steps
+
+    def __repr__(self):
+        return '<SignaturePlan {steps}>'.format(
+            steps=[entry.name for entry in self.combined] + [entry.name for entry, apply in self.steps]
+        )
+
+    def apply(self, filter_, qs, validated_data):
+        if self.distinct:
+            qs = qs.distinct()
+        if self.combined:
+            qs = combine(qs, [(entry, validated_data[entry.key]) for entry in self.combined])
+        for entry, apply in self.steps:
+            qs = apply(filter_, qs, entry, validated_data.get(entry.key))
+        return qs
+
+
+def build_signature_plan(plan, signature, combine_lookups=False):
+    """
+    Return the `SignaturePlan` of `plan` for the `signature` set of keys
+    having a value, equivalent to applying every entry of `plan`.
+    """
+    distinct = False
+    combined = []
+    steps = []
+    for entry in plan:
+        if entry.method is not None:
+            if entry.key in signature:
+                steps.append((entry, _apply_method))
+        elif entry.lookup is None:
+            # Fields filtering the queryset themselves are called even
+            # without a value.
+            steps.append((entry, _apply_field))
+        elif entry.key in signature:
+            if combine_lookups and not entry.multivalued:
+                combined.append(entry)
+            else:
+                distinct = distinct or entry.distinct
+                steps.append((entry, _apply_exclude if entry.exclude else _apply_filter))
+    return SignaturePlan(distinct, tuple(combined), tuple(steps))
+
+
+def combine(qs, active):
+    """
+    Apply the `(entry, value)` pairs of `active` to `qs` with a single
+    `filter()` call and a single `exclude()` call.
+    """
+    filter_kwargs = {}
+    filter_q = []
+    exclude_q = []
+    distinct = False
+    for entry, value in active:
+        kwargs = entry.get_kwargs(value)
+        distinct = distinct or entry.distinct
+        if entry.exclude:
+            exclude_q.append(Q(**kwargs))
+        elif filter_kwargs.keys().isdisjoint(kwargs):
+            filter_kwargs.update(kwargs)
+        else:
+            # Same lookup used by several fields, all of them must match.
+            filter_q.append(Q(**kwargs))
+    if distinct:
+        qs = qs.distinct()
+    if filter_kwargs or filter_q:
+        qs = qs.filter(*filter_q, **filter_kwargs)
+    if exclude_q:
+        # `exclude(a).exclude(b)` excludes rows matching either of them.
+        qs = qs.exclude(reduce(operator.or_, exclude_q))
+    return qs
@@ -0,0 +1,410 @@
+"""
+Converters used by the lightweight validation engine of filters (see
+`Filter.fast_validation`).
+
+A converter is a plain function `converter(field, data)` turning a non-empty
+primitive value into the internal value of `field`, as the field's own
+`to_internal_value()` would. The converters of common fields only implement
+the successful conversion of the usual inputs and raise `Fallback` (or
+`TypeError`/`ValueError`/`KeyError`) for anything else, in which case the
+field validates the value with DRF, which reports the error.
+
+Batch converters, `batch_converter(field, data)`, convert a whole list of
+items for the child of a list field in one pass, parsing integers with NumPy
+when it is installed. They work the same way: any item they can't convert makes the
+list fall back to the validation of each item, which reports errors per
+index.
+"""
+import decimal
+import math
+import uuid
+from enum import Enum
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import BooleanField as RestBooleanField
+from rest_framework.fields import CharField as RestCharField
+from rest_framework.fields import ChoiceField as RestChoiceField
+from rest_framework.fields import DateField as RestDateField
+from rest_framework.fields import DateTimeField as RestDateTimeField
+from rest_framework.fields import DecimalField as RestDecimalField
+from rest_framework.fields import Field as RestField
+from rest_framework.fields import FloatField as RestFloatField
+from rest_framework.fields import IntegerField as RestIntegerField
+from rest_framework.fields import ListField as RestListField
+from rest_framework.fields import UUIDField as RestUUIDField
+from rest_framework.fields import empty
+from rest_framework.settings import api_settings
+
+from .. import compat
+from .dateparse import parse_iso_date, parse_iso_datetime, reads_iso
+from .fields import FilterField, IsoInputMixin, ListField, validates_in_bulk
+
+# Errors of the converters meaning "let DRF validate this value".
+FALLBACK_ERRORS = (TypeError, ValueError, KeyError)
+
+
+class Fallback(ValueError):
+    pass
+
+
+def convert_integer(field, data):
+    if type(data) is int:
+        return data
+    if type(data) is not str or len(data) > field.MAX_STRING_LENGTH:
+        raise Fallback
+    # `int()` rejects `'1.0'`, which DRF accepts.
+    return int(data)
+
+
+def convert_float(field, data):
+    if type(data) is not str or len(data) > field.MAX_STRING_LENGTH:
+        raise Fallback
+    value = float(data)
+    if not math.isfinite(value):
+        raise Fallback
+    return value
+
+
+def convert_char(field, data):
+    if type(data) is not str or data == '':
+        raise Fallback
+    if field.trim_whitespace:
+        data = data.strip()
+        if data == '':
+            raise Fallback
+    return data
+
+
+def convert_boolean(field, data):
+    if isinstance(data, str):
+        data = data.lower()
+    if data in field.TRUE_VALUES:
+        return True
+    if data in field.FALSE_VALUES:
+        return False
+    if data in field.NULL_VALUES and field.allow_null:
+        return None
+    raise Fallback
+
+
+def convert_choice(field, data):
+    if data == '' and field.allow_blank:
+        return ''
+    if isinstance(data, Enum):
+        raise Fallback
+    return field.choice_strings_to_values[str(data)]
+
+
+def convert_date(field, data):
+    input_formats = getattr(field, 'input_formats', api_settings.DATE_INPUT_FORMATS)
+    if type(data) is not str or not reads_iso(input_formats):
+        raise Fallback
+    value = parse_iso_date(data)
+    if value is None:
+        raise Fallback
+    return value
+
+
+def convert_iso(field, data):
+    if type(data) is not str or not reads_iso(field.get_input_formats()):
+        raise Fallback
+    value = field.parse_iso(data)
+    if value is None:
+        raise Fallback
+    return value
+
+
+def convert_list(field, data):
+    if type(data) is not list or (not data and not field.allow_empty):
+        raise Fallback
+    if getattr(field, 'compress_runs', False):
+        data = field.expand_runs(data)
+    child = field.child
+    try:
+        return validate_batch(child, data)
+    except FALLBACK_ERRORS:
+        pass
+    convert = get_converter(child)
+    result = []
+    for item in data:
+        if item is None or item is empty:
+            raise Fallback
+        # Errors of list items are reported per index by DRF.
+        try:
+            value = convert(child, item)
+            if child.validators:
+                child.run_validators(value)
+        except (ValidationError, DjangoValidationError):
+            raise Fallback
+        result.append(value)
+    return result
+
+
+def convert_generic(field, data):
+    return field.to_internal_value(data)
+
+
+def batch_integer(field, data):
+    types = set(map(type, data))
+    if types == {int}:
+        return list(data)
+    if not types <= {int, str}:
+        raise Fallback
+    strings = data if types == {str} else [item for item in data if type(item) is str]
+    if max(map(len, strings)) > field.MAX_STRING_LENGTH:
+        raise Fallback
+    if compat.numpy is not None and types == {str}:
+        try:
+            return compat.numpy.array(data, dtype=compat.numpy.int64).tolist()
+        except OverflowError:
+            pass
+    # `int()` rejects `'1.0'`, which DRF accepts.
+    return list(map(int, data))
+
+
+def batch_float(field, data):
+    types = set(map(type, data))
+    if types == {str}:
+        if max(map(len, data)) > field.MAX_STRING_LENGTH:
+            raise Fallback
+    elif not types <= {int, float}:
+        raise Fallback
+    values = list(map(float, data))
+    if not all(map(math.isfinite, values)):
+        raise Fallback
+    return values
+
+
+def batch_decimal(field, data):
+    if field.localize or set(map(type, data)) != {str}:
+        raise Fallback
+    data = list(map(str.strip, data))
+    if max(map(len, data)) > field.MAX_STRING_LENGTH:
+        raise Fallback
+    try:
+        values = list(map(decimal.Decimal, data))
+        if not all(map(decimal.Decimal.is_finite, values)):
+            raise Fallback
+        return list(map(field.quantize, map(field.validate_precision, values)))
+    except (decimal.DecimalException, ValidationError):
+        raise Fallback
+
+
+def batch_uuid(field, data):
+    if set(map(type, data)) != {str}:
+        raise Fallback
+    return list(map(uuid.UUID, data))
+
+
+def batch_date(field, data):
+    input_formats = getattr(field, 'input_formats', api_settings.DATE_INPUT_FORMATS)
+    if not reads_iso(input_formats) or set(map(type, data)) != {str}:
+        raise Fallback
+    values = list(map(parse_iso_date, data))
+    if None in values:
+        raise Fallback
+    return values
+
+
+def batch_datetime(field, data):
+    input_formats = getattr(field, 'input_formats', api_settings.DATETIME_INPUT_FORMATS)
+    if not reads_iso(input_formats) or set(map(type, data)) != {str}:
+        raise Fallback
+    values = list(map(parse_iso_datetime, data))
+    if None in values:
+        raise Fallback
+    try:
+        return list(map(field.enforce_timezone, values))
+    except ValidationError:
+        raise Fallback
+
+
+def batch_iso(field, data):
+    if not reads_iso(field.get_input_formats()) or set(map(type, data)) != {str}:
+        raise Fallback
+    values = list(map(field.parse_iso, data))
+    if None in values:
+        raise Fallback
+    return values
+
+
+# Converters by the `to_internal_value()` implementation they replace.
+CONVERTERS = {
+    RestIntegerField.to_internal_value: convert_integer,
+    RestFloatField.to_internal_value: convert_float,
+    RestCharField.to_internal_value: convert_char,
+    RestBooleanField.to_internal_value: convert_boolean,
+    RestChoiceField.to_internal_value: convert_choice,
+    RestDateField.to_internal_value: convert_date,
+    IsoInputMixin.to_internal_value: convert_iso,
+}
+
+# Batch converters by the `to_internal_value()` implementation they replace.
+BATCH_CONVERTERS = {
+    RestIntegerField.to_internal_value: batch_integer,
+    RestFloatField.to_internal_value: batch_float,
+    RestDecimalField.to_internal_value: batch_decimal,
+    RestUUIDField.to_internal_value: batch_uuid,
+    RestDateField.to_internal_value: batch_date,
+    RestDateTimeField.to_internal_value: batch_datetime,
+    IsoInputMixin.to_internal_value: batch_iso,
+}
+
+_RUN_VALIDATION = (RestField.run_validation, RestCharField.run_validation)
+# Empty values are always validated by the field itself.
+_VALIDATE_EMPTY_VALUES = (RestField.validate_empty_values, FilterField.validate_empty_values)
+_RUN_CHILD_VALIDATION = (RestListField.run_child_validation, ListField.run_child_validation)
+_LIST_TO_INTERNAL_VALUE = (RestListField.to_internal_value, ListField.to_internal_value)
+
+
+def get_converter(field):
+    """
+    Return the converter of `field`, or `None` if the field customizes its
+    validation, in which case it is validated with `run_validation()`.
+    """
+    cls = type(field)
+    if (field.read_only or cls.run_validation not in _RUN_VALIDATION or
+            cls.validate_empty_values not in _VALIDATE_EMPTY_VALUES):
+        return None
+    if cls.run_validation is RestCharField.run_validation and cls.to_internal_value is not RestCharField.to_internal_value:
+        # Blank values are handled by `CharField.run_validation()`.
+        return None
+    if cls.to_internal_value in _LIST_TO_INTERNAL_VALUE:
+        if (cls.run_child_validation in _RUN_CHILD_VALIDATION and not validates_in_bulk(field.child) and
+                get_converter(field.child) is not None):
+            return convert_list
+        return convert_generic
+    return CONVERTERS.get(cls.to_internal_value, convert_generic)
+
+
+def get_batch_converter(field):
+    """
+    Return the batch converter of `field`, or `None` if its items have to be
+    validated one by one.
+    """
+    if get_converter(field) is None:
+        return None
+    return BATCH_CONVERTERS.get(type(field).to_internal_value)
+
+
+def run_batch_validators(field, values):
+    """
+    Run the validators of `field` on all of `values`, raising `Fallback` if
+    one of them fails. Minimum and maximum value validators only check the
+    smallest and largest value.
+    """
+    try:
+        for validator in field.validators:
+            if getattr(validator, 'requires_context', False):
+                raise Fallback
+            if type(validator) is MinValueValidator:
+                validator(min(values))
+            elif type(validator) is MaxValueValidator:
+                validator(max(values))
+            else:
+                for value in values:
+                    validator(value)
+    except (ValidationError, DjangoValidationError):
+        raise Fallback
+
+
+def validate_batch(field, data):
+    """
+    Validate the non-empty list of primitive values `data` of `field` at
+    once, like `field.run_validation()` would validate each of them. Raise
+    `Fallback` (or `TypeError`/`ValueError`/`KeyError`) when the items have
+    to be validated one by one.
+    """
+    convert = get_batch_converter(field)
+    if convert is None or not data:
+        raise Fallback
+    values = convert(field, data)
+    if field.validators:
+        run_batch_validators(field, values)
+    return values
+
+
+def is_optional(field):
+    """
+    Whether `field` can be skipped when its key is missing, i.e. it has no
+    value when its input is not supplied.
+    """
+    return (
+        not field.required and field.default is empty and
+        field.default_empty_html is empty and not field.read_only
+    )
+
+
+def is_shareable(field, converter):
+    """
+    Whether `field`, bound to a filter, can validate values for any other
+    instance of the filter class, i.e. its validation doesn't depend on the
+    instance it is bound to.
+    """
+    if converter is None or converter is convert_generic:
+        return False
+    for validator in field.validators:
+        if getattr(validator, 'requires_context', False):
+            return False
+    child = getattr(field, 'child', None)
+    return child is None or is_shareable(child, get_converter(child))
+
+
+class FieldSpec(object):
+    """
+    Immutable description of a field of a filter class, shared by all the
+    instances of the class.
+
+    * `name` - name of the field, and key of its input.
+    * `source_attrs` - path of the validated value in `validated_data`.
+    * `converter` - converter of the field, see `get_converter()`.
+    * `optional` - whether the field is skipped when its key is missing.
+    * `field` - the field bound to a prototype instance of the filter
+      class, used to validate values when `shared` is true. Otherwise the
+      field is bound to each filter instance, as usual.
+    """
+    __slots__ = ('name', 'source_attrs', 'converter', 'optional', 'field', 'shared')
+
+    def __init__(self, field):
+        converter = get_converter(field)
+        values = {
+            'name': field.field_name,
+            'source_attrs': tuple(field.source_attrs),
+            'converter': converter,
+            'optional': is_optional(field),
+            'field': field,
+            'shared': is_shareable(field, converter),
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('FieldSpec is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('FieldSpec is immutable')
+
+    def __repr__(self):
+        return '<FieldSpec {name}: {converter}>'.format(
+            name=self.name, converter=getattr(self.converter, '__name__', None)
+        )
+
+
+def validate_value(field, data, converter):
+    """
+    Validate the primitive `data` of `field` like `field.run_validation()`.
+    """
+    if converter is None or data is empty or data is None:
+        return field.run_validation(data)
+    if converter is not convert_generic:
+        try:
+            value = converter(field, data)
+        except FALLBACK_ERRORS:
+            return field.run_validation(data)
+    else:
+        value = converter(field, data)
+    if field.validators:
+        field.run_validators(value)
+    return value
@@ -0,0 +1,89 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.schemas.generators import EndpointEnumerator
+
+from djfilters.backend import DjFilterBackend
+
+
+def get_filter_endpoints(urlconf=None):
+    """
+    Yield `(path, backend, view)` for every view of `urlconf` filtered by a
+    `DjFilterBackend` with query parameters, with the backend instance
+    filtering it.
+    """
+    for path, method, callback in EndpointEnumerator(urlconf=urlconf).get_api_endpoints():
+        view = callback.cls(**getattr(callback, 'initkwargs', {}))
+        actions = getattr(callback, 'actions', None)
+        if actions is not None:
+            view.action_map = actions
+            view.action = actions.get(method.lower())
+        for backend_class in getattr(view, 'filter_backends', ()):
+            if isinstance(backend_class, type) and issubclass(backend_class, DjFilterBackend):
+                backend = backend_class()
+                if not backend.reads_body(view, method):
+                    yield path, backend, view
+
+
+def export_schemas(urlconf=None):
+    """
+    Return the OpenAPI parameters of the filters of `urlconf`, with the
+    parameters of each filter class stored once under `components` and the
+    component used by every path under `paths`. Filter classes without a
+    component name, e.g. classes made by a factory function, are left out
+    and generated when served.
+    """
+    components = {}
+    paths = {}
+    for path, backend, view in get_filter_endpoints(urlconf):
+        filterset_class = backend.get_filterset_class(view)
+        if filterset_class is None:
+            continue
+        name = backend.get_schema_component_name(filterset_class)
+        if name is None:
+            continue
+        if name not in components:
+            components[name] = backend.get_cached_schema(
+                filterset_class, 'openapi', backend.build_schema_operation_parameters
+            )
+        paths.setdefault(path, [])
+        if name not in paths[path]:
+            paths[path].append(name)
+    return {
+        'components': dict(sorted(components.items())),
+        'paths': paths,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Export the OpenAPI parameters of the filters of every view using '
+        'DjFilterBackend to a JSON file, served with the SCHEMA_FILE setting.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-o', '--output',
+            help='Path of the JSON file to write, standard output by default.',
+        )
+        parser.add_argument(
+            '--urlconf',
+            help='URLconf module to export the views of, ROOT_URLCONF by default.',
+        )
+        parser.add_argument(
+            '--indent', type=int, default=None,
+            help='Indentation level of the JSON output.',
+        )
+
+    def handle(self, *args, **options):
+        schemas = export_schemas(options['urlconf'])
+        content = json.dumps(schemas, indent=options['indent'], cls=DjangoJSONEncoder)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(content)
+            self.stderr.write('Exported {count} filter schemas to {path}.'.format(
+                count=len(schemas['components']), path=options['output']
+            ))
+        else:
+            self.stdout.write(content)
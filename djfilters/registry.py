@@ -0,0 +1,55 @@
+"""
+Registry of the filter classes, used to compile them ahead of the first
+request and to check them with Django's system checks.
+
+Every subclass of `Filter` registers itself when it is created. Classes are
+held with weak references, so that filter classes created on the fly, e.g.
+in tests, can still be garbage collected.
+"""
+import weakref
+
+
+class FilterRegistry(object):
+
+    def __init__(self):
+        self._classes = weakref.WeakSet()
+
+    def register(self, filter_class):
+        self._classes.add(filter_class)
+
+    def unregister(self, filter_class):
+        self._classes.discard(filter_class)
+
+    def __contains__(self, filter_class):
+        return filter_class in self._classes
+
+    def __iter__(self):
+        """
+        Iterate over the registered classes that can be compiled, in a stable
+        order. Model filters without `Meta.model` are abstract bases and are
+        left out.
+        """
+        from .filters import ModelFilter
+
+        classes = sorted(self._classes, key=lambda cls: (cls.__module__, cls.__qualname__))
+        for filter_class in classes:
+            if issubclass(filter_class, ModelFilter) and filter_class.get_model() is None:
+                continue
+            yield filter_class
+
+    def precompile(self):
+        """
+        Compile every registered class, see `Filter.precompile()`. Return
+        the `{filter_class: exception}` dict of the classes that failed,
+        these are reported by the system checks.
+        """
+        failed = {}
+        for filter_class in self:
+            try:
+                filter_class.precompile()
+            except Exception as exc:
+                failed[filter_class] = exc
+        return failed
+
+
+registry = FilterRegistry()
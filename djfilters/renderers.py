@@ -0,0 +1,64 @@
+"""
+Rendering of filter forms in the browsable API.
+"""
+from django.utils.translation import get_language
+from rest_framework.relations import RelatedField
+from rest_framework.renderers import HTMLFormRenderer
+from rest_framework.utils.field_mapping import ClassLookupDict
+
+from . import filters
+
+_default_style = dict(HTMLFormRenderer.default_style.mapping)
+_default_style.update({
+    filters.BooleanField: {
+        'base_template': 'checkbox.html'
+    },
+    filters.ListField: {
+        'base_template': 'textarea.html'
+    },
+    RelatedField: {
+        'base_template': 'related_input.html'
+    },
+})
+
+
+class FilterFormRenderer(HTMLFormRenderer):
+    """
+    Render the form of a filter with the `djfilters/vertical` template pack.
+
+    * The style mapping is the renderer's own, so rendering filters doesn't
+      change how DRF renders serializer forms.
+    * Related fields are rendered as text inputs suggesting at most
+      `html_cutoff` related objects, or none with `trust_ids`, instead of a
+      `<select>` of the whole related table.
+    * Fields without a value nor errors are rendered once per filter class,
+      renderer class, template pack and language.
+    """
+    template_pack = 'djfilters/vertical/'
+    default_style = ClassLookupDict(_default_style)
+
+    def render_field(self, field, parent_style):
+        key = self.get_static_key(field, parent_style)
+        if key is None:
+            return super(FilterFormRenderer, self).render_field(field, parent_style)
+        cache = type(field.parent).get_compiled().setdefault('html', {})
+        html = cache.get(key)
+        if html is None:
+            html = cache[key] = super(FilterFormRenderer, self).render_field(field, parent_style)
+        return html
+
+    def get_static_key(self, field, parent_style):
+        """
+        Return the key under which the HTML of the bound field `field` is
+        cached, or `None` if it may differ between renders: the field has a
+        value or errors, suggests related objects, or belongs to a filter
+        whose fields may differ between instances.
+        """
+        parent = getattr(field._field, 'parent', None)
+        if not isinstance(parent, filters.Filter) or field.value not in (None, '') or field.errors:
+            return None
+        if isinstance(field._field, RelatedField) and not getattr(field._field, 'trusts_ids', False):
+            return None
+        if type(parent).get_field_specs() is None:
+            return None
+        return field.name, type(self), parent_style.get('template_pack', self.template_pack), get_language()
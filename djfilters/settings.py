@@ -0,0 +1,61 @@
+"""
+Settings for dj-rest-filters are namespaced in the `DJFILTERS` setting.
+For example your project's `settings.py` file might look like this:
+
+DJFILTERS = {
+    'TRUST_RELATED_IDS': True,
+}
+
+Settings missing from `DJFILTERS` use the defaults below.
+"""
+from django.conf import settings
+
+DEFAULTS = {
+    # Validate only the format of values given to related fields and filter
+    # on them directly, without checking that the related objects exist.
+    'TRUST_RELATED_IDS': False,
+    # Process-local cache of related objects found by related fields, e.g.
+    # `{'MAXSIZE': 1024, 'TTL': 300}`. See `djfilters.cache`.
+    'RELATED_CACHE': None,
+    # Cache of the validation results of filters keyed by their input, e.g.
+    # `{'MAXSIZE': 512}`. See `djfilters.cache`.
+    'VALIDATION_CACHE': None,
+    # Process-local LRU of the filter plans specialized for the set of
+    # fields having a value, e.g. `{'MAXSIZE': 128}`. `None` disables it.
+    'PLAN_CACHE': {'MAXSIZE': 128},
+    # Import the `filters` module of every installed app and compile all the
+    # filter classes when Django starts, instead of on their first use.
+    'PRECOMPILE': False,
+    # Path of a JSON file written by the `export_filter_schemas` command,
+    # whose OpenAPI parameters are served instead of being generated.
+    'SCHEMA_FILE': None,
+    # Number of related objects suggested by related fields in the forms of
+    # the browsable API, unless they are declared with `html_cutoff`.
+    'HTML_CUTOFF': 50,
+    # Strategy rendering the `in` lookups of list fields, 'auto' to pick one
+    # by list size and database vendor, or `None` to always use Django's
+    # `in`. See `djfilters.filters.lookups`.
+    'IN_LIST_STRATEGY': 'auto',
+    # Longest list rendered with Django's `in` by the 'auto' strategy.
+    'IN_LIST_THRESHOLD': 1000,
+}
+
+
+class FilterSettings(object):
+    """
+    Access dj-rest-filters settings as attributes, e.g.
+    `filter_settings.TRUST_RELATED_IDS`. Settings are read on access so
+    that `override_settings` is honoured.
+    """
+
+    @property
+    def user_settings(self):
+        return getattr(settings, 'DJFILTERS', {})
+
+    def __getattr__(self, attr):
+        if attr not in DEFAULTS:
+            raise AttributeError("Invalid dj-rest-filters setting: '%s'" % attr)
+        return self.user_settings.get(attr, DEFAULTS[attr])
+
+
+filter_settings = FilterSettings()
@@ -58,7 +58,7 @@ setup(
         'Programming Language :: Python :: Implementation :: PyPy',
         'Topic :: Utilities',
     ],
-    packages=find_packages(exclude=['tests']),
+    packages=find_packages(exclude=['tests', 'benchmarks']),
     include_package_data=True,
     zip_safe=False,
     python_requires='>=3.8',
@@ -15,6 +15,11 @@ class BooleanFilter(filters.Filter):
     flag = filters.BooleanField()
 
 
+class TextListFilter(filters.Filter):
+    ids = filters.ListField(source='id', child=filters.IntegerField(), required=False)
+    chars = filters.ListField(source='char', child=filters.CharField(), required=False)
+
+
 class CharFieldWithRequiredFilter(filters.Filter):
     char = filters.CharField()
 
@@ -13,6 +13,11 @@ class RelatedIntIdModel(models.Model):
     text = models.CharField(max_length=100)
 
 
+class ProxyRelatedIntIdModel(RelatedIntIdModel):
+    class Meta:
+        proxy = True
+
+
 class DateFieldModel(models.Model):
     date = models.DateField()
     datetime = models.DateTimeField()
@@ -63,3 +68,8 @@ class TextModel(TestAbstractModel):
     slug = models.SlugField(max_length=200)
     slug_fk = models.ForeignKey(to=RelatedSlugIdModel, null=True, on_delete=models.SET_NULL)
     int_fk = models.ForeignKey(to=RelatedIntIdModel, null=True, on_delete=models.SET_NULL)
+
+
+class TaggedModel(models.Model):
+    text = models.CharField(max_length=100)
+    tags = models.ManyToManyField(to=RelatedIntIdModel)
@@ -1,13 +1,22 @@
-from unittest import skipIf
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock, skipIf
 
 from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
 from django.test import TestCase, override_settings
 from model_bakery import baker
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.renderers import HTMLFormRenderer
 from rest_framework.test import APIRequestFactory
+from rest_framework.utils.field_mapping import ClassLookupDict
 
 from djfilters import compat, filters
 from djfilters.backend import DjFilterBackend
+from djfilters.filters import ValidationError
+from djfilters.renderers import FilterFormRenderer
 
 try:
     import drf_spectacular  # noqa: F401
@@ -24,7 +33,8 @@ except ImportError:
 from .base import BaseTestCase
 from .filters import (NoFieldFilter, TextFieldFilter, TextModelFilter,
                       get_model_filter, get_simple_filter)
-from .models import TextModel
+from .models import RelatedIntIdModel, TextModel
+from .urls import TextViewSet
 from .views import get_view
 
 factory = APIRequestFactory()
@@ -94,6 +104,78 @@ class ToHtmlBackendTestCase(TestCase):
         self.assertIsInstance(rendered, str)
         self.assertIn('<', rendered)
 
+    def render(self, filter_class, **params):
+        view = get_view(filter_class=filter_class, queryset=TextModel.objects.all())
+        request = factory.get('/', data=params)
+        request.query_params = request.GET
+        return DjFilterBackend().to_html(request, view.queryset, view)
+
+    def test_to_html_does_not_change_drf_renderer(self):
+        class FlagFilter(filters.Filter):
+            active = filters.BooleanField(required=False)
+
+        self.assertIn('<select', self.render(FlagFilter))
+        self.assertNotIn(filters.BooleanField, HTMLFormRenderer.default_style.mapping)
+        self.assertNotIn(filters.ListField, HTMLFormRenderer.default_style.mapping)
+        backend = DjFilterBackend()
+        self.assertIs(backend.get_form_renderer(), DjFilterBackend().get_form_renderer())
+
+    def test_to_html_without_filter_class(self):
+        self.assertIsNone(self.render(None))
+
+    def test_related_fields_suggest_capped_options(self):
+        related = baker.make(RelatedIntIdModel, _quantity=5)
+
+        class RelatedFilter(filters.Filter):
+            related = filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all(), html_cutoff=2)
+            trusted = filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all(), trust_ids=True)
+
+        with self.assertNumQueries(1):
+            rendered = self.render(RelatedFilter, trusted=related[0].id)
+        self.assertNotIn('<select', rendered)
+        self.assertIn('<datalist id="related-options">', rendered)
+        self.assertEqual(rendered.count('<option'), 2)
+        self.assertIn('<option value="{id}">'.format(id=related[1].id), rendered)
+        self.assertIn('value="{id}"'.format(id=related[0].id), rendered)
+
+        self.assertEqual(filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all()).html_cutoff, 50)
+        with override_settings(DJFILTERS={'HTML_CUTOFF': 10}):
+            self.assertEqual(filters.SlugRelatedField(slug_field='text', queryset=RelatedIntIdModel.objects.all()).html_cutoff, 10)
+
+    def test_static_fields_are_rendered_once(self):
+        class StaticFilter(filters.Filter):
+            text = filters.CharField(required=False, help_text='Some text')
+            role = filters.ChoiceField(choices=[('a', 'A'), ('b', 'B')], required=False)
+
+        rendered = self.render(StaticFilter)
+        html = StaticFilter.__dict__['_compiled']['html']
+        self.assertEqual(sorted(key[0] for key in html), ['role', 'text'])
+        with mock.patch.object(HTMLFormRenderer, 'render_field', side_effect=AssertionError):
+            self.assertEqual(self.render(StaticFilter), rendered)
+
+        rendered = self.render(StaticFilter, text='lorem', role='c')
+        self.assertIn('value="lorem"', rendered)
+        self.assertIn('has-error', rendered)
+        self.assertEqual(len(html), 2)
+
+    def test_static_fields_per_renderer(self):
+        class StaticFilter(filters.Filter):
+            text = filters.CharField(required=False)
+
+        class TextareaRenderer(FilterFormRenderer):
+            default_style = ClassLookupDict(dict(FilterFormRenderer.default_style.mapping))
+            default_style[filters.CharField] = {'base_template': 'textarea.html'}
+
+        class TextareaBackend(DjFilterBackend):
+            form_renderer_class = TextareaRenderer
+
+        self.assertNotIn('<textarea', self.render(StaticFilter))
+        view = get_view(filter_class=StaticFilter, queryset=TextModel.objects.all())
+        request = factory.get('/')
+        request.query_params = request.GET
+        self.assertIn('<textarea', TextareaBackend().to_html(request, view.queryset, view))
+        self.assertNotIn('<textarea', self.render(StaticFilter))
+
 
 class ModelFilterQuerysetBackendTestCase(BaseTestCase):
     @classmethod
@@ -139,7 +221,167 @@ class ModelFilterQuerysetBackendTestCase(BaseTestCase):
         self.assertEqual(filtered_queryset.first().text, self.search_query.get('text'))
 
 
+class PassthroughBackendTestCase(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        baker.make(TextModel, _quantity=3)
+
+    def filter_without_filterset(self, filter_class, query=None):
+        queryset = TextModel.objects.all()
+        with mock.patch.object(DjFilterBackend, 'get_filterset', wraps=self.backend.get_filterset) as get_filterset:
+            request, view, filtered_queryset = self.filter_query(
+                queryset=queryset, filter_class=filter_class, query=query
+            )
+        self.assertIs(filtered_queryset, view.queryset)
+        self.assertFalse(get_filterset.called)
+        return request
+
+    def test_no_query(self):
+        request = self.filter_without_filterset(TextFieldFilter)
+        self.assertEqual(request.cleaned_args, {})
+
+    def test_unrelated_query(self):
+        request = self.filter_without_filterset(TextModelFilter, query={'page': 2, 'ordering': 'id'})
+        self.assertEqual(request.cleaned_args, {})
+
+    def test_empty_form_values(self):
+        class Filter(filters.Filter):
+            flag = filters.BooleanField(allow_null=True)
+
+        class FalseFilter(filters.Filter):
+            # A missing form key validates as `False`, which is filtered on.
+            flag = filters.BooleanField()
+
+        self.assertIsNone(FalseFilter.get_passthrough())
+        request = self.filter_without_filterset(Filter)
+        self.assertEqual(request.cleaned_args, {'flag': None})
+        request.cleaned_args['flag'] = True
+        self.assertEqual(self.filter_without_filterset(Filter).cleaned_args, {'flag': None})
+
+    def test_filter_input(self):
+        request, view, filtered_queryset = self.filter_query(
+            queryset=TextModel.objects.all(), filter_class=TextFieldFilter, query={'text': 'missing'}
+        )
+        self.assertIsNot(filtered_queryset, view.queryset)
+        self.assertEqual(filtered_queryset.count(), 0)
+
+    def test_list_input(self):
+        class Filter(filters.Filter):
+            id = filters.ListField(child=filters.IntegerField(), required=False)
+
+        request, view, filtered_queryset = self.filter_query(
+            queryset=TextModel.objects.all(), filter_class=Filter, query={'id[0]': 0}
+        )
+        self.assertEqual(request.cleaned_args, {'id': [0]})
+        self.assertEqual(filtered_queryset.count(), 0)
+
+    def test_required_field(self):
+        class Filter(filters.Filter):
+            char = filters.CharField(required=True)
+
+        self.validation_error(
+            queryset=TextModel.objects.all(),
+            filter_class=Filter,
+            query={'page': 1},
+            message='This field is required.'
+        )
+
+    def test_default(self):
+        class Filter(filters.Filter):
+            text = filters.CharField(required=False, default='missing')
+
+        self.assertIsNone(Filter.get_passthrough())
+        request, view, filtered_queryset = self.filter_query(
+            queryset=TextModel.objects.all(), filter_class=Filter
+        )
+        self.assertEqual(request.cleaned_args, {'text': 'missing'})
+        self.assertEqual(filtered_queryset.count(), 0)
+
+    def test_custom_validation(self):
+        class Filter(filters.Filter):
+            text = filters.CharField(required=False)
+
+            def validate(self, attrs):
+                raise ValidationError('Filter on something.')
+
+        self.assertIsNone(Filter.get_passthrough())
+        self.validation_error(
+            queryset=TextModel.objects.all(),
+            filter_class=Filter,
+            message='Filter on something.'
+        )
+
+    def test_custom_filterset_kwargs(self):
+        class Backend(DjFilterBackend):
+            def get_filterset_kwargs(self, request, queryset, view):
+                kwargs = super(Backend, self).get_filterset_kwargs(request, queryset, view)
+                kwargs['data'] = {'text': 'missing'}
+                return kwargs
+
+        with mock.patch.object(self, 'backend', Backend()):
+            request, view, filtered_queryset = self.filter_query(
+                queryset=TextModel.objects.all(), filter_class=TextFieldFilter
+            )
+        self.assertEqual(filtered_queryset.count(), 0)
+
+
 @skipIf(compat.coreapi is None, 'coreapi must be installed')
+class FilterBodyBackendTestCase(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.objects = [baker.make(TextModel, char=char) for char in ('a', 'b', 'a,b', 'c')]
+
+    def search(self, data, query=''):
+        request = factory.post('/api/texts/search/' + query, data, format='json')
+        return TextViewSet.as_view({'post': 'search'})(request).render()
+
+    def get(self, query):
+        return TextViewSet.as_view({'get': 'list'})(factory.get('/api/texts/', query)).render()
+
+    def test_json_lists(self):
+        ids = [obj.id for obj in self.objects]
+        response = self.search({'ids': ids[:3], 'chars': ['a,b', 'b']})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, ids[1:3])
+        self.assertEqual(self.get({'chars': '["a,b","b"]'}).data, ids[1:3])
+
+    def test_same_semantics_as_query_parameters(self):
+        ids = ','.join(str(obj.id) for obj in self.objects[1:])
+        body = self.search({'ids': ids, 'chars': 'a,b'})
+        query = self.get({'ids': ids, 'chars': 'a,b'})
+        self.assertEqual(body.data, query.data)
+        self.assertEqual(body.data, [self.objects[1].id])
+
+        body = self.search({'ids': [1, 'x'], 'chars': 'a'})
+        query = self.get({'ids': '1,x', 'chars': 'a'})
+        self.assertEqual(body.status_code, 400)
+        self.assertEqual(body.data, query.data)
+        self.assertEqual(body.data, {'ids': {1: ['A valid integer is required.']}})
+
+    def test_query_parameters_are_ignored(self):
+        response = self.search({}, query='?chars=a')
+        self.assertEqual(response.data, [obj.id for obj in self.objects])
+        response = self.search({'chars': ['c']}, query='?chars=a')
+        self.assertEqual(response.data, [self.objects[3].id])
+
+    def test_invalid_body(self):
+        response = self.search([1, 2])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.data)
+
+    def test_views_without_actions(self):
+        view = get_view(queryset=TextModel.objects.all(), filter_class=TextModelFilter)
+        view.filter_body_actions = ('post',)
+        backend = DjFilterBackend()
+        self.assertTrue(backend.reads_body(view(), 'POST'))
+        self.assertFalse(backend.reads_body(view(), 'GET'))
+
+        request = factory.post('/?char=missing', {'char': self.objects[0].char}, format='json')
+        request = view().initialize_request(request)
+        filtered_queryset = backend.filter_queryset(request, view.queryset, view())
+        self.assertEqual(list(filtered_queryset), [self.objects[0]])
+
+
 class GetSchemaFieldsTests(BaseTestCase):
 
     def test_fields_with_model_filter(self):
@@ -333,6 +575,125 @@ class GetSchemaOperationParametersTests(TestCase):
         self.assertEqual(descriptions['with_label'], 'Pretty Label')
         self.assertEqual(descriptions['plain'], 'plain')
 
+    def test_get_operation_parameters_are_memoized_per_class(self):
+        class MemoFilter(filters.Filter):
+            name = filters.CharField()
+
+        view = get_view(filter_class=MemoFilter)
+        params = self.backend.get_schema_operation_parameters(view)
+        with mock.patch.object(MemoFilter, '__init__', side_effect=AssertionError):
+            self.assertEqual(self.backend.get_schema_operation_parameters(view), params)
+            self.assertEqual(DjFilterBackend().get_schema_operation_parameters(view), params)
+
+        # Callers get their own copy.
+        params[0]['schema']['type'] = 'integer'
+        self.assertEqual(self.backend.get_schema_operation_parameters(view)[0]['schema'], {'type': 'string'})
+
+        with mock.patch.object(DjFilterBackend, '_field_description', return_value='Patched'):
+            self.assertEqual(self.backend.get_schema_operation_parameters(view)[0]['description'], 'name')
+            DjFilterBackend.clear_schema_cache()
+            self.assertEqual(self.backend.get_schema_operation_parameters(view)[0]['description'], 'Patched')
+        DjFilterBackend.clear_schema_cache()
+
+    def test_get_operation_parameters_resolve_types_by_mro(self):
+        class Percentage(filters.FloatField):
+            pass
+
+        class MinuteField(filters.DateTimeField):
+            pass
+
+        class SubclassFilter(filters.Filter):
+            percentage = Percentage()
+            minute = MinuteField()
+
+        view = get_view(filter_class=SubclassFilter)
+        params = {p['name']: p['schema'] for p in self.backend.get_schema_operation_parameters(view)}
+        self.assertEqual(params['percentage'], {'type': 'number', 'format': 'float'})
+        self.assertEqual(params['minute'], {'type': 'string', 'format': 'date-time'})
+
+
+class ExportFilterSchemasTests(TestCase):
+    def setUp(self):
+        self.backend = DjFilterBackend()
+        self.addCleanup(DjFilterBackend.clear_schema_cache)
+
+    def export(self):
+        output = StringIO()
+        call_command('export_filter_schemas', urlconf='tests.urls', stdout=output)
+        return json.loads(output.getvalue())
+
+    def test_export_deduplicates_filter_classes(self):
+        schemas = self.export()
+        self.assertEqual(sorted(schemas['components']), [
+            'tests.filters.BooleanFilter', 'tests.filters.TextListFilter', 'tests.filters.TextModelFilter'
+        ])
+        self.assertEqual(schemas['paths'], {
+            '/api/flags/': ['tests.filters.BooleanFilter'],
+            '/api/flags/{pk}/': ['tests.filters.BooleanFilter'],
+            '/api/texts/': ['tests.filters.TextListFilter'],
+            '/texts/': ['tests.filters.TextModelFilter'],
+            '/texts/search/': ['tests.filters.TextModelFilter'],
+        })
+        view = get_view(filter_class=TextModelFilter)
+        self.assertEqual(
+            schemas['components']['tests.filters.TextModelFilter'],
+            self.backend.get_schema_operation_parameters(view),
+        )
+
+    def test_serve_schema_file(self):
+        schemas = self.export()
+        schemas['components']['tests.filters.TextModelFilter'][0]['description'] = 'Exported'
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'schemas.json')
+            with open(path, 'w') as schema_file:
+                json.dump(schemas, schema_file)
+            with override_settings(DJFILTERS={'SCHEMA_FILE': path}):
+                params = self.backend.get_schema_operation_parameters(get_view(filter_class=TextModelFilter))
+                self.assertEqual(params[0]['description'], 'Exported')
+                # Classes missing from the file are generated.
+                params = self.backend.get_schema_operation_parameters(get_view(filter_class=TextFieldFilter))
+                self.assertEqual([param['name'] for param in params], ['text'])
+
+    def test_classes_with_the_same_path_are_not_exported(self):
+        def make_filter(field_name):
+            class Filter(filters.Filter):
+                pass
+            Filter._declared_fields = {field_name: filters.CharField()}
+            return Filter
+
+        first, second = make_filter('char'), make_filter('text')
+        self.assertIsNone(self.backend.get_schema_component_name(first))
+        self.assertEqual(self.backend.get_schema_component_name(TextModelFilter), 'tests.filters.TextModelFilter')
+        endpoints = [
+            ('/first/', self.backend, get_view(filter_class=first)),
+            ('/second/', self.backend, get_view(filter_class=second)),
+            ('/texts/', self.backend, get_view(filter_class=TextModelFilter)),
+        ]
+        with mock.patch('djfilters.management.commands.export_filter_schemas.get_filter_endpoints', return_value=endpoints):
+            schemas = self.export()
+        self.assertEqual(list(schemas['components']), ['tests.filters.TextModelFilter'])
+        self.assertEqual(schemas['paths'], {'/texts/': ['tests.filters.TextModelFilter']})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'schemas.json')
+            with open(path, 'w') as schema_file:
+                json.dump(schemas, schema_file)
+            with override_settings(DJFILTERS={'SCHEMA_FILE': path}):
+                for filter_class, name in ((first, 'char'), (second, 'text')):
+                    params = self.backend.get_schema_operation_parameters(get_view(filter_class=filter_class))
+                    self.assertEqual([param['name'] for param in params], [name])
+
+    def test_missing_schema_file(self):
+        with override_settings(DJFILTERS={'SCHEMA_FILE': '/nonexistent/schemas.json'}):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'export_filter_schemas'):
+                self.backend.get_schema_operation_parameters(get_view(filter_class=TextModelFilter))
+
+    def test_export_to_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'schemas.json')
+            call_command('export_filter_schemas', urlconf='tests.urls', output=path, stderr=StringIO())
+            with open(path) as schema_file:
+                self.assertEqual(json.load(schema_file), self.export())
+
 
 class _SwaggerIntegrationFilter(filters.Filter):
     name = filters.CharField(required=False)
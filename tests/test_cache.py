@@ -0,0 +1,377 @@
+import os
+import tempfile
+from unittest import mock
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.http import QueryDict
+from django.test import override_settings
+from model_bakery import baker
+
+from djfilters import cache, filters
+from djfilters.cache import (DjangoCache, get_related_cache,
+                             get_validation_cache)
+
+from .base import BaseTestCase
+from .filters import TextModelFilter
+from .models import (ProxyRelatedIntIdModel, RelatedIntIdModel,
+                     RelatedSlugIdModel, TextModel)
+
+
+@override_settings(DJFILTERS={'RELATED_CACHE': {'MAXSIZE': 3, 'TTL': 60}})
+class RelatedCacheTestCase(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.related = baker.make(RelatedIntIdModel, _quantity=5)
+        cls.slugs = baker.make(RelatedSlugIdModel, _quantity=2)
+
+    def setUp(self):
+        self.cache = get_related_cache()
+        self.cache.clear()
+
+    def get_filter_class(self, **kwargs):
+        class Filter(filters.Filter):
+            int_fk = filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all(), **kwargs)
+        return Filter
+
+    def validate(self, filter_class, data):
+        filter_ = filter_class(data=data)
+        self.assertTrue(filter_.is_valid(), filter_.errors)
+        return filter_.validated_data
+
+    def test_cached_primary_key(self):
+        Filter = self.get_filter_class()
+        with self.assertNumQueries(1):
+            first = self.validate(Filter, {'int_fk': self.related[0].id})
+        with self.assertNumQueries(0):
+            second = self.validate(Filter, {'int_fk': str(self.related[0].id)})
+        self.assertEqual(first['int_fk'], self.related[0])
+        self.assertIs(second['int_fk'], first['int_fk'])
+        stats = self.cache.stats()
+        self.assertEqual(stats['namespaces']['tests.RelatedIntIdModel']['hits'], 1)
+        self.assertEqual(stats['namespaces']['tests.RelatedIntIdModel']['misses'], 1)
+        self.assertEqual(stats['total']['size'], 1)
+
+    def test_cached_slug(self):
+        class Filter(filters.Filter):
+            slug_fk = filters.SlugRelatedField(queryset=RelatedSlugIdModel.objects.all(), slug_field='text')
+
+        self.validate(Filter, {'slug_fk': self.slugs[0].text})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.validate(Filter, {'slug_fk': self.slugs[0].text})['slug_fk'].text, self.slugs[0].text)
+
+    def test_missing_object_is_not_cached(self):
+        Filter = self.get_filter_class()
+        missing = max(related.id for related in self.related) + 1
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertFalse(Filter(data={'int_fk': missing}).is_valid())
+
+    def test_save_and_delete_invalidate(self):
+        Filter = self.get_filter_class()
+        self.validate(Filter, {'int_fk': self.related[0].id})
+        self.related[1].save()
+        with self.assertNumQueries(1):
+            self.validate(Filter, {'int_fk': self.related[0].id})
+
+        related = baker.make(RelatedIntIdModel)
+        self.validate(Filter, {'int_fk': related.id})
+        related.delete()
+        self.assertFalse(Filter(data={'int_fk': related.id}).is_valid())
+
+    def test_proxy_models_invalidate(self):
+        Filter = self.get_filter_class()
+        related = baker.make(RelatedIntIdModel)
+        self.validate(Filter, {'int_fk': related.id})
+        ProxyRelatedIntIdModel.objects.get(pk=related.pk).delete()
+        self.assertFalse(Filter(data={'int_fk': related.id}).is_valid())
+
+        class ProxyFilter(filters.Filter):
+            int_fk = filters.PrimaryKeyRelatedField(queryset=ProxyRelatedIntIdModel.objects.all())
+
+        related = baker.make(RelatedIntIdModel)
+        self.validate(ProxyFilter, {'int_fk': related.id})
+        related.delete()
+        self.assertFalse(ProxyFilter(data={'int_fk': related.id}).is_valid())
+
+    def test_ttl(self):
+        Filter = self.get_filter_class()
+        with mock.patch('djfilters.cache.time.monotonic', return_value=1000):
+            self.validate(Filter, {'int_fk': self.related[0].id})
+        with mock.patch('djfilters.cache.time.monotonic', return_value=1061):
+            with self.assertNumQueries(1):
+                self.validate(Filter, {'int_fk': self.related[0].id})
+
+    def test_maxsize(self):
+        Filter = self.get_filter_class()
+        for related in self.related[:4]:
+            self.validate(Filter, {'int_fk': related.id})
+        stats = self.cache.stats()['namespaces']['tests.RelatedIntIdModel']
+        self.assertEqual(stats['size'], 3)
+        self.assertEqual(stats['evictions'], 1)
+        with self.assertNumQueries(1):
+            self.validate(Filter, {'int_fk': self.related[0].id})
+
+    def test_restricted_queryset_is_not_cached(self):
+        class Filter(filters.Filter):
+            int_fk = filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.filter(text__isnull=False))
+
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.validate(Filter, {'int_fk': self.related[0].id})
+
+    def test_use_cache_disabled(self):
+        Filter = self.get_filter_class(use_cache=False)
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.validate(Filter, {'int_fk': self.related[0].id})
+
+    def test_list_of_primary_keys(self):
+        class Filter(filters.Filter):
+            int_fk = filters.ListField(
+                child=filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all())
+            )
+
+        self.validate(Filter, {'int_fk': [self.related[0].id, self.related[1].id]})
+        with self.assertNumQueries(0):
+            self.validate(Filter, {'int_fk': [self.related[1].id, self.related[0].id]})
+        with self.assertNumQueries(1):
+            validated = self.validate(Filter, {'int_fk': [self.related[1].id, self.related[2].id]})
+        self.assertEqual(validated['int_fk'], [self.related[1], self.related[2]])
+
+    def test_filter_with_cached_object(self):
+        baker.make(TextModel, int_fk=self.related[0])
+        Filter = self.get_filter_class()
+        for _ in range(2):
+            request, view, filtered_queryset = self.filter_query(
+                filter_class=Filter,
+                queryset=TextModel.objects.all(),
+                query={'int_fk': self.related[0].id}
+            )
+            self.assertEqual(filtered_queryset.count(), 1)
+
+    def test_disabled_by_default(self):
+        with override_settings(DJFILTERS={}):
+            self.assertIsNone(get_related_cache())
+
+
+@override_settings(DJFILTERS={'VALIDATION_CACHE': {'MAXSIZE': 16}})
+class ValidationCacheTestCase(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.related = baker.make(RelatedIntIdModel, _quantity=2)
+
+    def setUp(self):
+        self.cache = get_validation_cache()
+        self.cache.clear()
+        self.calls = []
+
+    def get_filter_class(self, cache_validation=True):
+        calls = self.calls
+
+        class NumberFilter(filters.Filter):
+            number = filters.IntegerField(required=False)
+            ids = filters.ListField(child=filters.IntegerField(), required=False)
+
+            def validate_number(self, value):
+                calls.append(value)
+                return value
+
+        NumberFilter.cache_validation = cache_validation
+        return NumberFilter
+
+    def validate(self, filter_class, query):
+        filter_ = filter_class(data=QueryDict(query))
+        return filter_.is_valid(), filter_
+
+    def test_identical_input_is_validated_once(self):
+        Filter = self.get_filter_class()
+        valid, first = self.validate(Filter, 'number=1&ids=1,2&page=2')
+        self.assertTrue(valid)
+        valid, second = self.validate(Filter, 'ids=1&ids=2&number=1')
+        self.assertTrue(valid)
+        self.assertEqual(self.calls, [1])
+        self.assertEqual(second.validated_data, {'number': 1, 'ids': [1, 2]})
+        self.assertEqual(second.validated_data, first.validated_data)
+        stats = self.cache.stats()['namespaces'][Filter.get_cache_namespace()]
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_different_input(self):
+        Filter = self.get_filter_class()
+        self.validate(Filter, 'number=1')
+        valid, filter_ = self.validate(Filter, 'number=2')
+        self.assertEqual(self.calls, [1, 2])
+        self.assertEqual(filter_.validated_data, {'number': 2})
+
+    def test_errors_are_cached(self):
+        Filter = self.get_filter_class()
+        valid, first = self.validate(Filter, 'number=1&ids=a')
+        self.assertFalse(valid)
+        valid, second = self.validate(Filter, 'number=1&ids=a')
+        self.assertFalse(valid)
+        self.assertEqual(second.errors, first.errors)
+        self.assertEqual(second.errors['ids'][0][0].code, 'invalid')
+        self.assertEqual(self.calls, [1])
+
+    def test_validated_data_is_a_copy(self):
+        Filter = self.get_filter_class()
+        valid, filter_ = self.validate(Filter, 'number=1')
+        filter_.validated_data['number'] = 2
+        valid, filter_ = self.validate(Filter, 'number=1')
+        self.assertEqual(filter_.validated_data, {'number': 1})
+
+    def test_nested_validated_data_is_a_copy(self):
+        Filter = self.get_filter_class()
+        valid, filter_ = self.validate(Filter, 'ids=1,2')
+        filter_.validated_data['ids'].append(3)
+        valid, filter_ = self.validate(Filter, 'ids=1,2')
+        self.assertEqual(filter_.validated_data, {'ids': [1, 2]})
+
+    def test_classes_with_the_same_path(self):
+        def make_filter(max_value):
+            class Filter(filters.Filter):
+                number = filters.IntegerField(max_value=max_value)
+            return Filter
+
+        small, large = make_filter(10), make_filter(1000)
+        self.assertNotEqual(small.get_cache_namespace(), large.get_cache_namespace())
+        self.assertFalse(self.validate(small, 'number=50')[0])
+        self.assertTrue(self.validate(large, 'number=50')[0])
+        self.assertEqual(TextModelFilter.get_cache_namespace(), 'tests.filters.TextModelFilter')
+
+    def test_opt_out(self):
+        Filter = self.get_filter_class(cache_validation=False)
+        self.validate(Filter, 'number=1')
+        self.validate(Filter, 'number=1')
+        self.assertEqual(self.calls, [1, 1])
+        self.assertEqual(self.cache.stats()['namespaces'], {})
+
+    def test_related_model_changes_invalidate(self):
+        class RelatedFilter(filters.Filter):
+            int_fk = filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all())
+
+        query = 'int_fk={id}'.format(id=self.related[0].id)
+        with self.assertNumQueries(1):
+            self.assertTrue(self.validate(RelatedFilter, query)[0])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.validate(RelatedFilter, query)[1].validated_data['int_fk'], self.related[0])
+        self.related[0].delete()
+        with self.assertNumQueries(1):
+            self.assertFalse(self.validate(RelatedFilter, query)[0])
+
+    def test_filter_queryset(self):
+        baker.make(TextModel, int_fk=self.related[0])
+
+        class RelatedFilter(filters.Filter):
+            int_fk = filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all())
+
+        for _ in range(2):
+            request, view, filtered_queryset = self.filter_query(
+                filter_class=RelatedFilter,
+                queryset=TextModel.objects.all(),
+                query={'int_fk': self.related[0].id}
+            )
+            self.assertEqual(filtered_queryset.count(), 1)
+            self.assertEqual(request.cleaned_args['int_fk'], self.related[0])
+
+    def test_disabled_by_default(self):
+        with override_settings(DJFILTERS={}):
+            self.assertIsNone(get_validation_cache())
+
+
+class DjangoCacheTestMixin(object):
+    @classmethod
+    def setUpTestData(cls):
+        cls.related = baker.make(RelatedIntIdModel, _quantity=3)
+
+    def setUp(self):
+        self.cache = get_related_cache()
+        self.cache.clear()
+
+    def test_backend(self):
+        self.assertIsInstance(self.cache, DjangoCache)
+
+    def test_cached_primary_key(self):
+        class Filter(filters.Filter):
+            int_fk = filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all())
+
+        with self.assertNumQueries(1):
+            self.assertTrue(Filter(data={'int_fk': self.related[0].id}).is_valid())
+        filter_ = Filter(data={'int_fk': self.related[0].id})
+        with self.assertNumQueries(0):
+            self.assertTrue(filter_.is_valid())
+        self.assertEqual(filter_.validated_data['int_fk'], self.related[0])
+        self.assertEqual(self.cache.stats()['namespaces']['tests.RelatedIntIdModel'], {'hits': 1, 'misses': 1})
+
+    def test_batched_list_of_primary_keys(self):
+        class Filter(filters.Filter):
+            int_fk = filters.ListField(
+                child=filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all())
+            )
+
+        ids = [related.id for related in self.related]
+        self.assertTrue(Filter(data={'int_fk': ids[:2]}).is_valid())
+        backend = caches['default']
+        with mock.patch.object(backend, 'get_many', wraps=backend.get_many) as get_many, \
+                mock.patch.object(backend, 'set_many', wraps=backend.set_many) as set_many:
+            with self.assertNumQueries(1):
+                self.assertTrue(Filter(data={'int_fk': ids}).is_valid())
+        self.assertEqual(get_many.call_count, 1)
+        self.assertEqual(set_many.call_count, 1)
+        with self.assertNumQueries(0):
+            self.assertTrue(Filter(data={'int_fk': ids}).is_valid())
+
+    def test_invalidate_namespace(self):
+        self.cache.set('namespace', ('pk', 1), 'value')
+        self.assertEqual(self.cache.get('namespace', ('pk', 1)), 'value')
+        self.cache.invalidate('namespace')
+        self.assertIsNone(self.cache.get('namespace', ('pk', 1)))
+
+    def test_save_invalidates(self):
+        class Filter(filters.Filter):
+            int_fk = filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all())
+
+        self.assertTrue(Filter(data={'int_fk': self.related[0].id}).is_valid())
+        self.related[0].save()
+        with self.assertNumQueries(1):
+            self.assertTrue(Filter(data={'int_fk': self.related[0].id}).is_valid())
+
+    def test_invalidated_from_other_processes(self):
+        class Filter(filters.Filter):
+            int_fk = filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all())
+
+        config = {'BACKEND': 'djfilters.cache.DjangoCache', 'ALIAS': self.cache.alias}
+        query = QueryDict('int_fk={id}'.format(id=self.related[0].id))
+        with override_settings(DJFILTERS={'RELATED_CACHE': config, 'VALIDATION_CACHE': config}):
+            self.assertTrue(Filter(data=query).is_valid())
+            with self.assertNumQueries(0):
+                self.assertTrue(Filter(data=query).is_valid())
+            # A process that never used the filter, e.g. a task worker.
+            with mock.patch.object(cache, '_dependents', {}), mock.patch.object(cache, '_dependencies', {}), \
+                    mock.patch.object(cache, '_connected', False):
+                post_save.disconnect(dispatch_uid='djfilters-cache')
+                post_delete.disconnect(dispatch_uid='djfilters-cache')
+                with mock.patch('djfilters.apps.autodiscover_modules'):
+                    apps.get_app_config('djfilters').ready()
+                self.related[0].delete()
+            self.assertFalse(Filter(data=query).is_valid())
+
+
+@override_settings(
+    DJFILTERS={'RELATED_CACHE': {'BACKEND': 'djfilters.cache.DjangoCache', 'TTL': 60}},
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class LocMemDjangoCacheTestCase(DjangoCacheTestMixin, BaseTestCase):
+    pass
+
+
+@override_settings(
+    DJFILTERS={'RELATED_CACHE': {'BACKEND': 'djfilters.cache.DjangoCache', 'ALIAS': 'default'}},
+    CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'djfilters-test-cache'),
+    }},
+)
+class FileBasedDjangoCacheTestCase(DjangoCacheTestMixin, BaseTestCase):
+    pass
@@ -0,0 +1,155 @@
+from unittest import mock
+
+from django.apps import apps
+from django.test import override_settings
+
+from djfilters import filters
+from djfilters.checks import check_filter, check_filters
+from djfilters.registry import registry
+
+from .base import BaseTestCase
+from .filters import TextModelFilter
+from .models import TextModel
+
+
+class RegistryTestCase(BaseTestCase):
+    def test_subclasses_are_registered(self):
+        class Filter(filters.Filter):
+            char = filters.CharField()
+
+        class AbstractFilter(filters.ModelFilter):
+            pass
+
+        self.assertIn(Filter, registry)
+        self.assertIn(Filter, list(registry))
+        self.assertIn(AbstractFilter, registry)
+        self.assertNotIn(AbstractFilter, list(registry))
+        self.assertNotIn(filters.ModelFilter, list(registry))
+
+    def test_precompile(self):
+        class Filter(filters.ModelFilter):
+            codegen = True
+
+            class Meta:
+                model = TextModel
+                fields = '__all__'
+
+        Filter.precompile()
+        compiled = Filter.__dict__['_compiled']
+        self.assertIn('fields', compiled)
+        self.assertIn('specs', compiled)
+        self.assertIsNotNone(compiled['generated_validation'])
+        self.assertEqual(compiled['plan'][0][1], TextModel)
+        self.assertIn((compiled['plan'][1], False), compiled['generated_filters'])
+
+    def test_precompile_at_ready(self):
+        TextModelFilter.invalidate_compiled()
+        app_config = apps.get_app_config('djfilters')
+        with mock.patch('djfilters.apps.autodiscover_modules') as autodiscover_modules:
+            app_config.ready()
+            self.assertFalse(autodiscover_modules.called)
+            self.assertNotIn('_compiled', TextModelFilter.__dict__)
+            with override_settings(DJFILTERS={'PRECOMPILE': True}):
+                app_config.ready()
+                autodiscover_modules.assert_called_once_with('filters')
+                self.assertIn('plan', TextModelFilter.__dict__['_compiled'])
+
+
+class CheckTestCase(BaseTestCase):
+    def test_valid_filter(self):
+        class Filter(filters.ModelFilter):
+            related = filters.CharField(source='int_fk.text', lookup_expr='icontains')
+            search = filters.CharField()
+
+            class Meta:
+                model = TextModel
+                fields = '__all__'
+
+            def filter_search(self, qs, value):
+                return qs
+
+        self.assertEqual(check_filter(Filter), [])
+
+    def test_unknown_source(self):
+        class Filter(filters.Filter):
+            search = filters.CharField()
+
+            class Meta:
+                model = TextModel
+
+        errors = check_filter(Filter)
+        self.assertEqual([error.id for error in errors], ['djfilters.W001'])
+        self.assertIn("Cannot resolve keyword 'search'", errors[0].msg)
+        self.assertIn("'filter_search()'", errors[0].hint)
+        self.assertIs(errors[0].obj, Filter)
+
+    def test_unknown_lookup_expr(self):
+        class Filter(filters.Filter):
+            char = filters.CharField(lookup_expr='contain')
+            ids = filters.RangeField(source='id', lookup_expr=['gte', 'lesser'], child=filters.IntegerField())
+
+            class Meta:
+                model = TextModel
+
+        errors = check_filter(Filter)
+        self.assertEqual([error.id for error in errors], ['djfilters.W001', 'djfilters.W001'])
+        self.assertIn("Unsupported lookup 'contain' for CharField of TextModel", errors[0].msg)
+        self.assertIn("'id__lesser'", errors[1].msg)
+
+    def test_invalid_meta(self):
+        class Filter(filters.ModelFilter):
+            class Meta:
+                model = TextModel
+                fields = ['char', 'unknown']
+
+        errors = check_filter(Filter)
+        self.assertEqual([error.id for error in errors], ['djfilters.W002'])
+        with override_settings(DJFILTERS={'PRECOMPILE': True}):
+            errors = check_filter(Filter)
+        self.assertEqual([error.id for error in errors], ['djfilters.E001'])
+
+    def test_filter_needing_a_request(self):
+        class Filter(filters.ModelFilter):
+            class Meta:
+                model = TextModel
+                fields = '__all__'
+
+            def __init__(self, *args, **kwargs):
+                super(Filter, self).__init__(*args, **kwargs)
+                self.user = self.context['request'].user
+
+        errors = check_filter(Filter)
+        self.assertEqual([error.id for error in errors], ['djfilters.W002'])
+        self.assertIn("KeyError('request')", errors[0].msg)
+        with override_settings(DJFILTERS={'PRECOMPILE': True}):
+            self.assertEqual([error.id for error in check_filter(Filter)], ['djfilters.W002'])
+
+    def test_compiled_with_precompile(self):
+        class Filter(filters.ModelFilter):
+            class Meta:
+                model = TextModel
+                fields = '__all__'
+
+        with mock.patch.object(Filter, 'precompile', side_effect=ValueError('boom')):
+            self.assertEqual(check_filter(Filter), [])
+            with override_settings(DJFILTERS={'PRECOMPILE': True}):
+                errors = check_filter(Filter)
+        self.assertEqual([error.id for error in errors], ['djfilters.E001'])
+        self.assertIn('could not be compiled: boom', errors[0].msg)
+
+    def test_filters_without_model_are_not_resolved(self):
+        class Filter(filters.Filter):
+            anything = filters.CharField(lookup_expr='whatever')
+
+        self.assertEqual(check_filter(Filter), [])
+
+    def test_check_filters_by_app(self):
+        class Filter(filters.Filter):
+            search = filters.CharField()
+
+            class Meta:
+                model = TextModel
+
+        errors = check_filters(app_configs=[apps.get_app_config('tests')])
+        self.assertIn(Filter, [error.obj for error in errors])
+        self.assertEqual(check_filters(app_configs=[apps.get_app_config('djfilters')]), [])
@@ -0,0 +1,143 @@
+import inspect
+import linecache
+
+from django.http import QueryDict
+from django.test import override_settings
+from model_bakery import baker
+
+from djfilters import filters
+
+from .base import BaseTestCase
+from .models import RelatedIntIdModel, TextModel
+
+
+class PrefixField(filters.CharField):
+    def make_query(self, qs, value):
+        return qs.filter(char__startswith=value)
+
+
+def get_filter_class(codegen, combine_lookups=False):
+    class Filter(filters.Filter):
+        char = filters.CharField(lookup_expr='icontains')
+        related = filters.IntegerField(source='int_fk.id')
+        text = filters.CharField(exclude=True, distinct=True)
+        ids = filters.RangeField(source='id', lookup_expr=['gte', 'lte'], child=filters.IntegerField())
+        search = filters.CharField()
+        prefix = PrefixField(source='char')
+        static = filters.CharField()
+
+        def filter_search(self, qs, value):
+            return qs.filter(text__startswith=value)
+
+        @staticmethod
+        def filter_static(qs, value):
+            return qs.filter(char=value)
+
+    Filter.codegen = codegen
+    Filter.combine_lookups = combine_lookups
+    return Filter
+
+
+class CodegenTestCase(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        related = baker.make(RelatedIntIdModel, text='Related', _quantity=2)
+        baker.make(TextModel, char='Lorem Ipsum', text='one', int_fk=related[0], _quantity=3)
+        baker.make(TextModel, char='Neque porro', text='two', int_fk=related[1], _quantity=3)
+        cls.related = related
+
+    def test_same_query_as_filter_plan(self):
+        queries = [
+            'char=lorem',
+            'char=lorem&related={id}',
+            'text=two&search=o',
+            'ids=1,4&prefix=Lor',
+            'static=Lorem%20Ipsum&char=',
+            '',
+        ]
+        for combine_lookups in (False, True):
+            for query in queries:
+                query = query.format(id=self.related[1].id)
+                with self.subTest(query=query, combine_lookups=combine_lookups):
+                    querysets = []
+                    for codegen in (False, True):
+                        filter_ = get_filter_class(codegen, combine_lookups)(
+                            data=QueryDict(query), queryset=TextModel.objects.all()
+                        )
+                        self.assertTrue(filter_.is_valid(), filter_.errors)
+                        querysets.append(filter_.filter(filter_.validated_data))
+                    self.assertEqual(str(querysets[1].query), str(querysets[0].query))
+                    self.assertEqual(list(querysets[1]), list(querysets[0]))
+
+    def test_generated_source(self):
+        Filter = get_filter_class(True)
+        validation = Filter.get_generated_validation()
+        self.assertIs(Filter.get_generated_validation(), validation)
+        source = inspect.getsource(validation)
+        self.assertIn("if 'char' in keys:", source)
+        self.assertIn("ret['char'] = value", source)
+
+        filter_ = Filter(queryset=TextModel.objects.all())
+        source = inspect.getsource(filter_.get_generated_filter())
+        self.assertIn('qs = qs.filter(char__icontains=value)', source)
+        self.assertIn("value = get_nested_value(['int_fk', 'id'], value)", source)
+        self.assertIn("qs = qs.exclude(text__exact=value)", source)
+        self.assertIn("qs = self.fields['prefix'].filter(qs, value)", source)
+        code = validation.__code__
+        self.assertEqual(linecache.getline(code.co_filename, 1), 'def to_internal_value(self, data):\n')
+
+    def test_generated_once_per_mode(self):
+        Filter = get_filter_class(True)
+        generated = Filter(queryset=TextModel.objects.all()).get_generated_filter()
+        self.assertIs(Filter(queryset=TextModel.objects.all()).get_generated_filter(), generated)
+        Filter.combine_lookups = True
+        self.assertIsNot(Filter(queryset=TextModel.objects.all()).get_generated_filter(), generated)
+        Filter.combine_lookups = False
+        with override_settings(DJFILTERS={'TRUST_RELATED_IDS': True}):
+            self.assertIsNot(Filter(queryset=TextModel.objects.all()).get_generated_filter(), generated)
+
+    def test_validation_hooks(self):
+        class Filter(filters.Filter):
+            codegen = True
+
+            number = filters.IntegerField(source='int_fk.id')
+            flag = filters.BooleanField()
+
+            def validate_number(self, value):
+                if value == 13:
+                    raise filters.ValidationError('Unlucky.')
+                return value + 1
+
+        filter_ = Filter(data=QueryDict('number=1'))
+        self.assertTrue(filter_.is_valid())
+        self.assertEqual(filter_.validated_data, {'int_fk': {'id': 2}, 'flag': False})
+        filter_ = Filter(data=QueryDict('number=13'))
+        self.assertFalse(filter_.is_valid())
+        self.assertEqual(filter_.errors, {'number': ['Unlucky.']})
+
+    def test_customized_filters_are_not_generated(self):
+        class DynamicFilter(filters.Filter):
+            codegen = True
+
+            def __init__(self, *args, **kwargs):
+                super(DynamicFilter, self).__init__(*args, **kwargs)
+                self.fields['char'] = filters.CharField()
+
+        class ApplyEntryFilter(filters.Filter):
+            codegen = True
+            char = filters.CharField()
+
+            def apply_entry(self, qs, entry, value):
+                return super(ApplyEntryFilter, self).apply_entry(qs, entry, value)
+
+        self.assertIsNone(DynamicFilter.get_generated_validation())
+        filter_ = DynamicFilter(data={'char': 'Lorem Ipsum'}, queryset=TextModel.objects.all())
+        self.assertTrue(filter_.is_valid())
+        self.assertIsNone(filter_.get_generated_filter())
+        self.assertEqual(filter_.filter(filter_.validated_data).count(), 3)
+
+        filter_ = ApplyEntryFilter(data={'char': 'Lorem Ipsum'}, queryset=TextModel.objects.all())
+        self.assertTrue(filter_.is_valid())
+        self.assertIsNotNone(ApplyEntryFilter.get_generated_validation())
+        self.assertIsNone(filter_.get_generated_filter())
+        self.assertEqual(filter_.filter(filter_.validated_data).count(), 3)
@@ -1,16 +1,27 @@
 import datetime
+import itertools
+import json
 import random
+from unittest import mock
 
+import django
+from django.http import QueryDict
+from django.test import override_settings
 from model_bakery import baker
+from rest_framework.fields import DateField as RestDateField
+from rest_framework.fields import DateTimeField as RestDateTimeField
+from rest_framework.fields import TimeField as RestTimeField
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.test import APIRequestFactory
 
 from djfilters import filters
+from djfilters.filters import dateparse, parsing
 from tests.filters import BooleanFilter
 
 from .base import BaseTestCase
 from .models import (BooleanModel, DateFieldModel, EmailModel, IpModel,
-                     NumberModel, RelatedSlugIdModel, TextModel, URLModel)
+                     NumberModel, RelatedIntIdModel, RelatedSlugIdModel,
+                     TextModel, URLModel)
 
 factory = APIRequestFactory()
 
@@ -1061,6 +1072,121 @@ class ListFieldTestCases(BaseTestCase):
         chars = sorted(filtered_queryset.values_list('char', flat=True))
         self.assertEqual(chars, ['[abc]'])
 
+    def test_duplicates_are_removed(self):
+        class Filter(filters.Filter):
+            number = filters.ListField(child=filters.IntegerField(), unique=True)
+            numbers = filters.ListField(child=filters.IntegerField(), source='number')
+
+        for query in ('number=3,4,3,5,4', 'number=[3,4,3,5,4]', 'number=3&number=4&number=3&number=5'):
+            filter_ = Filter(data=QueryDict(query))
+            self.assertTrue(filter_.is_valid(), filter_.errors)
+            self.assertEqual(filter_.validated_data['number'], [3, 4, 5])
+        filter_ = Filter(data=QueryDict('numbers=3,4,3'))
+        self.assertTrue(filter_.is_valid(), filter_.errors)
+        self.assertEqual(filter_.validated_data['number'], [3, 4, 3])
+        self.assertFalse(Filter(data={'number': [1, True]}).is_valid())
+
+    def test_parsing_stops_after_max_length(self):
+        class Filter(filters.Filter):
+            number = filters.ListField(max_length=3, child=filters.IntegerField())
+            unique = filters.ListField(max_length=3, child=filters.IntegerField(), unique=True)
+
+        field = Filter().fields['number']
+        self.assertEqual(field.get_value(QueryDict('number=1,2,1,3,2,4,5,x')), ['1', '2', '1', '3'])
+        self.assertEqual(Filter().fields['unique'].get_value(QueryDict('unique=1,2,1,3,2,4,5,x')), ['1', '2', '3', '4'])
+        # Invalid JSON after the limit isn't reached.
+        self.assertEqual(field.get_value(QueryDict('number=[1,2,3,4,5,x]')), [1, 2, 3, 4])
+        self.assertEqual(field.get_value(QueryDict('number=[1,x,3,4,5]')), ['[1,x,3,4,5]'])
+        self.assertEqual(field.get_value(QueryDict('number=[1, 2, 3, 4, 5, x]')), [1, 2, 3, 4])
+        self.assertEqual(field.get_value(QueryDict('number=[1,2,1]')), [1, 2, 1])
+        self.assertEqual(field.get_value({'number': list(range(10))}), [0, 1, 2, 3])
+        for query in ('number=' + ','.join(map(str, range(100000))), 'number=[%s]' % ','.join(map(str, range(100000)))):
+            filter_ = Filter(data=QueryDict(query))
+            self.assertFalse(filter_.is_valid())
+            self.assertEqual(filter_.errors['number'], ['Ensure this field has no more than 3 elements.'])
+
+
+class ParsingTestCases(BaseTestCase):
+    def test_iter_separated(self):
+        for raw in ('', ',', 'a', 'a,,b', ',a,b,', 'abc,de,' * 5, 'a' * 10 + ',b'):
+            for window_size in (1, 2, 3, 100):
+                with self.subTest(raw=raw, window_size=window_size), \
+                        mock.patch.object(parsing, 'WINDOW_SIZE', window_size):
+                    self.assertEqual(list(parsing.iter_separated(raw, ',')), raw.split(','))
+                    self.assertEqual(list(parsing.iter_separated(raw, ',,')), raw.split(',,'))
+        self.assertEqual(list(parsing.iter_separated(' a,b ', ',', 1, 4)), ['a', 'b'])
+
+    def test_iter_json_array(self):
+        for raw in ('[]', '[ ]', '[1]', '[1, "a,b", [2, 3], {"c": null}, true]', ' [ 1 ,2 ] '):
+            start, end = parsing.strip_bounds(raw)
+            self.assertEqual(list(parsing.iter_json_array(raw, start, end)), json.loads(raw))
+        for raw in ('[1,]', '[,1]', '[1 2]', '[1', '1]', '[NaN]', '["a]'):
+            with self.subTest(raw=raw), self.assertRaises(ValueError):
+                list(parsing.iter_json_array(raw))
+
+    def test_collect(self):
+        self.assertEqual(parsing.collect(iter([1, 2, 1, 3]), limit=3), [1, 2, 1])
+        self.assertEqual(parsing.collect([1, 2, 1, True, 1.0, 'a', [1], [1]], unique=True), [1, 2, True, 1.0, 'a', [1], [1]])
+        with mock.patch.object(parsing, 'BATCH_SIZE', 2):
+            self.assertEqual(parsing.collect(iter('abacbdc'), unique=True), ['a', 'b', 'c', 'd'])
+            self.assertEqual(parsing.collect(iter('abacbdc'), limit=3, unique=True), ['a', 'b', 'c'])
+
+
+class DateParsingTestCases(BaseTestCase):
+    VALUES = [
+        '2024-01-31', '2024-1-31', '2024-02-30', '20240131', ' 2024-01-31', '2024-01-31\n', '\uff12\uff10\uff12\uff14-01-31',
+        '10:30', '10:30:00.250', '10:30:00.2', '10:30:00.1234567', '10:30:00+05:00', '1:30', '24:00',
+        '2024-01-31T10:30', '2024-01-31 10:30:00.123456', '2024-01-31T10:30:00Z', '2024-01-31T10:30:00.1Z',
+        '2024-01-31T10:30:00+05:30', '2024-01-31T10:30:00 +05:30', '2024-01-31T10:30:00-0130', '2024-01-31x10:30Z',
+        '2024-03-31T02:30:00', '2024-01-31T25:00', '2024-01-31T10:30:00+00:00Z', 'Z', '',
+    ]
+
+    def parse(self, field, value):
+        try:
+            parsed = field.to_internal_value(value)
+        except filters.ValidationError as exc:
+            return exc.detail
+        return parsed, getattr(parsed, 'tzinfo', None)
+
+    def test_parity_with_drf(self):
+        pairs = [
+            (filters.DateField, RestDateField, {}),
+            (filters.TimeField, RestTimeField, {}),
+            (filters.DateTimeField, RestDateTimeField, {}),
+            (filters.DateTimeField, RestDateTimeField, {'input_formats': ['iso-8601', '%Y']}),
+            (filters.DateField, RestDateField, {'input_formats': []}),
+        ]
+        # The parsers of Django before 4.0 and Python before 3.11. Only the
+        # strict parsing can be compared with DRF on Django before 4.0, as
+        # Django then parses with regular expressions only.
+        stricts = (True, False) if django.VERSION >= (4, 0) else (True,)
+        for strict, reads_z in itertools.product(stricts, (True, False)):
+            for use_tz, time_zone in ((False, 'UTC'), (True, 'UTC'), (True, 'Europe/Paris')):
+                with mock.patch.object(dateparse, '_strict', strict), \
+                        mock.patch.object(dateparse, '_reads_z', reads_z), \
+                        mock.patch.object(filters.DateField, 'to_internal_value', filters.IsoInputMixin.to_internal_value), \
+                        mock.patch.object(filters.DateTimeField, 'to_internal_value', filters.IsoInputMixin.to_internal_value), \
+                        override_settings(USE_TZ=use_tz, TIME_ZONE=time_zone):
+                    for filter_class, rest_class, kwargs in pairs:
+                        field, rest_field = filter_class(**kwargs), rest_class(**kwargs)
+                        for value in self.VALUES:
+                            with self.subTest(strict=strict, reads_z=reads_z, time_zone=time_zone if use_tz else None,
+                                              field=filter_class.__name__, kwargs=kwargs, value=value):
+                                self.assertEqual(self.parse(field, value), self.parse(rest_field, value))
+
+    def test_other_formats_are_left_to_drf(self):
+        field = filters.DateField(input_formats=['%d/%m/%Y', 'iso-8601'])
+        with mock.patch.object(filters.DateField, 'to_internal_value', filters.IsoInputMixin.to_internal_value), \
+                mock.patch.object(filters.DateField, 'parse_iso') as parse_iso:
+            self.assertEqual(field.to_internal_value('2024-01-31'), datetime.date(2024, 1, 31))
+        parse_iso.assert_not_called()
+        with mock.patch.object(filters.TimeField, 'to_internal_value', RestTimeField.to_internal_value), \
+                mock.patch.object(filters.TimeField, 'parse_iso') as parse_iso:
+            self.assertEqual(filters.TimeField().to_internal_value('10:30'), datetime.time(10, 30))
+        parse_iso.assert_not_called()
+        with mock.patch.object(dateparse, '_strict', True):
+            self.assertIsNone(dateparse.parse_iso_datetime('2024-01-31T10:30:00+05'))
+
 
 class RangeFieldTestCases(BaseTestCase):
     @classmethod
@@ -1153,3 +1279,237 @@ class RangeFieldTestCases(BaseTestCase):
         self.assertTrue(
             all([(5 <= v.number <= 10) for v in filtered_queryset])
         )
+
+
+class RelatedListFieldTestCases(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.related = baker.make(RelatedIntIdModel, _quantity=20)
+        baker.make(TextModel, int_fk=iter(cls.related), _quantity=20)
+
+    def get_filter_class(self):
+        class Filter(filters.Filter):
+            ids = filters.ListField(
+                child=filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all()),
+                source='int_fk'
+            )
+        return Filter
+
+    def test_related_items_validated_with_one_query(self):
+        ids = [related.id for related in self.related]
+        filter_ = self.get_filter_class()(data={'ids': ids})
+        with self.assertNumQueries(1):
+            self.assertTrue(filter_.is_valid())
+        self.assertEqual(filter_.validated_data['int_fk'], self.related)
+
+    def test_filter_with_related_items(self):
+        ids = [related.id for related in self.related[:5]]
+        request, view, filtered_queryset = self.filter_query(
+            filter_class=self.get_filter_class(),
+            queryset=TextModel.objects.all(),
+            query={'ids': ','.join(str(pk) for pk in ids)}
+        )
+        self.assertEqual(sorted(filtered_queryset.values_list('int_fk', flat=True)), ids)
+
+    def test_missing_related_items(self):
+        missing = max(related.id for related in self.related) + 1
+        message = (
+            "{{'ids': {{1: [ErrorDetail(string='Invalid pk \"{missing}\" - object does not exist.', code='does_not_exist')], "
+            "2: [ErrorDetail(string='Incorrect type. Expected pk value, received bool.', code='incorrect_type')], "
+            "3: [ErrorDetail(string='Incorrect type. Expected pk value, received str.', code='incorrect_type')]}}}}"
+        ).format(missing=missing)
+        filter_ = self.get_filter_class()(data={'ids': [self.related[0].id, missing, True, 'abc']})
+        self.assertFalse(filter_.is_valid())
+        self.assertEqual(str(filter_.errors), message)
+
+    def test_null_related_item(self):
+        filter_ = self.get_filter_class()(data={'ids': [self.related[0].id, None]})
+        self.assertFalse(filter_.is_valid())
+        self.assertEqual(filter_.errors['ids'][1][0].code, 'null')
+
+
+class TrustedIdsTestCases(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.related = baker.make(RelatedIntIdModel, _quantity=3)
+        cls.slugs = baker.make(RelatedSlugIdModel, _quantity=3)
+        baker.make(TextModel, int_fk=iter(cls.related), slug_fk=iter(cls.slugs), _quantity=3)
+
+    def test_trusted_primary_key_without_queries(self):
+        class Filter(filters.Filter):
+            int_fk = filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all(), trust_ids=True)
+
+        filter_ = Filter(data={'int_fk': str(self.related[0].id)}, queryset=TextModel.objects.all())
+        with self.assertNumQueries(0):
+            self.assertTrue(filter_.is_valid())
+            qs = filter_.filter(filter_.validated_data)
+        self.assertEqual(filter_.validated_data['int_fk'], self.related[0].id)
+        self.assertEqual(list(qs.values_list('int_fk', flat=True)), [self.related[0].id])
+
+    def test_trusted_missing_primary_key(self):
+        class Filter(filters.Filter):
+            int_fk = filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all(), trust_ids=True)
+
+        request, view, filtered_queryset = self.filter_query(
+            filter_class=Filter,
+            queryset=TextModel.objects.all(),
+            query={'int_fk': max(related.id for related in self.related) + 1}
+        )
+        self.assertEqual(filtered_queryset.count(), 0)
+
+    def test_trusted_primary_key_with_invalid_format(self):
+        class Filter(filters.Filter):
+            int_fk = filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all(), trust_ids=True)
+
+        self.validation_error(
+            queryset=TextModel.objects.all(),
+            filter_class=Filter,
+            query={'int_fk': 'abc'},
+            message="{'int_fk': [ErrorDetail(string='Incorrect type. Expected pk value, received str.', code='incorrect_type')]}"
+        )
+
+    def test_trusted_slug(self):
+        class Filter(filters.Filter):
+            slug = filters.SlugRelatedField(
+                queryset=RelatedSlugIdModel.objects.all(), slug_field='text', source='slug_fk', trust_ids=True
+            )
+
+        filter_ = Filter(data={'slug': self.slugs[1].text}, queryset=TextModel.objects.all())
+        with self.assertNumQueries(0):
+            self.assertTrue(filter_.is_valid())
+            qs = filter_.filter(filter_.validated_data)
+        self.assertEqual(list(qs.values_list('slug_fk', flat=True)), [str(self.slugs[1].id)])
+
+    def test_trusted_list_of_primary_keys(self):
+        class Filter(filters.Filter):
+            int_fk = filters.ListField(
+                child=filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all(), trust_ids=True)
+            )
+
+        ids = [related.id for related in self.related[:2]]
+        filter_ = Filter(data={'int_fk': ids}, queryset=TextModel.objects.all())
+        with self.assertNumQueries(0):
+            self.assertTrue(filter_.is_valid())
+            qs = filter_.filter(filter_.validated_data)
+        self.assertEqual(sorted(qs.values_list('int_fk', flat=True)), ids)
+
+    def test_trusted_list_of_slugs(self):
+        class Filter(filters.Filter):
+            slugs = filters.ListField(source='slug_fk', child=filters.SlugRelatedField(
+                queryset=RelatedSlugIdModel.objects.all(), slug_field='text', trust_ids=True
+            ))
+
+        filter_ = Filter(data={'slugs': [self.slugs[0].text, self.slugs[2].text]}, queryset=TextModel.objects.all())
+        with self.assertNumQueries(0):
+            self.assertTrue(filter_.is_valid())
+            qs = filter_.filter(filter_.validated_data)
+        self.assertEqual(sorted(qs.values_list('slug_fk', flat=True)), sorted([str(self.slugs[0].id), str(self.slugs[2].id)]))
+
+        with override_settings(DJFILTERS={'TRUST_RELATED_IDS': True}):
+            class Filter(filters.Filter):
+                int_fk = filters.ListField(child=filters.SlugRelatedField(
+                    queryset=RelatedIntIdModel.objects.all(), slug_field='text'
+                ))
+
+        filter_ = Filter(data={'int_fk': [self.related[1].text]}, queryset=TextModel.objects.all())
+        self.assertTrue(filter_.is_valid())
+        self.assertEqual(list(filter_.filter(filter_.validated_data).values_list('int_fk', flat=True)), [self.related[1].id])
+
+    def test_trusted_representation(self):
+        field = filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all(), trust_ids=True)
+        self.assertEqual(field.to_representation(self.related[0].id), self.related[0].id)
+        self.assertEqual(field.to_representation(self.related[0]), self.related[0].id)
+        field = filters.SlugRelatedField(queryset=RelatedSlugIdModel.objects.all(), slug_field='text', trust_ids=True)
+        self.assertEqual(field.to_representation(self.slugs[0].text), self.slugs[0].text)
+
+    def test_trusted_ids_setting(self):
+        class Filter(filters.ModelFilter):
+            class Meta:
+                model = TextModel
+                fields = ('int_fk',)
+
+        with override_settings(DJFILTERS={'TRUST_RELATED_IDS': True}):
+            filter_ = Filter(data={'int_fk': self.related[2].id})
+            with self.assertNumQueries(0):
+                self.assertTrue(filter_.is_valid())
+        self.assertEqual(filter_.validated_data['int_fk'], self.related[2].id)
+
+        filter_ = Filter(data={'int_fk': self.related[2].id})
+        with self.assertNumQueries(1):
+            self.assertTrue(filter_.is_valid())
+        self.assertEqual(filter_.validated_data['int_fk'], self.related[2])
+
+
+class SparseFieldsTestCases(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.text_models = baker.make(TextModel, _quantity=3)
+
+    def get_filter_class(self):
+        class Filter(filters.Filter):
+            sparse_fields = True
+
+            char = filters.CharField()
+            text = filters.CharField()
+            min_text = filters.CharField(source='text', lookup_expr='gte')
+            slug = filters.CharField()
+            ids = filters.ListField(source='id', child=filters.IntegerField())
+        return Filter
+
+    def test_only_supplied_fields_are_bound(self):
+        Filter = self.get_filter_class()
+        filter_ = Filter(data={'char': self.text_models[0].char}, queryset=TextModel.objects.all())
+        self.assertEqual(list(filter_.fields), ['char'])
+        self.assertTrue(filter_.is_valid())
+        self.assertEqual(filter_.validated_data, {'char': self.text_models[0].char})
+        self.assertEqual(list(filter_.filter(filter_.validated_data)), [self.text_models[0]])
+
+    def test_source_root_and_list_keys(self):
+        Filter = self.get_filter_class()
+        self.assertEqual(list(Filter(data={'text': 'a'}).fields), ['text', 'min_text'])
+        self.assertEqual(list(Filter(data={'min_text': 'a'}).fields), ['text', 'min_text'])
+        self.assertEqual(list(Filter(data={'ids[0]': '1'}).fields), ['ids'])
+
+    def test_required_and_defaulted_fields_are_bound(self):
+        class Filter(filters.Filter):
+            sparse_fields = True
+
+            char = filters.CharField(required=True)
+            text = filters.CharField(default='text')
+            slug = filters.CharField()
+            flag = filters.BooleanField()
+
+        self.assertEqual(list(Filter(data={}).fields), ['char', 'text'])
+        # Missing form keys validate to `False` for a `BooleanField`.
+        self.assertEqual(list(Filter(data=QueryDict()).fields), ['char', 'text', 'flag'])
+
+    def test_all_fields_without_data(self):
+        Filter = self.get_filter_class()
+        self.assertEqual(list(Filter().fields), ['char', 'text', 'min_text', 'slug', 'ids'])
+
+    def test_same_results_as_dense_filter(self):
+        Filter = self.get_filter_class()
+        DenseFilter = type('DenseFilter', (Filter,), {'sparse_fields': False})
+        query = {'min_text': self.text_models[1].text, 'ids': ','.join(str(obj.id) for obj in self.text_models)}
+        results = []
+        for filter_class in (DenseFilter, Filter, Filter):
+            request, view, filtered_queryset = self.filter_query(
+                filter_class=filter_class, queryset=TextModel.objects.all(), query=query
+            )
+            results.append((request.cleaned_args, set(filtered_queryset)))
+        self.assertEqual(results[1], results[0])
+        self.assertEqual(results[2], results[0])
+
+    def test_model_filter(self):
+        class Filter(filters.ModelFilter):
+            sparse_fields = True
+
+            class Meta:
+                model = TextModel
+                fields = '__all__'
+
+        filter_ = Filter(data={'char': self.text_models[0].char})
+        self.assertEqual(list(filter_.fields), ['char'])
+        self.assertTrue(filter_.is_valid())
+        self.assertEqual(list(filter_.filter(filter_.validated_data)), [self.text_models[0]])
+        self.assertEqual(len(Filter().fields), len(Filter.get_compiled()['fields']))
@@ -0,0 +1,224 @@
+from unittest import mock, skipIf
+
+from django.db import connection
+from django.http import QueryDict
+from django.test import override_settings
+from model_bakery import baker
+
+from djfilters import filters
+from djfilters.filters import lookups
+
+from .base import BaseTestCase
+from .models import RelatedIntIdModel, TextModel
+
+
+class ListFilter(filters.Filter):
+    ids = filters.ListField(source='id', child=filters.IntegerField())
+    chars = filters.ListField(source='char', child=filters.CharField())
+    related = filters.ListField(source='int_fk', child=filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all()))
+
+
+class Connection(object):
+    def __init__(self, vendor, supports_json_field=True):
+        self.vendor = vendor
+        self.features = mock.Mock(supports_json_field=supports_json_field)
+
+
+class InListTestCase(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.related = baker.make(RelatedIntIdModel, _quantity=3)
+        cls.objects = [
+            baker.make(TextModel, char='char %d' % index, int_fk=cls.related[index % 3]) for index in range(10)
+        ]
+
+    def filter(self, query, combine_lookups=False):
+        filter_ = ListFilter(data=QueryDict(query), queryset=TextModel.objects.order_by('id'))
+        filter_.combine_lookups = combine_lookups
+        self.assertTrue(filter_.is_valid(), filter_.errors)
+        return filter_.filter(filter_.validated_data)
+
+    def test_plan_lookups(self):
+        plan = ListFilter(queryset=TextModel.objects.all()).get_filter_plan()
+        lookups_ = {entry.name: entry.lookup for entry in plan}
+        self.assertEqual(lookups_, {
+            'ids': 'id__djfilters_in',
+            'chars': 'char__djfilters_in',
+            'related': 'int_fk__djfilters_in',
+        })
+
+        class RangeFilter(filters.Filter):
+            window = filters.RangeField(source='id', child=filters.IntegerField())
+
+        self.assertEqual(RangeFilter(queryset=TextModel.objects.all()).get_filter_plan()[0].lookup, 'id__range')
+        with override_settings(DJFILTERS={'IN_LIST_STRATEGY': None}):
+            plan = ListFilter(queryset=TextModel.objects.all()).get_filter_plan()
+            self.assertEqual(plan[0].lookup, 'id__in')
+
+    def test_strategies(self):
+        ids = [obj.id for obj in self.objects[2:7]]
+        query = 'ids={ids},{first}&chars=char 3,char 4,char 5,char 6&related={related}'.format(
+            ids=','.join(map(str, ids)), first=ids[0], related=','.join(str(obj.id) for obj in self.related[:2])
+        )
+        expected = [obj for obj in self.objects[3:7] if obj.int_fk in self.related[:2]]
+        fragments = {
+            'chunked': ' OR ',
+            'values': 'IN (VALUES ',
+            'json': 'json_each(',
+            'any': '= ANY(',
+        }
+        for strategy in ('in', 'chunked', 'values', 'json', 'any'):
+            for combine_lookups in (False, True):
+                with self.subTest(strategy=strategy, combine_lookups=combine_lookups):
+                    with override_settings(DJFILTERS={'IN_LIST_STRATEGY': strategy}), \
+                            mock.patch.object(lookups, 'CHUNK_SIZE', 2):
+                        qs = self.filter(query, combine_lookups)
+                        self.assertEqual(list(qs), expected)
+                        sql = str(qs.query)
+                    supported = strategy == 'in' or lookups._strategies[strategy](
+                        connection, 'id', [], [1]
+                    ) is not None
+                    if strategy in fragments and supported:
+                        self.assertIn(fragments[strategy], sql)
+
+    def test_auto_strategy(self):
+        self.assertEqual(lookups.choose_strategy(Connection('postgresql'), 1000), 'in')
+        self.assertEqual(lookups.choose_strategy(Connection('postgresql'), 1001), 'any')
+        self.assertEqual(lookups.choose_strategy(Connection('sqlite'), 1001), 'json')
+        self.assertEqual(lookups.choose_strategy(Connection('mysql'), 1001), 'in')
+        with override_settings(DJFILTERS={'IN_LIST_THRESHOLD': 10}):
+            self.assertEqual(lookups.choose_strategy(Connection('postgresql'), 11), 'any')
+        with override_settings(DJFILTERS={'IN_LIST_STRATEGY': 'values'}):
+            self.assertEqual(lookups.choose_strategy(Connection('postgresql'), 1), 'values')
+
+    def test_strategy_sql(self):
+        postgresql = Connection('postgresql')
+        self.assertEqual(
+            lookups.any_strategy(postgresql, '"id"', [], [1, 2]),
+            ('"id" = ANY(%s)', [[1, 2]])
+        )
+        self.assertEqual(
+            lookups.values_strategy(postgresql, '"id"', [], [1, 2]),
+            ('"id" IN (VALUES (%s), (%s))', [1, 2])
+        )
+        self.assertIsNone(lookups.json_strategy(postgresql, '"id"', [], [1, 2]))
+        self.assertIsNone(lookups.any_strategy(Connection('sqlite'), '"id"', [], [1, 2]))
+        self.assertIsNone(lookups.json_strategy(Connection('sqlite'), '"id"', [], [1, True]))
+        self.assertIsNone(lookups.json_strategy(Connection('sqlite', supports_json_field=False), '"id"', [], [1, 2]))
+        with mock.patch.object(lookups, 'CHUNK_SIZE', 2):
+            self.assertEqual(
+                lookups.chunked_strategy(postgresql, '"id"', [], [1, 2, 3]),
+                ('("id" IN (%s, %s) OR "id" IN (%s))', [1, 2, 3])
+            )
+
+    def test_sqlite_without_json1(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only.')
+        ids = ','.join(str(obj.id) for obj in self.objects[:3])
+        with override_settings(DJFILTERS={'IN_LIST_THRESHOLD': 2}), \
+                mock.patch.object(connection.features, 'supports_json_field', False):
+            qs = self.filter('ids=' + ids)
+            self.assertEqual(list(qs), self.objects[:3])
+            self.assertNotIn('json_each(', str(qs.query))
+
+    def test_custom_strategy(self):
+        def first_strategy(connection, lhs, lhs_params, params):
+            return '%s = %%s' % lhs, lhs_params + [params[0]]
+
+        lookups.register_strategy('first', first_strategy)
+        self.addCleanup(lookups._strategies.pop, 'first')
+        with override_settings(DJFILTERS={'IN_LIST_STRATEGY': 'first'}):
+            ids = '{0},{1}'.format(self.objects[1].id, self.objects[2].id)
+            self.assertEqual(list(self.filter('ids=' + ids)), [self.objects[1]])
+
+    @skipIf(connection.vendor != 'sqlite', 'SQLite only')
+    def test_lists_beyond_sqlite_variable_limit(self):
+        ids = [obj.id for obj in self.objects[:3]] + list(range(100000, 140000))
+        self.assertEqual(list(self.filter('ids=' + ','.join(map(str, ids)))), self.objects[:3])
+
+    @skipIf(connection.vendor != 'postgresql', 'PostgreSQL only')
+    def test_any_on_postgresql(self):
+        with override_settings(DJFILTERS={'IN_LIST_THRESHOLD': 1}):
+            qs = self.filter('ids={0},{1}'.format(self.objects[1].id, self.objects[2].id))
+            self.assertIn('= ANY(', str(qs.query))
+            self.assertEqual(list(qs), self.objects[1:3])
+
+
+class RunsFilter(filters.Filter):
+    ids = filters.ListField(source='id', child=filters.IntegerField(), compress_runs=True)
+    related = filters.ListField(
+        source='int_fk', compress_runs=True,
+        child=filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all())
+    )
+
+
+class ShortRunsFilter(filters.Filter):
+    ids = filters.ListField(source='id', child=filters.IntegerField(), compress_runs=True, max_length=5)
+    pks = filters.ListField(source='int_fk', child=filters.IntegerField(), compress_runs=True)
+
+
+class RunsTestCase(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.related = baker.make(RelatedIntIdModel, _quantity=4)
+        cls.objects = [baker.make(TextModel, int_fk=cls.related[index % 4]) for index in range(20)]
+
+    def filter(self, query):
+        filter_ = RunsFilter(data=QueryDict(query), queryset=TextModel.objects.order_by('id'))
+        self.assertTrue(filter_.is_valid(), filter_.errors)
+        return filter_.filter(filter_.validated_data)
+
+    def test_split_runs(self):
+        self.assertEqual(lookups.split_runs([9, 1, 2, 3, 5, 6, 8, 10, 11, 7]), ([(1, 3), (5, 11)], []))
+        self.assertEqual(lookups.split_runs([1, 2, 4, 10, 11, 12]), ([(10, 12)], [1, 2, 4]))
+        self.assertEqual(lookups.split_runs([1, 2, '3']), ([], [1, 2, '3']))
+
+    def test_plan_lookups(self):
+        plan = RunsFilter(queryset=TextModel.objects.all()).get_filter_plan()
+        self.assertEqual(plan[0].lookup, 'id__djfilters_runs')
+        self.assertEqual(plan[1].lookup, 'int_fk__djfilters_runs')
+        with override_settings(DJFILTERS={'IN_LIST_STRATEGY': None}):
+            plan = RunsFilter(queryset=TextModel.objects.all()).get_filter_plan()
+            self.assertEqual(plan[0].lookup, 'id__djfilters_runs')
+
+    def test_runs(self):
+        ids = [obj.id for obj in self.objects]
+        query = 'ids={0},{1}-{2},{3}-{4},{5}'.format(ids[0], ids[2], ids[9], ids[12], ids[13], ids[15])
+        qs = self.filter(query)
+        self.assertEqual(list(qs), [self.objects[index] for index in (0, 2, 3, 4, 5, 6, 7, 8, 9, 12, 13, 15)])
+        sql = str(qs.query)
+        self.assertEqual(sql.count('BETWEEN'), 1)
+        self.assertIn(' IN (', sql)
+        # Runs given as separate values are compressed too.
+        qs = self.filter('ids=' + ','.join(map(str, reversed(ids[4:10]))))
+        self.assertEqual(list(qs), self.objects[4:10])
+        self.assertNotIn(' IN (', str(qs.query))
+
+    def test_related_runs(self):
+        pks = [obj.pk for obj in self.related]
+        query = 'related={0}-{1}'.format(pks[0], pks[2])
+        expected = [obj for obj in self.objects if obj.int_fk in self.related[:3]]
+        self.assertEqual(list(self.filter(query)), expected)
+        self.assertIn('BETWEEN', str(self.filter(query).query))
+
+        filter_ = RunsFilter(data=QueryDict('related={0}-{1}'.format(pks[0], pks[-1] + 2)), queryset=TextModel.objects.all())
+        self.assertFalse(filter_.is_valid())
+        self.assertEqual(set(filter_.errors['related']), {4, 5})
+
+    def test_run_errors(self):
+        for fast_validation in (False, True):
+            filter_class = type('ShortRunsFilter', (ShortRunsFilter,), {'fast_validation': fast_validation})
+            with self.subTest(fast_validation=fast_validation):
+                filter_ = filter_class(data=QueryDict('ids=1-6&pks=5-1'), queryset=TextModel.objects.all())
+                self.assertFalse(filter_.is_valid())
+                self.assertEqual(filter_.errors['ids'], ['Ensure this field has no more than 5 elements.'])
+                self.assertEqual(filter_.errors['pks'], {0: ['A valid integer is required.']})
+
+                with mock.patch.object(filters.ListField, 'MAX_RUN_LENGTH', 10):
+                    filter_ = filter_class(data=QueryDict('pks=1-10,12'), queryset=TextModel.objects.all())
+                    self.assertFalse(filter_.is_valid())
+                    self.assertEqual(filter_.errors['pks'], ['Ensure this field has no more than 10 elements.'])
+
+    def test_integer_children_only(self):
+        with self.assertRaises(AssertionError):
+            filters.ListField(child=filters.CharField(), compress_runs=True)
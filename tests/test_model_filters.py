@@ -1,3 +1,5 @@
+from unittest import mock
+
 from django.core import exceptions as django_exceptions
 from model_bakery import baker
 from rest_framework.test import APIRequestFactory
@@ -462,3 +464,55 @@ class ModelForeignKeyTestCase(BaseTestCase):
             query={'int_fk': number + 1},
             message="{'int_fk': [ErrorDetail(string='Invalid pk \"11\" - object does not exist.', code='does_not_exist')]}"
         )
+
+
+class ModelFilterCompiledFieldsTestCase(BaseTestCase):
+    def get_filter_class(self):
+        class Filter(filters.ModelFilter):
+            class Meta:
+                model = TextModel
+                fields = ('char', 'text')
+
+        return Filter
+
+    def test_fields_are_built_once_per_class(self):
+        Filter = self.get_filter_class()
+        with mock.patch.object(Filter, 'build_fields', wraps=Filter().build_fields) as build_fields:
+            Filter().fields
+            Filter().fields
+        self.assertEqual(build_fields.call_count, 1)
+
+    def test_instances_get_independent_fields(self):
+        Filter = self.get_filter_class()
+        first, second = Filter(), Filter()
+        self.assertEqual(list(first.fields), ['char', 'text'])
+        self.assertIsNot(first.fields['char'], second.fields['char'])
+        self.assertIs(first.fields['char'].parent, first)
+        self.assertIs(second.fields['char'].parent, second)
+
+    def test_meta_change_rebuilds_fields(self):
+        Filter = self.get_filter_class()
+        self.assertEqual(list(Filter().fields), ['char', 'text'])
+        Filter.Meta.fields = ('slug',)
+        self.assertEqual(list(Filter().fields), ['slug'])
+        Filter.Meta.extra_kwargs = {'slug': {'lookup_expr': 'icontains'}}
+        self.assertEqual(Filter().fields['slug'].lookup_expr, 'icontains')
+        Filter.Meta.extra_kwargs['slug']['lookup_expr'] = 'startswith'
+        self.assertEqual(Filter().fields['slug'].lookup_expr, 'startswith')
+
+    def test_invalidate_compiled(self):
+        Filter = self.get_filter_class()
+        compiled = Filter.get_compiled()
+        Filter.invalidate_compiled()
+        self.assertIsNot(Filter.get_compiled(), compiled)
+
+    def test_subclass_does_not_share_compiled_fields(self):
+        Filter = self.get_filter_class()
+
+        class SubFilter(Filter):
+            class Meta:
+                model = TextModel
+                fields = ('slug',)
+
+        self.assertEqual(list(Filter().fields), ['char', 'text'])
+        self.assertEqual(list(SubFilter().fields), ['slug'])
@@ -0,0 +1,353 @@
+from unittest import mock
+
+from django.core.exceptions import FieldError
+from django.db.models import Count, QuerySet
+from django.test import override_settings
+from model_bakery import baker
+
+from djfilters import filters
+from djfilters.cache import get_plan_cache
+from djfilters.filters import plan
+
+from .base import BaseTestCase
+from .models import NumberModel, RelatedIntIdModel, TaggedModel, TextModel
+
+
+class FilterPlanTestCase(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        related = baker.make(RelatedIntIdModel, text='Related', _quantity=2)
+        baker.make(TextModel, char='Lorem Ipsum', int_fk=related[0], _quantity=3)
+        baker.make(TextModel, char='Neque porro', int_fk=related[1], _quantity=3)
+        cls.related = related
+
+    def test_plan_is_built_once_per_class(self):
+        class Filter(filters.Filter):
+            char = filters.CharField()
+
+        with mock.patch.object(plan, 'build_entry', wraps=plan.build_entry) as build_entry:
+            Filter(queryset=TextModel.objects.all()).filter({'char': 'Lorem Ipsum'})
+            Filter(queryset=TextModel.objects.all()).filter({'char': 'Neque porro'})
+        self.assertEqual(build_entry.call_count, 1)
+
+    def test_plan_entries(self):
+        class Filter(filters.Filter):
+            char = filters.CharField(lookup_expr='icontains', exclude=True, distinct=True)
+            related = filters.CharField(source='int_fk.id')
+            related_text = filters.CharField(source='int_fk.text')
+            window = filters.RangeField(lookup_expr=['gt', 'lt'], child=filters.IntegerField(), source='number')
+            search = filters.CharField()
+
+            def filter_search(self, qs, value):
+                return qs
+
+        entries = {entry.name: entry for entry in Filter().get_filter_plan()}
+
+        self.assertEqual(entries['char'].lookup, 'char__icontains')
+        self.assertTrue(entries['char'].exclude)
+        self.assertTrue(entries['char'].distinct)
+        self.assertEqual(entries['related'].lookup, 'int_fk_id__exact')
+        self.assertEqual(entries['related'].key, 'int_fk')
+        self.assertEqual(entries['related_text'].lookup, 'int_fk__text__exact')
+        self.assertEqual(entries['related_text'].parts, ['int_fk', 'text'])
+        self.assertEqual(entries['window'].lookup, ('number__gt', 'number__lt'))
+        self.assertIsNone(entries['search'].lookup)
+        self.assertIs(entries['search'].method, Filter.__dict__['filter_search'])
+
+    def test_plan_rebuilt_when_fields_change(self):
+        class Filter(filters.Filter):
+            char = filters.CharField()
+
+        first = Filter().get_filter_plan()
+        instance = Filter()
+        instance.fields['text'] = filters.CharField()
+        self.assertEqual([entry.name for entry in first], ['char'])
+        self.assertEqual([entry.name for entry in instance.get_filter_plan()], ['char', 'text'])
+
+    def test_fields_changed_by_instances(self):
+        class Filter(filters.Filter):
+            char = filters.CharField()
+
+            def __init__(self, *args, **kwargs):
+                lookup_expr = kwargs.pop('lookup_expr')
+                super(Filter, self).__init__(*args, **kwargs)
+                self.fields['char'].lookup_expr = lookup_expr
+
+        for fast_validation in (False, True):
+            for codegen in (False, True):
+                with mock.patch.multiple(Filter, fast_validation=fast_validation, codegen=codegen):
+                    Filter.invalidate_compiled()
+                    for lookup_expr, counts in (('icontains', [3, 3]), ('istartswith', [3, 0]), ('exact', [0, 0])):
+                        with self.subTest(fast_validation=fast_validation, codegen=codegen, lookup_expr=lookup_expr):
+                            filter_ = Filter(queryset=TextModel.objects.all(), lookup_expr=lookup_expr)
+                            self.assertEqual(filter_.get_filter_plan()[0].lookup, 'char__' + lookup_expr)
+                            self.assertEqual([filter_.filter({'char': value}).count() for value in ('lorem', 'ipsum')], counts)
+                    filter_ = Filter(queryset=TextModel.objects.all(), lookup_expr='icontains')
+                    filter_.fields['char'].exclude = True
+                    self.assertEqual(filter_.filter({'char': 'lorem'}).count(), 3)
+                    self.assertEqual(set(filter_.filter({'char': 'lorem'}).values_list('char', flat=True)), {'Neque porro'})
+
+    def test_nested_source_value(self):
+        class Filter(filters.Filter):
+            related = filters.CharField(source='int_fk.id')
+
+        entry = Filter().get_filter_plan()[0]
+        self.assertEqual(entry.get_kwargs({'id': 5}), {'int_fk_id__exact': 5})
+        self.assertEqual(entry.get_kwargs(5), {'int_fk_id__exact': 5})
+
+    def test_custom_make_query_is_not_planned(self):
+        class PrefixField(filters.CharField):
+            def make_query(self, qs, value):
+                return qs.filter(char__startswith=value)
+
+        class Filter(filters.Filter):
+            char = PrefixField()
+
+        self.assertIsNone(Filter().get_filter_plan()[0].lookup)
+        qs = Filter(queryset=TextModel.objects.all()).filter({'char': 'Lorem'})
+        self.assertEqual(set(qs.values_list('char', flat=True)), {'Lorem Ipsum'})
+
+    def test_static_filter_method(self):
+        class Filter(filters.Filter):
+            text = filters.CharField()
+
+            @staticmethod
+            def filter_text(qs, value):
+                return qs.filter(char=value)
+
+        qs = Filter(queryset=TextModel.objects.all()).filter({'text': 'Neque porro'})
+        self.assertEqual(set(qs.values_list('char', flat=True)), {'Neque porro'})
+
+    def test_filter_with_plan(self):
+        class Filter(filters.Filter):
+            char = filters.CharField(lookup_expr='icontains')
+            related = filters.IntegerField(source='int_fk.id')
+
+        request, view, filtered_queryset = self.filter_query(
+            filter_class=Filter,
+            queryset=TextModel.objects.all(),
+            query={'char': 'lorem', 'related': self.related[0].id}
+        )
+        self.assertEqual(filtered_queryset.count(), 3)
+
+    def test_range_with_multiple_lookups(self):
+        baker.make(NumberModel, number=7, float=1, decimal=1)
+
+        class Filter(filters.Filter):
+            number = filters.RangeField(lookup_expr=['gt', 'lt'], child=filters.IntegerField())
+
+        qs = Filter(queryset=NumberModel.objects.all()).filter({'number': [5, 10]})
+        self.assertEqual(list(qs.values_list('number', flat=True)), [7])
+
+
+class CombinedFilterTestCase(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        related = baker.make(RelatedIntIdModel, text='Related', _quantity=2)
+        baker.make(TextModel, char='Lorem Ipsum', text='one', int_fk=related[0], _quantity=3)
+        baker.make(TextModel, char='Lorem Ipsum', text='two', int_fk=related[1], _quantity=3)
+        baker.make(TextModel, char='Neque porro', text='one', int_fk=related[1], _quantity=3)
+        cls.related = related
+
+    def get_filter_class(self, combine_lookups):
+        class Filter(filters.Filter):
+            char = filters.CharField(lookup_expr='icontains')
+            related = filters.IntegerField(source='int_fk.id')
+            text = filters.CharField(exclude=True)
+            char_exclude = filters.CharField(source='char', exclude=True)
+            search = filters.CharField()
+
+            def filter_search(self, qs, value):
+                return qs.filter(text__startswith=value)
+
+        Filter.combine_lookups = combine_lookups
+        return Filter
+
+    def filter_ids(self, filter_class, data):
+        qs = filter_class(queryset=TextModel.objects.all()).filter(data)
+        return sorted(qs.values_list('id', flat=True))
+
+    def test_combined_matches_chained(self):
+        queries = [
+            {'char': 'lorem'},
+            {'char': 'lorem', 'int_fk': self.related[1].id},
+            {'char': 'lorem', 'text': 'two'},
+            {'text': 'two', 'char': 'Neque porro'},
+            {'text': 'two', 'search': 'o', 'int_fk': self.related[0].id},
+            {},
+        ]
+        for data in queries:
+            self.assertEqual(
+                self.filter_ids(self.get_filter_class(True), data),
+                self.filter_ids(self.get_filter_class(False), data),
+                data
+            )
+
+    def test_combined_clones_once_per_call(self):
+        data = {'char': 'lorem', 'int_fk': self.related[1].id, 'text': 'two'}
+        counts = {}
+        for combine_lookups in (False, True):
+            filter_ = self.get_filter_class(combine_lookups)(queryset=TextModel.objects.all())
+            with mock.patch.object(QuerySet, '_chain', autospec=True, side_effect=QuerySet._chain) as chain:
+                filter_.filter(data)
+            counts[combine_lookups] = chain.call_count
+        # `queryset.all()`, one `filter()` and one `exclude()`.
+        self.assertEqual(counts[True], 3)
+        self.assertGreater(counts[False], counts[True])
+
+    def test_same_lookup_on_several_fields(self):
+        class Filter(filters.Filter):
+            combine_lookups = True
+            char = filters.CharField(lookup_expr='icontains')
+            other = filters.CharField(source='char', lookup_expr='icontains')
+
+        qs = Filter(queryset=TextModel.objects.all()).filter({'char': 'lorem'})
+        self.assertEqual(qs.count(), 6)
+
+    def test_multivalued_relation_is_chained(self):
+        tags = baker.make(RelatedIntIdModel, text='Tag', _quantity=2)
+        tagged = baker.make(TaggedModel, text='Tagged')
+        tagged.tags.set(tags)
+
+        class Filter(filters.Filter):
+            combine_lookups = True
+            tag = filters.CharField(source='tags.text')
+            other_tag = filters.CharField(source='tags.text', lookup_expr='startswith')
+
+        filter_ = Filter(queryset=TaggedModel.objects.all())
+        entries = {entry.name: entry for entry in filter_.get_filter_plan()}
+        self.assertTrue(entries['tag'].multivalued)
+        qs = filter_.filter({'tags': {'text': 'Tag'}})
+        self.assertEqual(list(qs), [tagged] * 4)
+
+
+@override_settings(DJFILTERS={'PLAN_CACHE': {'MAXSIZE': 2}})
+class SignaturePlanTestCase(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        related = baker.make(RelatedIntIdModel, text='Related', _quantity=2)
+        baker.make(TextModel, char='Lorem Ipsum', text='one', int_fk=related[0], _quantity=3)
+        baker.make(TextModel, char='Neque porro', text='two', int_fk=related[1], _quantity=3)
+        cls.related = related
+
+    def setUp(self):
+        get_plan_cache().clear()
+
+    def get_filter_class(self):
+        class Filter(filters.Filter):
+            char = filters.CharField(lookup_expr='icontains')
+            related = filters.IntegerField(source='int_fk.id')
+            text = filters.CharField(exclude=True, distinct=True)
+            search = filters.CharField()
+
+            def filter_search(self, qs, value):
+                return qs.filter(text__startswith=value)
+
+        return Filter
+
+    def get_stats(self, filter_class):
+        return get_plan_cache().stats()['namespaces'][filter_class.get_cache_namespace()]
+
+    def test_plan_per_signature(self):
+        Filter = self.get_filter_class()
+        Filter(queryset=TextModel.objects.all()).filter({'char': 'lorem', 'search': 'o'})
+        Filter(queryset=TextModel.objects.all()).filter({'char': 'neque', 'search': 't'})
+        # Empty values don't count in the signature.
+        Filter(queryset=TextModel.objects.all()).filter({'char': 'lorem', 'search': 'o', 'text': ''})
+        self.assertEqual(self.get_stats(Filter), {'hits': 2, 'misses': 1, 'evictions': 0, 'size': 1, 'maxsize': 2})
+
+        Filter(queryset=TextModel.objects.all()).filter({'text': 'one'})
+        Filter(queryset=TextModel.objects.all()).filter({})
+        self.assertEqual(self.get_stats(Filter), {'hits': 2, 'misses': 3, 'evictions': 1, 'size': 2, 'maxsize': 2})
+
+    def test_signature_plan_steps(self):
+        Filter = self.get_filter_class()
+        entries = {entry.name: entry for entry in Filter(queryset=TextModel.objects.all()).get_filter_plan()}
+        signature_plan = plan.build_signature_plan(tuple(entries.values()), frozenset(['char', 'text', 'search']))
+        self.assertTrue(signature_plan.distinct)
+        self.assertEqual(signature_plan.combined, ())
+        self.assertEqual([entry.name for entry, apply in signature_plan.steps], ['char', 'text', 'search'])
+
+        signature_plan = plan.build_signature_plan(tuple(entries.values()), frozenset(['char', 'text']), True)
+        self.assertEqual(signature_plan.combined, (entries['char'], entries['text']))
+        self.assertEqual(signature_plan.steps, ())
+
+    def test_same_results_as_full_plan(self):
+        queries = [
+            {'char': 'lorem'},
+            {'char': 'lorem', 'int_fk': {'id': self.related[1].id}},
+            {'text': 'two', 'search': 'o'},
+            {'text': 'one', 'char': '', 'search': None},
+            {},
+        ]
+        for combine_lookups in (False, True):
+            Filter = self.get_filter_class()
+            Filter.combine_lookups = combine_lookups
+            for data in queries:
+                with self.subTest(data=data, combine_lookups=combine_lookups):
+                    specialized = Filter(queryset=TextModel.objects.all()).filter(data)
+                    with override_settings(DJFILTERS={'PLAN_CACHE': None}):
+                        full = Filter(queryset=TextModel.objects.all()).filter(data)
+                    self.assertEqual(str(specialized.query), str(full.query))
+
+    def test_custom_apply_entry(self):
+        class Filter(filters.Filter):
+            char = filters.CharField()
+
+            def apply_entry(self, qs, entry, value):
+                return super(Filter, self).apply_entry(qs, entry, value)
+
+        self.assertEqual(Filter(queryset=TextModel.objects.all()).filter({'char': 'Lorem Ipsum'}).count(), 3)
+        self.assertEqual(get_plan_cache().stats()['namespaces'], {})
+
+
+class LookupResolutionTestCase(BaseTestCase):
+    def test_resolve_lookup(self):
+        resolved = plan.resolve_lookup(TextModel, 'int_fk__text__icontains')
+        self.assertIs(plan.resolve_lookup(TextModel, 'int_fk__text__icontains'), resolved)
+        self.assertEqual(resolved.path, ('int_fk', 'text'))
+        self.assertEqual(resolved.field, RelatedIntIdModel._meta.get_field('text'))
+        self.assertEqual(resolved.lookups, ('icontains',))
+        self.assertFalse(resolved.multivalued)
+        self.assertTrue(plan.resolve_lookup(TaggedModel, 'tags__text__exact').multivalued)
+        self.assertEqual(plan.resolve_lookup(TextModel, 'id__exact').lookups, ('exact',))
+
+    def test_invalid_lookups(self):
+        with self.assertRaisesMessage(FieldError, "Cannot resolve keyword 'nope' into field"):
+            plan.resolve_lookup(TextModel, 'nope__exact')
+        with self.assertRaisesMessage(FieldError, "Unsupported lookup 'bogus' for CharField of TextModel."):
+            plan.resolve_lookup(TextModel, 'char__bogus')
+        with self.assertRaisesMessage(FieldError, "Unsupported lookup 'exact__x' for CharField of TextModel."):
+            plan.resolve_lookup(TextModel, 'char__exact__x')
+
+    def test_plan_entries_are_resolved(self):
+        class Filter(filters.Filter):
+            related = filters.CharField(source='int_fk.text')
+            ids = filters.RangeField(source='id', lookup_expr=['gte', 'lte'], child=filters.IntegerField())
+
+        entries = {entry.name: entry for entry in Filter(queryset=TextModel.objects.all()).get_filter_plan()}
+        self.assertEqual([resolved.lookup for resolved in entries['related'].resolved], ['int_fk__text__exact'])
+        self.assertEqual([resolved.lookup for resolved in entries['ids'].resolved], ['id__gte', 'id__lte'])
+        self.assertIsNone(Filter(queryset=[]).get_filter_plan()[0].resolved)
+
+    def test_annotations(self):
+        class Filter(filters.Filter):
+            text = filters.CharField()
+            n = filters.IntegerField()
+
+        tagged = baker.make(TaggedModel, text='x')
+        tagged.tags.set(baker.make(RelatedIntIdModel, _quantity=2))
+        untagged = baker.make(TaggedModel, text='y')
+        filter_ = Filter(queryset=TaggedModel.objects.annotate(n=Count('tags')).order_by('id'))
+        entry = filter_.get_filter_plan()[1]
+        self.assertEqual(entry.lookup, 'n__exact')
+        self.assertIsNone(entry.resolved)
+        self.assertTrue(entry.multivalued)
+        self.assertEqual(list(filter_.filter({'text': 'x'})), [tagged])
+        self.assertEqual(list(filter_.filter({'text': 'x', 'n': 2})), [tagged])
+        self.assertEqual(list(filter_.filter({'n': 0})), [untagged])
+        # Unknown lookups only fail on the requests using them.
+        filter_ = Filter(queryset=TaggedModel.objects.order_by('id'))
+        self.assertEqual(list(filter_.filter({'text': 'y'})), [untagged])
+        with self.assertRaises(FieldError):
+            filter_.filter({'n': 2})
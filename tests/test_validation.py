@@ -0,0 +1,391 @@
+import datetime
+import math
+from unittest import mock
+
+from django.http import QueryDict
+from model_bakery import baker
+from rest_framework.fields import ListField as RestListField
+
+from djfilters import compat, filters
+from djfilters.filters.validation import (convert_generic, convert_integer,
+                                          convert_list, get_batch_converter,
+                                          get_converter, validate_value)
+
+from .base import BaseTestCase
+from .models import RelatedIntIdModel, TextModel
+
+
+class ParityFilter(filters.Filter):
+    integer = filters.IntegerField(min_value=0, max_value=100)
+    number = filters.FloatField()
+    price = filters.DecimalField(max_digits=5, decimal_places=2)
+    char = filters.CharField(max_length=5)
+    blank = filters.CharField(allow_blank=True)
+    untrimmed = filters.CharField(trim_whitespace=False)
+    email = filters.EmailField()
+    slug = filters.SlugField()
+    ip = filters.IPAddressField()
+    flag = filters.BooleanField()
+    null_flag = filters.BooleanField(allow_null=True)
+    choice = filters.ChoiceField(choices=[1, 2, 'a'])
+    blank_choice = filters.ChoiceField(choices=['a'], allow_blank=True)
+    day = filters.DateField()
+    formatted_day = filters.DateField(input_formats=['%d/%m/%Y'])
+    moment = filters.DateTimeField()
+    time = filters.TimeField()
+    duration = filters.DurationField()
+    ids = filters.ListField(child=filters.IntegerField(min_value=1), max_length=3)
+    names = filters.ListField(child=filters.CharField(max_length=3), allow_empty=False)
+    days = filters.RangeField(child=filters.DateField())
+    related = filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all())
+    related_ids = filters.ListField(child=filters.PrimaryKeyRelatedField(queryset=RelatedIntIdModel.objects.all()))
+    nested = filters.CharField(source='int_fk.text')
+
+    def validate_integer(self, value):
+        if value == 13:
+            raise filters.ValidationError('Unlucky.')
+        return value * 2
+
+
+class FastParityFilter(ParityFilter):
+    fast_validation = True
+
+
+class GeneratedParityFilter(ParityFilter):
+    codegen = True
+
+
+QUERIES = [
+    '',
+    'page=2',
+    'integer=5&number=1.5&price=3.14&char=abc',
+    'integer=5.0&number=1e3&price=1&char=%20abc%20',
+    'integer=-1&number=abc&price=1.234&char=abcdef',
+    'integer=101&number=inf&price=abc&char=',
+    'integer=13',
+    'integer=&number=&price=',
+    'integer=1_000&number=1_0',
+    'integer=%205%20&number=%201.5%20',
+    'integer=' + '1' * 1001,
+    'integer=abc&integer=7',
+    'blank=&untrimmed=%20a%20&char=%20%20',
+    'untrimmed=%20%20&untrimmed=',
+    'email=a@b.co&slug=a-b&ip=127.0.0.1',
+    'email=nope&slug=a%20b&ip=999.1.1.1',
+    'flag=true&null_flag=null',
+    'flag=Yes&null_flag=',
+    'flag=1&null_flag=0',
+    'flag=maybe&null_flag=maybe',
+    'choice=1&blank_choice=',
+    'choice=a&blank_choice=a',
+    'choice=3&blank_choice=b',
+    'day=2020-01-31&formatted_day=31/01/2020',
+    'day=2020-02-31&formatted_day=2020-01-31',
+    'day=31/01/2020&moment=2020-01-31T10:00:00Z&time=10:00&duration=1%2000:00:00',
+    'moment=nope&time=25:00&duration=nope',
+    'ids=1,2,3',
+    'ids=1&ids=2',
+    'ids=[1,%202]',
+    'ids=1,0,a',
+    'ids=1,2,3,4',
+    'ids=1,,2',
+    'ids=',
+    'names=ab,cd',
+    'names=ab,abcd,',
+    'names=[]',
+    'names=%20a%20,b',
+    'days=2020-01-01,2020-02-01',
+    'days=2020-01-01',
+    'days=2020-01-01,nope',
+    'related=1',
+    'related=999',
+    'related=a',
+    'related_ids=1,2',
+    'related_ids=1,999,a',
+    'nested=abc',
+    'nested=',
+]
+
+DATA = [
+    {},
+    {'integer': 5, 'number': 1.5, 'char': 'abc'},
+    {'integer': True, 'number': '1.5', 'char': 5},
+    {'integer': 5.0, 'number': None, 'char': None},
+    {'integer': None, 'flag': None, 'null_flag': None},
+    {'flag': 1, 'null_flag': 0.0, 'choice': 1},
+    {'flag': [], 'choice': [1], 'char': ['a']},
+    {'ids': [1, 2], 'names': ['a', 'b']},
+    {'ids': ['1', 2, 3.0], 'names': []},
+    {'ids': [1, None], 'names': ['a', None]},
+    {'ids': '1,2', 'names': 'a'},
+    {'ids': {'a': 1}, 'days': ['2020-01-01', '2020-02-01']},
+    {'day': '2020-01-31', 'moment': '2020-01-31T10:00:00', 'related_ids': [1, 2]},
+    {'related': 1, 'related_ids': []},
+]
+
+
+class FastValidationParityTestCase(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        baker.make(RelatedIntIdModel, id=1)
+        baker.make(RelatedIntIdModel, id=2)
+
+    def assertParity(self, data):
+        expected = ParityFilter(data=data)
+        expected_valid = expected.is_valid()
+        for filter_class in (FastParityFilter, GeneratedParityFilter):
+            actual = filter_class(data=data)
+            self.assertEqual(actual.is_valid(), expected_valid)
+            self.assertEqual(actual.validated_data, expected.validated_data)
+            self.assertEqual(actual.errors, expected.errors)
+            for name, errors in expected.errors.items():
+                self.assertEqual(repr(actual.errors[name]), repr(errors))
+
+    def test_query_strings(self):
+        for query in QUERIES:
+            with self.subTest(query=query):
+                self.assertParity(QueryDict(query))
+
+    def test_json_data(self):
+        for data in DATA:
+            with self.subTest(data=data):
+                self.assertParity(data)
+
+    def test_not_a_mapping(self):
+        for data in (None, [], 'a=1'):
+            with self.subTest(data=data):
+                self.assertParity(data)
+
+    def test_validate_hook(self):
+        class Filter(filters.Filter):
+            fast_validation = True
+
+            start = filters.IntegerField()
+            end = filters.IntegerField()
+
+            def validate(self, attrs):
+                if attrs.get('start', 0) > attrs.get('end', 100):
+                    raise filters.ValidationError('start must be before end.')
+                return attrs
+
+        filter_ = Filter(data=QueryDict('start=5&end=1'))
+        self.assertFalse(filter_.is_valid())
+        self.assertEqual(filter_.errors, {'non_field_errors': ['start must be before end.']})
+
+    def test_model_filter(self):
+        class Filter(filters.ModelFilter):
+            fast_validation = True
+
+            class Meta:
+                model = TextModel
+                fields = '__all__'
+
+        text_model = baker.make(TextModel)
+        filter_ = Filter(data=QueryDict('char={char}&id={id}'.format(char=text_model.char, id=text_model.id)))
+        self.assertTrue(filter_.is_valid(), filter_.errors)
+        self.assertEqual(list(filter_.filter(filter_.validated_data)), [text_model])
+
+
+class ConverterTestCase(BaseTestCase):
+    def test_compiled_converters(self):
+        filter_ = FastParityFilter()
+        converters = filter_.get_converters()
+        self.assertEqual(converters['integer'], (convert_integer, True))
+        self.assertEqual(converters['ids'], (convert_list, True))
+        self.assertEqual(converters['price'], (convert_generic, True))
+        # A missing `BooleanField` key validates to `False`.
+        self.assertEqual(converters['flag'][1], False)
+        # Related fields and fields changing `run_validation` are validated by DRF.
+        self.assertEqual(converters['related'], (None, True))
+        self.assertEqual(converters['related_ids'], (convert_generic, True))
+        self.assertIs(FastParityFilter().get_converters(), converters)
+
+    def test_fallback_to_drf(self):
+        field = filters.IntegerField(max_value=10)
+        with mock.patch.object(field, 'run_validation', wraps=field.run_validation) as run_validation:
+            self.assertEqual(validate_value(field, '5', convert_integer), 5)
+            self.assertFalse(run_validation.called)
+            self.assertEqual(validate_value(field, '5.0', convert_integer), 5)
+            self.assertEqual(run_validation.call_count, 1)
+            with self.assertRaisesMessage(filters.ValidationError, 'less than or equal to 10'):
+                validate_value(field, '11', convert_integer)
+
+    def test_custom_field(self):
+        class DayField(filters.DateField):
+            def to_internal_value(self, value):
+                return super(DayField, self).to_internal_value(value) + datetime.timedelta(days=1)
+
+        class Filter(filters.Filter):
+            fast_validation = True
+
+            day = DayField()
+
+        self.assertIs(get_converter(DayField()), convert_generic)
+        filter_ = Filter(data=QueryDict('day=2020-01-01'))
+        self.assertTrue(filter_.is_valid())
+        self.assertEqual(filter_.validated_data, {'day': datetime.date(2020, 1, 2)})
+
+
+class FieldSpecTestCase(BaseTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        baker.make(RelatedIntIdModel, id=1)
+
+    def test_specs_are_shared(self):
+        prototype, specs = FastParityFilter.get_field_specs()
+        self.assertIs(FastParityFilter.get_field_specs()[1], specs)
+        self.assertEqual([spec.name for spec in specs], list(prototype.fields))
+        integer = specs[0]
+        self.assertEqual((integer.name, integer.converter, integer.optional, integer.shared),
+                         ('integer', convert_integer, True, True))
+        self.assertIs(integer.field, prototype.fields['integer'])
+        with self.assertRaises(AttributeError):
+            integer.optional = False
+
+    def test_validation_without_binding_fields(self):
+        class Filter(filters.Filter):
+            fast_validation = True
+
+            char = filters.CharField()
+            ids = filters.ListField(source='id', child=filters.IntegerField())
+
+        text_model = baker.make(TextModel)
+        filter_ = Filter(data=QueryDict('ids={id},0&page=2'.format(id=text_model.id)), queryset=TextModel.objects.all())
+        self.assertTrue(filter_.is_valid())
+        self.assertEqual(filter_.validated_data, {'id': [text_model.id, 0]})
+        self.assertEqual(list(filter_.filter(filter_.validated_data)), [text_model])
+        self.assertNotIn('fields', filter_.__dict__)
+
+        errors = Filter(data=QueryDict('char=&ids=1,a'))
+        self.assertFalse(errors.is_valid())
+        self.assertEqual(errors.errors['ids'][1][0].code, 'invalid')
+        self.assertNotIn('fields', errors.__dict__)
+
+    def test_unshared_fields_are_bound(self):
+        specs = {spec.name: spec for spec in FastParityFilter.get_field_specs()[1]}
+        self.assertFalse(specs['related'].shared)
+        self.assertFalse(specs['price'].shared)
+        filter_ = FastParityFilter(data=QueryDict('related=1'))
+        self.assertTrue(filter_.is_valid(), filter_.errors)
+        self.assertIn('fields', filter_.__dict__)
+        self.assertIs(filter_.fields['related'].parent, filter_)
+
+    def test_context_validators_are_not_shared(self):
+        def validator(value, field):
+            if value != field.context['expected']:
+                raise filters.ValidationError('Unexpected.')
+        validator.requires_context = True
+
+        class Filter(filters.Filter):
+            fast_validation = True
+
+            number = filters.IntegerField(validators=[validator])
+
+        self.assertFalse(Filter.get_field_specs()[1][0].shared)
+        self.assertTrue(Filter(data={'number': '1'}, context={'expected': 1}).is_valid())
+        self.assertFalse(Filter(data={'number': '1'}, context={'expected': 2}).is_valid())
+
+    def test_dynamic_fields(self):
+        class Filter(filters.Filter):
+            fast_validation = True
+
+            def __init__(self, *args, **kwargs):
+                super(Filter, self).__init__(*args, **kwargs)
+                self.fields['number'] = filters.IntegerField()
+
+        self.assertIsNone(Filter.get_field_specs())
+        filter_ = Filter(data={'number': '1'})
+        self.assertTrue(filter_.is_valid())
+        self.assertEqual(filter_.validated_data, {'number': 1})
+
+
+class BatchFilter(filters.Filter):
+    integers = filters.ListField(child=filters.IntegerField(min_value=-5, max_value=10 ** 30))
+    floats = filters.ListField(child=filters.FloatField(max_value=100))
+    decimals = filters.ListField(child=filters.DecimalField(max_digits=5, decimal_places=2))
+    uuids = filters.ListField(child=filters.UUIDField())
+    days = filters.ListField(child=filters.DateField())
+    formatted_days = filters.ListField(child=filters.DateField(input_formats=['%d/%m/%Y']))
+    times = filters.ListField(child=filters.TimeField())
+    moments = filters.ListField(child=filters.DateTimeField())
+
+
+BATCHES = {
+    'integers': [
+        ['1', '2', ' 3 ', '-5', '1_000'], [1, 2], ['1', 2], ['99999999999999999999'], ['1.0', '2'],
+        ['1', 'x'], ['1', ''], ['1', None], ['1', True], ['-6', '11'], ['1' * 1001], [1.5],
+    ],
+    'floats': [
+        ['1.5', ' 2 ', '-1e3', '.5'], [1, 2.5], ['1', 'nan'], ['inf'], ['1e400'], ['101'], [True], ['x', '1'],
+    ],
+    'decimals': [
+        ['1.5', ' 2 ', '-999.99', '1.239'], ['1000'], ['NaN'], ['1', 'x'], [1], ['1e2'],
+    ],
+    'uuids': [
+        ['5f1c6c6e-8e0b-4c5b-9d3e-2a6a2c1b8f00', '5F1C6C6E8E0B4C5B9D3E2A6A2C1B8F01'], ['x'], [1],
+    ],
+    'days': [
+        ['2024-01-05', '1999-12-31'], ['2024-1-5'], ['2024-02-30'], ['20240105'], ['2024-01-05T00:00'], [datetime.date(2024, 1, 5)],
+    ],
+    'formatted_days': [
+        ['05/01/2024'], ['2024-01-05'],
+    ],
+    'times': [
+        ['10:30', '10:30:00.250', '23:59:59.999999'], ['10:30:00+05:00'], ['24:00'], ['1030'], [datetime.time(10, 30)],
+    ],
+    'moments': [
+        ['2024-01-05T10:30:00Z', '2024-01-05 10:30', '2024-01-05T10:30:00+05:30'], ['2024-01-05T25:00'], ['2024-01-05'],
+    ],
+}
+
+
+class BatchValidationTestCase(BaseTestCase):
+    def validate(self, validate, *args):
+        try:
+            # NaN, which DRF accepts before 3.16, never equals itself.
+            return True, ['nan' if isinstance(value, float) and math.isnan(value) else value for value in validate(*args)]
+        except filters.ValidationError as exc:
+            return False, exc.detail
+
+    def assertParity(self, field, data):
+        expected = self.validate(RestListField.run_child_validation, field, data)
+        self.assertEqual(self.validate(field.run_child_validation, data), expected)
+        self.assertEqual(self.validate(validate_value, field, data, convert_list), expected)
+        return expected
+
+    def test_parity_with_drf(self):
+        fields = BatchFilter().fields
+        for numpy in (compat.numpy, None):
+            with mock.patch.object(compat, 'numpy', numpy):
+                for name, batches in BATCHES.items():
+                    for data in batches:
+                        with self.subTest(numpy=numpy is not None, field=name, data=data):
+                            self.assertParity(fields[name], data)
+
+    def test_errors_per_index(self):
+        field = BatchFilter().fields['integers']
+        valid, errors = self.assertParity(field, ['1', 'x', '-6', '3'])
+        self.assertFalse(valid)
+        self.assertEqual(errors, {
+            1: ['A valid integer is required.'],
+            2: ['Ensure this value is greater than or equal to -5.'],
+        })
+
+    def test_items_are_not_validated_one_by_one(self):
+        field = BatchFilter().fields['integers']
+        self.assertIsNotNone(get_batch_converter(field.child))
+        for field_class in (filters.DateField, filters.TimeField, filters.DateTimeField):
+            self.assertIsNotNone(get_batch_converter(field_class()))
+        with mock.patch.object(RestListField, 'run_child_validation') as run_child_validation:
+            self.assertEqual(field.run_child_validation([str(index) for index in range(1000)]), list(range(1000)))
+        self.assertFalse(run_child_validation.called)
+
+    def test_custom_fields(self):
+        class EvenField(filters.IntegerField):
+            def to_internal_value(self, data):
+                return super(EvenField, self).to_internal_value(data) * 2
+
+        self.assertIsNone(get_batch_converter(EvenField()))
+        self.assertIsNone(get_batch_converter(filters.CharField()))
+        field = filters.ListField(child=EvenField())
+        self.assertEqual(field.run_child_validation(['1', '2']), [2, 4])
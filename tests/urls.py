@@ -0,0 +1,56 @@
+from django.urls import include, path
+from rest_framework import generics, routers, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from djfilters.backend import DjFilterBackend
+
+from .filters import BooleanFilter, TextListFilter, TextModelFilter
+from .models import TextModel
+
+
+class TextListView(generics.ListAPIView):
+    queryset = TextModel.objects.all()
+    filter_backends = (DjFilterBackend,)
+    filter_class = TextModelFilter
+
+
+class TextSearchView(TextListView):
+    pass
+
+
+class UnfilteredView(generics.ListAPIView):
+    queryset = TextModel.objects.all()
+    filter_backends = (DjFilterBackend,)
+
+
+class FlagViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = TextModel.objects.all()
+    filter_backends = (DjFilterBackend,)
+    filter_class = BooleanFilter
+
+
+class TextViewSet(viewsets.GenericViewSet):
+    queryset = TextModel.objects.order_by('id')
+    filter_backends = (DjFilterBackend,)
+    filter_class = TextListFilter
+    filter_body_actions = ('search',)
+
+    def list(self, request, *args, **kwargs):
+        return Response([obj.id for obj in self.filter_queryset(self.get_queryset())])
+
+    @action(detail=False, methods=['post'])
+    def search(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
+
+
+router = routers.SimpleRouter()
+router.register('flags', FlagViewSet)
+router.register('texts', TextViewSet, basename='text')
+
+urlpatterns = [
+    path('texts/', TextListView.as_view()),
+    path('texts/search/', TextSearchView.as_view()),
+    path('unfiltered/', UnfilteredView.as_view()),
+    path('api/', include(router.urls)),
+]